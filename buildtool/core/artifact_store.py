@@ -0,0 +1,351 @@
+"""Almacén local de artefactos direccionado por contenido.
+
+Un mismo ``.jar`` suele generarse idéntico para varios perfiles y antes se
+copiaba completo a cada ``<output_base>/<proyecto>/<perfil>``. Con
+:class:`ArtifactStore` cada archivo se guarda una sola vez como
+``objects/<aa>/<sha256>`` y las carpetas de salida se pueblan con *reflink*
+(copia con *copy-on-write*) o *hardlink* cuando el sistema de archivos lo
+permite, y con una copia normal en otro caso.
+
+Cada archivo materializado se registra en ``index.sqlite3`` (ruta → digest),
+lo que sirve de contador de referencias: :meth:`ArtifactStore.gc` descarta
+las referencias cuyo archivo ya no existe o cambió y borra los blobs que se
+quedaron sin ninguna. El registro también permite conocer el digest de un
+artefacto de salida sin volver a leerlo (:meth:`ArtifactStore.digest_of`).
+
+Antes de materializar se elimina el destino; nunca se escribe sobre un
+archivo existente, porque con *hardlinks* se modificaría el blob compartido.
+
+El almacén está desactivado por defecto y solo compensa si vive en el mismo
+volumen que las carpetas de salida: en otro volumen cada artefacto se
+escribiría dos veces. :meth:`ArtifactStore.can_link` lo comprueba antes de
+usarlo.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+_HASH_CHUNK = 1024 * 1024
+_FICLONE = 0x40049409  # ioctl de Linux (btrfs, XFS, ...)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    path TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    method TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_refs_digest ON refs(digest);
+"""
+
+
+def _state_dir() -> pathlib.Path:
+    base = os.environ.get("APPDATA")
+    if base:
+        return pathlib.Path(base) / "ForgeBuild"
+    return pathlib.Path.home() / ".forgebuild"
+
+
+def artifact_store_dir() -> pathlib.Path:
+    override = os.environ.get("FORGEBUILD_ARTIFACT_STORE")
+    if override:
+        return pathlib.Path(override)
+    return _state_dir() / "artifact_store"
+
+
+def file_digest(path: pathlib.Path) -> str:
+    digest = hashlib.sha256()
+    with pathlib.Path(path).open("rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(src: pathlib.Path, dest: pathlib.Path) -> None:
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflink no soportado en esta plataforma")
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdest:
+        try:
+            fcntl.ioctl(fdest.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdest.close()
+            dest.unlink()
+            raise
+    shutil.copystat(src, dest)
+
+
+@dataclass
+class StoreGcReport:
+    refs_dropped: int = 0
+    blobs_deleted: int = 0
+    bytes_freed: int = 0
+
+
+class ArtifactStore:
+    """Blobs por SHA-256 con referencias desde las carpetas de salida."""
+
+    def __init__(
+        self,
+        root: Optional[pathlib.Path] = None,
+        *,
+        link_mode: str = "auto",
+        gc_grace_hours: float = 24.0,
+    ) -> None:
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Modo de enlace desconocido: {link_mode}")
+        self.root = pathlib.Path(root) if root else artifact_store_dir()
+        self.objects = self.root / "objects"
+        self.link_mode = link_mode
+        self.gc_grace_s = max(0.0, float(gc_grace_hours)) * 3600
+        # Dispositivos en los que ya falló un método, para no reintentarlo.
+        self._unsupported: set[tuple[str, int]] = set()
+        self._lock = threading.Lock()
+        self.objects.mkdir(parents=True, exist_ok=True)
+        with self._connect() as cx:
+            cx.executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls, cfg) -> Optional["ArtifactStore"]:
+        """Crea el almacén según ``cfg.artifact_store``; ``None`` si está desactivado."""
+
+        settings = getattr(cfg, "artifact_store", None)
+        if settings is None or not getattr(settings, "enabled", False):
+            return None
+        try:
+            return cls(
+                getattr(settings, "path", None),
+                link_mode=getattr(settings, "link_mode", "auto") or "auto",
+                gc_grace_hours=getattr(settings, "gc_grace_hours", 24.0),
+            )
+        except (OSError, sqlite3.Error):
+            return None
+
+    def _connect(self) -> sqlite3.Connection:
+        cx = sqlite3.connect(self.root / "index.sqlite3", timeout=30)
+        cx.execute("PRAGMA journal_mode=WAL")
+        return cx
+
+    def blob_path(self, digest: str) -> pathlib.Path:
+        return self.objects / digest[:2] / digest
+
+    def can_link(self, dest_dir: pathlib.Path) -> bool:
+        """``True`` si ``dest_dir`` está en el mismo volumen que el almacén.
+
+        Se usa la carpeta existente más cercana a ``dest_dir``. En otro
+        volumen no hay *reflink* ni *hardlink* posible y cada artefacto se
+        escribiría en el almacén y además en la salida.
+        """
+
+        path = pathlib.Path(dest_dir).expanduser().absolute()
+        while not path.exists() and path.parent != path:
+            path = path.parent
+        try:
+            return path.stat().st_dev == self.objects.stat().st_dev
+        except OSError:
+            return False
+
+    # ------------------------------------------------------------------
+    def put(self, src: pathlib.Path) -> str:
+        """Guarda ``src`` en el almacén (si no estaba) y devuelve su digest."""
+
+        src = pathlib.Path(src)
+        digest = file_digest(src)
+        blob = self.blob_path(digest)
+        size = src.stat().st_size
+        try:
+            present = blob.stat().st_size == size
+        except OSError:
+            present = False
+        if not present:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            staging = blob.parent / f".tmp-{uuid.uuid4().hex}"
+            try:
+                shutil.copy2(src, staging)
+                os.replace(staging, blob)
+            finally:
+                if staging.exists():
+                    staging.unlink()
+        with self._connect() as cx:
+            cx.execute(
+                "INSERT OR IGNORE INTO blobs(digest, size, created_at) VALUES(?, ?, ?)",
+                (digest, size, time.time()),
+            )
+        return digest
+
+    def materialize(self, digest: str, dest: pathlib.Path) -> str:
+        """Crea ``dest`` a partir del blob y devuelve el método usado."""
+
+        blob = self.blob_path(digest)
+        dest = pathlib.Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists() or dest.is_symlink():
+            dest.unlink()
+        try:
+            device = dest.parent.stat().st_dev
+        except OSError:
+            device = -1
+        if self.link_mode == "auto":
+            methods = ("reflink", "hardlink", "copy")
+        else:
+            methods = tuple(dict.fromkeys((self.link_mode, "copy")))
+        for method in methods:
+            if (method, device) in self._unsupported and method != "copy":
+                continue
+            try:
+                if method == "reflink":
+                    _reflink(blob, dest)
+                elif method == "hardlink":
+                    os.link(blob, dest)
+                else:
+                    shutil.copy2(blob, dest)
+                return method
+            except OSError:
+                if method == "copy":
+                    raise
+                with self._lock:
+                    self._unsupported.add((method, device))
+        raise OSError(f"No se pudo materializar {digest} en {dest}")
+
+    def install(self, src: pathlib.Path, dest: pathlib.Path) -> tuple[str, str]:
+        """Guarda ``src`` y lo materializa en ``dest``; devuelve ``(método, digest)``.
+
+        Si ``dest`` ya es una referencia vigente al mismo contenido no se
+        toca y el método es ``"unchanged"``.
+        """
+
+        digest = self.put(src)
+        dest = pathlib.Path(dest)
+        key = str(dest.resolve())
+        with self._connect() as cx:
+            row = cx.execute("SELECT digest, size, mtime_ns FROM refs WHERE path = ?", (key,)).fetchone()
+        if row and row[0] == digest:
+            try:
+                stat = dest.stat()
+                if (stat.st_size, stat.st_mtime_ns) == (row[1], row[2]):
+                    return "unchanged", digest
+            except OSError:
+                pass
+        method = self.materialize(digest, dest)
+        stat = dest.stat()
+        with self._connect() as cx:
+            cx.execute(
+                "INSERT OR REPLACE INTO refs(path, digest, size, mtime_ns, method, updated_at)"
+                " VALUES(?, ?, ?, ?, ?, ?)",
+                (key, digest, stat.st_size, stat.st_mtime_ns, method, time.time()),
+            )
+        return method, digest
+
+    def digest_of(self, path: pathlib.Path) -> Optional[str]:
+        """Digest registrado para ``path`` si el archivo no cambió desde entonces."""
+
+        path = pathlib.Path(path)
+        try:
+            stat = path.stat()
+            key = str(path.resolve())
+        except OSError:
+            return None
+        with self._connect() as cx:
+            row = cx.execute("SELECT digest, size, mtime_ns FROM refs WHERE path = ?", (key,)).fetchone()
+        if row and (row[1], row[2]) == (stat.st_size, stat.st_mtime_ns):
+            return row[0]
+        return None
+
+    # ------------------------------------------------------------------
+    def gc(self, *, cancel_event: Optional[threading.Event] = None, now: Optional[float] = None) -> StoreGcReport:
+        """Descarta referencias rotas y borra los blobs sin referencias.
+
+        Los blobs más recientes que ``gc_grace_hours`` se conservan aunque no
+        tengan referencias, para no competir con un build en curso.
+        """
+
+        now = time.time() if now is None else now
+        report = StoreGcReport()
+        with self._connect() as cx:
+            refs = cx.execute("SELECT path, size, mtime_ns FROM refs").fetchall()
+        stale = []
+        for path, size, mtime_ns in refs:
+            if cancel_event is not None and cancel_event.is_set():
+                return report
+            try:
+                stat = os.stat(path)
+                if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns):
+                    continue
+            except OSError:
+                pass
+            stale.append((path,))
+        with self._connect() as cx:
+            cx.executemany("DELETE FROM refs WHERE path = ?", stale)
+            report.refs_dropped = len(stale)
+            orphans = cx.execute(
+                "SELECT digest, size FROM blobs b WHERE created_at <= ?"
+                " AND NOT EXISTS (SELECT 1 FROM refs r WHERE r.digest = b.digest)",
+                (now - self.gc_grace_s,),
+            ).fetchall()
+        deleted = []
+        for digest, size in orphans:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            try:
+                self.blob_path(digest).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            deleted.append((digest,))
+            report.bytes_freed += int(size or 0)
+        with self._connect() as cx:
+            cx.executemany("DELETE FROM blobs WHERE digest = ?", deleted)
+        report.blobs_deleted = len(deleted)
+        # Restos de escrituras interrumpidas.
+        for leftover in self.objects.glob("*/.tmp-*"):
+            try:
+                if now - leftover.stat().st_mtime > self.gc_grace_s:
+                    leftover.unlink()
+            except OSError:
+                pass
+        return report
+
+
+def run_artifact_store_gc(
+    settings=None,
+    *,
+    log_cb=print,
+    cancel_event: Optional[threading.Event] = None,
+) -> bool:
+    """Ejecuta :meth:`ArtifactStore.gc` con ``Config.artifact_store`` como ``settings``."""
+
+    if settings is None or not getattr(settings, "enabled", False):
+        return True
+    store = ArtifactStore(
+        getattr(settings, "path", None),
+        link_mode=getattr(settings, "link_mode", "auto") or "auto",
+        gc_grace_hours=getattr(settings, "gc_grace_hours", 24.0),
+    )
+    report = store.gc(cancel_event=cancel_event)
+    if report.blobs_deleted:
+        log_cb(
+            f"[artefactos] GC: {report.blobs_deleted} blobs eliminados,"
+            f" {report.bytes_freed / (1024 * 1024):.1f} MB liberados."
+        )
+    return True
@@ -1,12 +1,65 @@
 from PySide6.QtCore import QObject, Signal, Slot, QThread
 
+from .line_batcher import LineBatcher
 from .thread_tracker import TRACKER
 
 
-class TaskWorker(QObject):
+class ProgressWorker(QObject):
+    """Base de los workers con progreso por línea o por lotes.
+
+    Por defecto cada línea se emite con ``progress(str)``. Tras
+    :meth:`set_batching`, las líneas se agrupan en el hilo del worker y se
+    emiten con ``progress_batch(list)`` cada ``interval_ms`` o al llegar a
+    ``max_lines``; los errores y el fin de la tarea vacían el lote al momento.
+    """
+
     progress = Signal(str)
+    progress_batch = Signal(list)
     finished = Signal(bool)
 
+    def __init__(self):
+        super().__init__()
+        self._batch_interval_ms = None
+        self._batch_max_lines = 200
+        self._batcher = None
+
+    def set_batching(self, interval_ms: int | None = 100, max_lines: int = 200):
+        """Activa (o con ``None`` desactiva) la emisión por lotes. Devuelve ``self``."""
+
+        self._batch_interval_ms = interval_ms
+        self._batch_max_lines = max_lines
+        return self
+
+    @property
+    def batching(self) -> bool:
+        return self._batch_interval_ms is not None
+
+    def emit_line(self, line: str) -> None:
+        if self._batcher is not None:
+            self._batcher.push(line)
+        else:
+            self.progress.emit(line)
+
+    def flush_progress(self) -> None:
+        if self._batcher is not None:
+            self._batcher.flush()
+
+    def _begin_progress(self) -> None:
+        if self.batching and self._batcher is None:
+            self._batcher = LineBatcher(
+                self.progress_batch.emit,
+                interval_ms=self._batch_interval_ms,
+                max_lines=self._batch_max_lines,
+            )
+
+    def _end_progress(self, ok: bool) -> None:
+        batcher, self._batcher = self._batcher, None
+        if batcher is not None:
+            batcher.close()
+        self.finished.emit(ok)
+
+
+class TaskWorker(ProgressWorker):
     def __init__(self, fn, *args, **kwargs):
         super().__init__()
         self._fn = fn
@@ -16,12 +69,14 @@ class TaskWorker(QObject):
     @Slot()
     def run(self):
         ok = False
+        self._begin_progress()
         try:
             ok = bool(self._fn(*self._args, **self._kwargs))
         except Exception as e:
-            self.progress.emit(f"[task][ERROR] {e!r}")
+            self.emit_line(f"[task][ERROR] {e!r}")
+            self.flush_progress()
             ok = False
-        self.finished.emit(ok)
+        self._end_progress(ok)
 
 
 def run_in_thread(fn_or_worker, *args, **kwargs):
@@ -0,0 +1,314 @@
+"""Caché local de artefactos de build por contenido del módulo.
+
+La clave de un módulo combina la huella de sus fuentes (el *tree* de Git de
+la carpeta del módulo más el contenido de los cambios sin confirmar, o un
+hash de los archivos si no es un repositorio Git), el contenido de sus POM
+padres (aunque estén fuera de la carpeta), los *goals*, el perfil efectivo,
+las variables de entorno que afectan a Maven y las claves de los módulos de
+los que depende, declarados o leídos de los ``pom.xml``. Si la clave ya está
+en caché se restauran los artefactos en ``target/`` y se omite Maven; la
+copia a los destinos del perfil sigue el flujo habitual.
+
+Los módulos cuyos *goals* escriben fuera de ``target/`` (``install``,
+``deploy``) no usan la caché: restaurarlos omitiría ese efecto.
+
+Las entradas viven en ``<estado>/build_cache/<proyecto>/<módulo>/<clave>/``
+y se conservan las ``max_entries_per_module`` más recientes de cada módulo.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import time
+import uuid
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+from .module_graph import pom_chain
+
+# Variables de entorno que cambian el resultado de Maven.
+CACHE_ENV_KEYS = ("JAVA_HOME", "MAVEN_HOME", "M2_HOME", "MAVEN_OPTS", "MAVEN_ARGS")
+# Fases cuyo efecto no queda en ``target/``.
+UNCACHEABLE_GOALS = ("install", "deploy")
+_MANIFEST = "manifest.json"
+_HASH_CHUNK = 1024 * 1024
+
+
+def _state_dir() -> pathlib.Path:
+    base = os.environ.get("APPDATA")
+    if base:
+        return pathlib.Path(base) / "ForgeBuild"
+    return pathlib.Path.home() / ".forgebuild"
+
+
+def build_cache_dir() -> pathlib.Path:
+    override = os.environ.get("FORGEBUILD_BUILD_CACHE")
+    if override:
+        return pathlib.Path(override)
+    return _state_dir() / "build_cache"
+
+
+def _popen_kwargs() -> dict:
+    if os.name != "nt":
+        return {}
+    return {"creationflags": getattr(subprocess, "CREATE_NO_WINDOW", 0)}
+
+
+def _git(cwd: pathlib.Path, *args: str) -> Optional[bytes]:
+    try:
+        proc = subprocess.run(
+            ["git", *args],
+            cwd=str(cwd),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            **_popen_kwargs(),
+        )
+    except OSError:
+        return None
+    return proc.stdout if proc.returncode == 0 else None
+
+
+def _hash_file(digest, path: pathlib.Path) -> None:
+    try:
+        with path.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+                digest.update(chunk)
+    except OSError:
+        digest.update(b"<missing>")
+
+
+def _git_fingerprint(module_dir: pathlib.Path) -> Optional[str]:
+    tree = _git(module_dir, "rev-parse", "HEAD:./")
+    if tree is None:
+        return None
+    status = _git(module_dir, "status", "--porcelain=v1", "-z", "--untracked-files=all", "--", ".")
+    if status is None:
+        return None
+    digest = hashlib.sha256(b"git\0" + tree.strip())
+    if status:
+        # Rutas de ``git status`` relativas a la raíz del repositorio.
+        top = _git(module_dir, "rev-parse", "--show-toplevel")
+        root = pathlib.Path(top.decode("utf-8").strip()) if top else module_dir
+        entries = status.split(b"\0")
+        index = 0
+        while index < len(entries):
+            entry = entries[index]
+            index += 1
+            if len(entry) < 4:
+                continue
+            code, rel = entry[:2], entry[3:]
+            if code[:1] in (b"R", b"C"):
+                index += 1  # la ruta de origen viene en la entrada siguiente
+            digest.update(b"\0" + code + b"\0" + rel)
+            _hash_file(digest, root / rel.decode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+def _walk_fingerprint(module_dir: pathlib.Path) -> str:
+    digest = hashlib.sha256(b"files\0")
+    for current, dirs, files in os.walk(module_dir):
+        dirs[:] = sorted(d for d in dirs if d != "target" and not d.startswith("."))
+        for name in sorted(files):
+            path = pathlib.Path(current) / name
+            digest.update(path.relative_to(module_dir).as_posix().encode("utf-8") + b"\0")
+            _hash_file(digest, path)
+    return digest.hexdigest()
+
+
+def source_fingerprint(module_dir: pathlib.Path) -> str:
+    """Huella de las fuentes de ``module_dir`` (Git si está disponible)."""
+
+    module_dir = pathlib.Path(module_dir)
+    if not module_dir.is_dir():
+        return "missing"
+    return _git_fingerprint(module_dir) or _walk_fingerprint(module_dir)
+
+
+def parent_poms_fingerprint(module_dir: pathlib.Path) -> str:
+    """Huella de los ``pom.xml`` padres de ``module_dir`` disponibles en disco."""
+
+    digest = hashlib.sha256(b"poms\0")
+    for path in pom_chain(pathlib.Path(module_dir))[1:]:
+        digest.update(str(path).encode("utf-8") + b"\0")
+        _hash_file(digest, path)
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Almacena y restaura los artefactos de ``target/`` por clave de contenido."""
+
+    def __init__(
+        self,
+        root: Optional[pathlib.Path] = None,
+        *,
+        max_entries_per_module: int = 3,
+        artifact_patterns: Sequence[str] = ("*.war", "*.jar"),
+        env_keys: Iterable[str] = (),
+    ) -> None:
+        self.root = pathlib.Path(root) if root else build_cache_dir()
+        self.max_entries_per_module = max(1, int(max_entries_per_module))
+        self.artifact_patterns = list(artifact_patterns)
+        self.env_keys = sorted(set(CACHE_ENV_KEYS) | set(env_keys))
+        self._fingerprints: Dict[pathlib.Path, str] = {}
+
+    @classmethod
+    def from_config(cls, cfg) -> Optional["BuildCache"]:
+        """Crea la caché según ``cfg.build_cache``; ``None`` si está desactivada."""
+
+        settings = getattr(cfg, "build_cache", None)
+        if settings is None or not getattr(settings, "enabled", False):
+            return None
+        return cls(
+            getattr(settings, "path", None),
+            max_entries_per_module=getattr(settings, "max_entries_per_module", 3),
+            artifact_patterns=getattr(cfg, "artifact_patterns", None) or ("*.war", "*.jar"),
+            env_keys=(getattr(cfg, "environment", None) or {}).keys(),
+        )
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def cacheable(goals: Sequence[str]) -> bool:
+        """``False`` si algún goal escribe fuera de ``target/`` (``install``, ``deploy``)."""
+
+        return not any(str(goal).split(":")[-1] in UNCACHEABLE_GOALS for goal in goals)
+
+    def fingerprint(self, module_dir: pathlib.Path) -> str:
+        module_dir = pathlib.Path(module_dir)
+        cached = self._fingerprints.get(module_dir)
+        if cached is None:
+            cached = self._fingerprints[module_dir] = source_fingerprint(module_dir)
+        return cached
+
+    def module_key(
+        self,
+        module_dir: pathlib.Path,
+        *,
+        goals: Sequence[str],
+        profile: Optional[str],
+        upstream: Optional[Mapping[str, str]] = None,
+    ) -> str:
+        """Clave del módulo; ``upstream`` mapea dependencia → su clave."""
+
+        payload = {
+            "sources": self.fingerprint(module_dir),
+            "parents": parent_poms_fingerprint(module_dir),
+            "goals": list(goals),
+            "profile": profile,
+            "env": {key: os.environ.get(key) for key in self.env_keys},
+            "upstream": dict(sorted((upstream or {}).items())),
+        }
+        body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    def _module_dir(self, project_key: str, module: str) -> pathlib.Path:
+        return self.root / project_key / module
+
+    def _artifacts(self, target_dir: pathlib.Path, extra_patterns: Sequence[str]) -> List[pathlib.Path]:
+        found: Dict[str, pathlib.Path] = {}
+        for pattern in [*self.artifact_patterns, *extra_patterns]:
+            for path in target_dir.glob(pattern):
+                if path.is_file():
+                    found[path.name] = path
+        return [found[name] for name in sorted(found)]
+
+    # ------------------------------------------------------------------
+    def restore(
+        self,
+        project_key: str,
+        module: str,
+        key: str,
+        target_dir: pathlib.Path,
+        *,
+        extra_patterns: Sequence[str] = (),
+    ) -> Optional[List[pathlib.Path]]:
+        """Copia la entrada ``key`` a ``target_dir``; ``None`` si no existe.
+
+        Antes se eliminan los artefactos previos de ``target_dir`` para que
+        el resultado sea el mismo que tras ``mvn clean package``.
+        """
+
+        entry = self._module_dir(project_key, module) / key
+        manifest_path = entry / _MANIFEST
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        files = [entry / name for name in manifest.get("files", [])]
+        if not all(path.is_file() for path in files):
+            return None
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self._artifacts(target_dir, extra_patterns):
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+        restored: List[pathlib.Path] = []
+        for path in files:
+            destination = target_dir / path.name
+            shutil.copy2(path, destination)
+            restored.append(destination)
+        try:
+            os.utime(manifest_path)
+        except OSError:
+            pass
+        return restored
+
+    def store(
+        self,
+        project_key: str,
+        module: str,
+        key: str,
+        target_dir: pathlib.Path,
+        *,
+        profile: Optional[str] = None,
+        extra_patterns: Sequence[str] = (),
+    ) -> bool:
+        """Guarda los artefactos de ``target_dir`` bajo ``key``.
+
+        La entrada se escribe en una carpeta temporal y se renombra al final,
+        así que una copia interrumpida nunca queda visible.
+        """
+
+        artifacts = self._artifacts(target_dir, extra_patterns)
+        if not artifacts:
+            return False
+        module_dir = self._module_dir(project_key, module)
+        entry = module_dir / key
+        staging = module_dir / f".tmp-{key[:12]}-{uuid.uuid4().hex[:8]}"
+        try:
+            staging.mkdir(parents=True)
+            for path in artifacts:
+                shutil.copy2(path, staging / path.name)
+            manifest = {
+                "module": module,
+                "profile": profile,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "files": [path.name for path in artifacts],
+            }
+            (staging / _MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+            if entry.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+            staging.replace(entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+        self._evict(module_dir)
+        return True
+
+    def _evict(self, module_dir: pathlib.Path) -> None:
+        entries = []
+        for child in module_dir.iterdir():
+            manifest = child / _MANIFEST
+            if child.name.startswith(".") or not manifest.is_file():
+                continue
+            try:
+                entries.append((manifest.stat().st_mtime, child))
+            except OSError:
+                continue
+        entries.sort(reverse=True)
+        for _, child in entries[self.max_entries_per_module :]:
+            shutil.rmtree(child, ignore_errors=True)
@@ -40,6 +40,10 @@ class Module(BaseModel):
     select_pattern: Optional[str] = None
     serial_across_profiles: bool = False
     copy_to_root: bool = False          # << NUEVO: copia a la raíz del perfil
+    depends_on: List[str] = Field(default_factory=list)  # módulos que deben compilarse antes
+    weight: float = 1.0  # plazas de worker que ocupa (2 módulos con peso > workers/2 no coinciden)
+    memory_mb: Optional[int] = None  # memoria estimada de su build; ajusta los workers automáticos
+    maven_threads: Optional[int] = None  # hilos de Maven (-T) y plazas del presupuesto de CPU; 1 si no se indica
 
 
 class Project(BaseModel):
@@ -49,6 +53,7 @@ class Project(BaseModel):
     execution_mode: Optional[str] = None  # integrated | separate_windows
     workspace: Optional[str] = None  # legacy
     repo: Optional[str] = None       # new
+    module_deps_from_pom: bool = False  # deriva depends_on de los pom.xml
 
 class DeployTarget(BaseModel):
     name: str
@@ -56,6 +61,11 @@ class DeployTarget(BaseModel):
     profiles: List[str]
     path_template: str
     hotfix_path_template: Optional[str] = None  # << NUEVO: ruta alternativa para hotfix
+    delta: bool = False  # copia solo lo que cambió según el manifiesto del destino
+    delete_orphans: bool = False  # con delta, borra lo que el build ya no produce
+    staged: bool = False  # copia en una carpeta hermana y publica con un renombrado al terminar
+    max_parallel: Optional[int] = 1  # perfiles desplegando a la vez en este destino; null: sin límite
+    max_mbps: Optional[float] = None  # MB/s para todas las copias a este destino; sin límite si no se indica
 
 class Group(BaseModel):
     key: str
@@ -65,6 +75,41 @@ class Group(BaseModel):
     projects: List[Project] = Field(default_factory=list)
     deploy_targets: List[DeployTarget] = Field(default_factory=list)
 
+class HistoryRetention(BaseModel):
+    """Política de retención del historial de pipelines (``None`` desactiva el límite).
+
+    Borra historial del usuario, así que solo se aplica con ``enabled: true``.
+    """
+    enabled: bool = False
+    max_age_days: Optional[int] = 180
+    failed_max_age_days: Optional[int] = 365  # las ejecuciones fallidas se conservan más tiempo
+    max_runs_per_pipeline: Optional[int] = None
+    failed_max_runs_per_pipeline: Optional[int] = None
+    max_db_mb: Optional[float] = None
+    batch_size: int = 200
+    pause_ms: int = 50
+
+class BuildCacheSettings(BaseModel):
+    """Caché de artefactos por contenido del módulo (ver ``core.build_cache``)."""
+    enabled: bool = False  # opcional: se omite Maven al restaurar
+    path: Optional[str] = None  # por defecto <estado>/build_cache
+    max_entries_per_module: int = 3
+
+class ArtifactStoreSettings(BaseModel):
+    """Almacén de artefactos por contenido (ver ``core.artifact_store``).
+
+    Desactivado por defecto: solo ahorra espacio si ``path`` está en el mismo
+    volumen que ``output_base``; si no, el build lo omite.
+    """
+    enabled: bool = False
+    path: Optional[str] = None  # por defecto <estado>/artifact_store
+    link_mode: str = "auto"  # auto | reflink | hardlink | copy
+    gc_grace_hours: float = 24.0
+
+class ProfileReuseSettings(BaseModel):
+    """Compilar una vez los módulos que no cambian entre perfiles (ver ``core.profile_inputs``)."""
+    mode: str = "off"  # off | pom | effective-pom
+
 class Config(BaseModel):
     paths: Paths
     artifact_patterns: List[str] = Field(default_factory=lambda: ["*.war","*.jar"])
@@ -73,9 +118,18 @@ class Config(BaseModel):
     environment: Dict[str, str] = Field(default_factory=dict)
     pipeline_presets: List[PipelinePreset] = Field(default_factory=list)
     max_build_workers: Optional[int] = None
+    build_cpu_budget: Optional[int] = None  # plazas de CPU para todos los Maven; núcleos lógicos si no se indica
+    copy_workers: Optional[int] = None  # copias simultáneas en cada deploy; 4 si no se indica
+    max_deploy_workers: Optional[int] = None  # perfiles desplegados a la vez; todos si no se indica
+    history_retention: HistoryRetention = Field(default_factory=HistoryRetention)
+    build_cache: BuildCacheSettings = Field(default_factory=BuildCacheSettings)
+    artifact_store: ArtifactStoreSettings = Field(default_factory=ArtifactStoreSettings)
+    profile_reuse: ProfileReuseSettings = Field(default_factory=ProfileReuseSettings)
 
 _APPLIED_ENV_KEYS: set[str] = set()
-_GROUPS_CACHE: Dict[Tuple[int, Optional[str]], List[Group]] = {}
+# La entrada guarda también la configuración: así su ``id`` no se reutiliza
+# mientras siga en caché.
+_GROUPS_CACHE: Dict[Tuple[int, Optional[str]], Tuple[object, List[Group]]] = {}
 
 
 def _package_data_dir() -> pathlib.Path:
@@ -147,8 +201,8 @@ def groups_for_user(cfg: Config, username: Optional[str] = None) -> List[Group]:
             user = ""
     key = (id(cfg), user or None)
     cached = _GROUPS_CACHE.get(key)
-    if cached is not None:
-        return cached
+    if cached is not None and cached[0] is cfg:
+        return cached[1]
 
     if not user:
         groups = list(cfg.groups or [])
@@ -159,7 +213,7 @@ def groups_for_user(cfg: Config, username: Optional[str] = None) -> List[Group]:
         except Exception:
             groups = list(cfg.groups or [])
 
-    _GROUPS_CACHE[key] = groups
+    _GROUPS_CACHE[key] = (cfg, groups)
     return groups
 
 def apply_environment(cfg: Config) -> None:
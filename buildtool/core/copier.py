@@ -1,8 +1,298 @@
+"""Copia de artefactos a las carpetas de salida y a los destinos de deploy.
+
+La copia se hace en dos fases. :func:`plan_copy` recorre el origen una sola
+vez con :func:`os.scandir`, con los patrones y exclusiones ya compilados, y
+devuelve la lista de archivos. :func:`copy_planned` los copia con un pool
+acotado de hilos y bloques grandes, de modo que un deploy a un recurso de red
+lo limita el ancho de banda y no la latencia de cada archivo.
+
+``log_cb`` y ``on_copied`` se invocan siempre en el hilo que llama, a medida
+que termina cada archivo. ``cancel_event`` se comprueba entre bloques: un
+archivo a medio copiar se elimina.
+"""
 
 from __future__ import annotations
-import shutil, pathlib, fnmatch
-from typing import Iterable, List, Optional
+
+import fnmatch
+import hashlib
+import os
+import pathlib
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from threading import Event
+from typing import Iterable, List, Optional
+
+DEFAULT_EXCLUDE_SUFFIXES = ("-sources.jar", "-javadoc.jar", "-tests.jar", ".pom")
+DEFAULT_EXCLUDE_DIRS = ("dependency", "dependencies", "lib", "libs", "WEB-INF", "classes")
+# Copias simultáneas y tamaño de bloque: suficientes para llenar un enlace a un NAS.
+DEFAULT_COPY_WORKERS = 4
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+
+
+def unlink_if_shared(target: pathlib.Path) -> None:
+    # Un hardlink del almacén de artefactos no debe sobrescribirse en sitio:
+    # se modificaría el blob compartido con otros perfiles.
+    try:
+        if target.stat().st_nlink > 1:
+            target.unlink()
+    except OSError:
+        pass
+
+
+@dataclass(frozen=True)
+class CopyItem:
+    src: pathlib.Path
+    rel: pathlib.PurePath  # ruta relativa al destino
+    size: int
+    mtime_ns: int = 0
+
+
+@dataclass
+class CopyStats:
+    """Totales de una o varias llamadas a :func:`copy_planned`."""
+
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def bytes_per_s(self) -> float:
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def describe(self) -> str:
+        mb = self.bytes / (1024 * 1024)
+        return f"{self.files} archivos, {mb:.1f} MB en {self.seconds:.1f}s ({self.bytes_per_s / (1024 * 1024):.1f} MB/s)"
+
+
+class RateLimiter:
+    """Límite de ancho de banda compartido entre hilos (cubo de fichas).
+
+    Permite ráfagas de hasta un segundo de transferencia; las copias que
+    comparten el limitador se reparten ``bytes_per_s``.
+    """
+
+    def __init__(self, bytes_per_s: float) -> None:
+        if bytes_per_s <= 0:
+            raise ValueError("bytes_per_s debe ser positivo")
+        self.rate = float(bytes_per_s)
+        self._tokens = self.rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_mbps(cls, mb_per_s: Optional[float]) -> Optional["RateLimiter"]:
+        return cls(mb_per_s * 1024 * 1024) if mb_per_s else None
+
+    def consume(self, amount: int, cancel_event: Event | None = None) -> bool:
+        """Espera hasta poder transferir ``amount`` bytes; ``False`` si se canceló."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # un bloque mayor que la ráfaga pasa en cuanto el cubo está lleno
+                needed = min(float(amount), self.rate)
+                if self._tokens >= needed:
+                    self._tokens -= amount
+                    return True
+                wait_s = (needed - self._tokens) / self.rate
+            if cancel_event is not None and cancel_event.wait(min(wait_s, 0.2)):
+                return False
+            if cancel_event is None:
+                time.sleep(min(wait_s, 0.2))
+
+
+def _name_matcher(patterns: Iterable[str]):
+    # mismo criterio que ``fnmatch.fnmatch`` (normcase), compilado una vez
+    regex = "|".join(fnmatch.translate(os.path.normcase(p)) for p in patterns)
+    if not regex:
+        return lambda _name: False
+    compiled = re.compile(regex)
+    return lambda name: compiled.match(os.path.normcase(name)) is not None
+
+
+def plan_copy(
+    src_dir: pathlib.Path,
+    patterns: Iterable[str],
+    *,
+    recursive: bool = False,
+    exclude_suffixes: Optional[List[str]] = None,
+    exclude_dirs: Optional[List[str]] = None,
+    prefix: pathlib.PurePath = pathlib.PurePath(),
+) -> List[CopyItem]:
+    """Archivos de ``src_dir`` que cumplen ``patterns``, en una sola pasada.
+
+    Con ``recursive`` se desciende por las subcarpetas salvo las de
+    ``exclude_dirs``. ``prefix`` se antepone a la ruta relativa de cada
+    archivo en el destino.
+    """
+    matches = _name_matcher(patterns)
+    suffixes = tuple(exclude_suffixes or DEFAULT_EXCLUDE_SUFFIXES)
+    skip_dirs = set(exclude_dirs or DEFAULT_EXCLUDE_DIRS)
+    items: List[CopyItem] = []
+    stack = [(pathlib.Path(src_dir), pathlib.PurePath(prefix))]
+    while stack:
+        current, rel = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                entries = sorted(entries, key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if recursive and entry.name not in skip_dirs and not entry.is_symlink():
+                        stack.append((pathlib.Path(entry.path), rel / entry.name))
+                    continue
+                if entry.name.endswith(suffixes) or not matches(entry.name):
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            items.append(CopyItem(pathlib.Path(entry.path), rel / entry.name, stat.st_size, stat.st_mtime_ns))
+    return items
+
+
+def file_sha256(path: pathlib.Path, buffer_size: int = COPY_BUFFER_SIZE) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(buffer_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_file(src: pathlib.Path, target: pathlib.Path, cancel_event: Event | None,
+               buffer_size: int = COPY_BUFFER_SIZE, digest=None,
+               rate_limiter: Optional[RateLimiter] = None) -> bool:
+    """Copia contenido y metadatos como ``shutil.copy2``; ``False`` si se canceló.
+
+    ``digest`` (un objeto de :mod:`hashlib`) se actualiza con cada bloque
+    leído, sin volver a leer el archivo. ``rate_limiter`` frena cada bloque
+    antes de escribirlo.
+    """
+    unlink_if_shared(target)
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    try:
+        with open(src, "rb") as fsrc, open(target, "wb") as fdst:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise InterruptedError
+                read = fsrc.readinto(buffer)
+                if not read:
+                    break
+                if rate_limiter is not None and not rate_limiter.consume(read, cancel_event):
+                    raise InterruptedError
+                fdst.write(view[:read])
+                if digest is not None:
+                    digest.update(view[:read])
+    except InterruptedError:
+        try:
+            target.unlink()
+        except OSError:
+            pass
+        return False
+    shutil.copystat(src, target)
+    return True
+
+
+def copy_planned(
+    items: Iterable[CopyItem],
+    dest_dir: pathlib.Path,
+    log_cb=print,
+    *,
+    cancel_event: Event | None = None,
+    on_copied=None,
+    store=None,
+    workers: Optional[int] = None,
+    stats: Optional[CopyStats] = None,
+    hashes: Optional[dict] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> int:
+    """Copia ``items`` bajo ``dest_dir`` con hasta ``workers`` hilos.
+
+    Devuelve cuántos archivos se copiaron. ``stats`` acumula archivos, bytes
+    y tiempo. Con ``hashes`` se guarda el SHA-256 de cada archivo copiado,
+    indexado por su :class:`CopyItem`, calculado mientras se copia. Si falla
+    una copia se dejan de lanzar las demás y se propaga el error.
+    ``rate_limiter`` limita el ancho de banda (no aplica con ``store``).
+    """
+    items = list(items)
+    dest_dir = pathlib.Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    for parent in {item.rel.parent for item in items}:
+        (dest_dir / parent).mkdir(parents=True, exist_ok=True)
+    stop = Event()
+
+    def _one(item: CopyItem) -> Optional[str]:
+        if stop.is_set() or (cancel_event is not None and cancel_event.is_set()):
+            return None
+        target = dest_dir / item.rel
+        if store is not None:
+            method, sha = store.install(item.src, target)
+            if hashes is not None:
+                hashes[item] = sha
+            return method
+        digest = hashlib.sha256() if hashes is not None else None
+        if not _copy_file(item.src, target, cancel_event, digest=digest, rate_limiter=rate_limiter):
+            return None
+        if digest is not None:
+            hashes[item] = digest.hexdigest()
+        return ""
+
+    started = time.monotonic()
+    copied = copied_bytes = 0
+
+    def _done(item: CopyItem, method: Optional[str]) -> None:
+        nonlocal copied, copied_bytes
+        if method is None:
+            return
+        target = dest_dir / item.rel
+        log_cb(f"Copiado: {item.src} -> {target}" + (f" ({method})" if method else ""))
+        if on_copied:
+            on_copied(target)
+        copied += 1
+        copied_bytes += item.size
+
+    workers = max(1, min(int(workers or DEFAULT_COPY_WORKERS), len(items) or 1))
+    try:
+        if workers == 1:
+            for item in items:
+                _done(item, _one(item))
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="copy") as pool:
+                pending = {}
+                queue = iter(items)
+                error: Optional[Exception] = None
+                while True:
+                    while len(pending) < workers * 2 and error is None:
+                        item = next(queue, None)
+                        if item is None:
+                            break
+                        pending[pool.submit(_one, item)] = item
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item = pending.pop(future)
+                        try:
+                            _done(item, future.result())
+                        except Exception as err:
+                            stop.set()
+                            error = error or err
+                if error is not None:
+                    raise error
+    finally:
+        if stats is not None:
+            stats.files += copied
+            stats.bytes += copied_bytes
+            stats.seconds += time.monotonic() - started
+    return copied
+
 
 def copy_artifacts(
     src_dir: pathlib.Path,
@@ -14,31 +304,22 @@ def copy_artifacts(
     exclude_suffixes: Optional[List[str]]=None,
     exclude_dirs: Optional[List[str]]=None,
     cancel_event: Event | None = None,
+    on_copied=None,
+    store=None,
+    workers: Optional[int] = None,
+    stats: Optional[CopyStats] = None,
 ) -> int:
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    n = 0
-    exclude_suffixes = exclude_suffixes or ["-sources.jar","-javadoc.jar","-tests.jar",".pom"]
-    exclude_dirs = set(exclude_dirs or ["dependency","dependencies","lib","libs","WEB-INF","classes"])
-    iterator = src_dir.rglob("*") if recursive else src_dir.glob("*")
-    for path in iterator:
-        if cancel_event and cancel_event.is_set():
-            break
-        if path.is_dir():
-            continue
-        name = path.name
-        if recursive:
-            rel_path = path.relative_to(src_dir)
-            if any(part in exclude_dirs for part in rel_path.parts[:-1]):
-                continue
-        else:
-            rel_path = None
-        if any(name.endswith(s) for s in exclude_suffixes):
-            continue
-        if not any(fnmatch.fnmatch(name, pat) for pat in patterns):
-            continue
-        target = dest_dir / (rel_path if recursive else name)
-        target.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(path, target)
-        log_cb(f"Copiado: {path} -> {target}")
-        n += 1
-    return n
+    """Copia los archivos de ``src_dir`` que cumplen ``patterns`` a ``dest_dir``.
+
+    Con ``store`` (:class:`~buildtool.core.artifact_store.ArtifactStore`)
+    los archivos pasan por el almacén por contenido y el destino se crea con
+    *reflink*/*hardlink* cuando es posible. Ver :func:`plan_copy` y
+    :func:`copy_planned`.
+    """
+    items = plan_copy(
+        src_dir, patterns, recursive=recursive, exclude_suffixes=exclude_suffixes, exclude_dirs=exclude_dirs
+    )
+    return copy_planned(
+        items, dest_dir, log_cb, cancel_event=cancel_event, on_copied=on_copied, store=store,
+        workers=workers, stats=stats,
+    )
@@ -0,0 +1,302 @@
+"""Manifiesto de los archivos desplegados en un destino.
+
+Cada deploy deja en la carpeta de la versión ``.forgebuild-manifest.<perfil>.json``
+con la ruta relativa, el tamaño, el ``mtime`` del origen y el SHA-256 de cada
+archivo, calculado mientras se copia. :func:`verify_manifest` vuelve a
+calcular los SHA-256 del destino con un pool de hilos y compara.
+
+Hay un manifiesto por perfil porque varios perfiles pueden desplegar en la
+misma carpeta: cada uno compara y depura solo lo suyo. El nombre anterior,
+``.forgebuild-manifest.json``, se sigue leyendo si su perfil coincide.
+
+En un deploy delta (``DeployTarget.delta``) el manifiesto anterior
+decide qué archivos se pueden omitir:
+
+* si el origen tiene el mismo tamaño y ``mtime`` que el registrado, y el
+  destino sigue con ese tamaño, no se lee nada;
+* si solo cambió el ``mtime``, se compara el SHA-256 del origen con el
+  registrado;
+* en cualquier otro caso el archivo se copia.
+
+Los huérfanos son los archivos del manifiesto anterior que ya no produce el
+build; solo se borran con ``DeployTarget.delete_orphans``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from threading import Event
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .copier import DEFAULT_COPY_WORKERS, CopyItem, file_sha256
+
+MANIFEST_NAME = ".forgebuild-manifest.json"  # nombre sin perfil de versiones anteriores
+_MANIFEST_PREFIX = ".forgebuild-manifest"
+
+
+def manifest_name(profile: Optional[str]) -> str:
+    """Nombre del manifiesto de ``profile`` (el anterior si no hay perfil)."""
+
+    if not profile:
+        return MANIFEST_NAME
+    safe = re.sub(r"[^\w.-]", "_", profile)
+    return f"{_MANIFEST_PREFIX}.{safe}.json"
+
+
+@dataclass
+class ManifestEntry:
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+@dataclass
+class DeployManifest:
+    version: Optional[str] = None
+    profile: Optional[str] = None
+    files: Dict[str, ManifestEntry] = field(default_factory=dict)
+
+    @staticmethod
+    def path_for(dest_dir: pathlib.Path, profile: Optional[str] = None) -> pathlib.Path:
+        return pathlib.Path(dest_dir) / manifest_name(profile)
+
+    @classmethod
+    def _read(cls, path: pathlib.Path) -> Optional["DeployManifest"]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            files = {
+                rel: ManifestEntry(int(entry["size"]), int(entry["mtime_ns"]), str(entry["sha256"]))
+                for rel, entry in (data.get("files") or {}).items()
+            }
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return None
+        return cls(data.get("version"), data.get("profile"), files)
+
+    @classmethod
+    def load(cls, dest_dir: pathlib.Path, profile: Optional[str] = None) -> Optional["DeployManifest"]:
+        """Manifiesto de ``profile`` en ``dest_dir`` o ``None`` si no existe o está dañado.
+
+        Sin manifiesto propio se usa el de nombre anterior solo si lo escribió
+        ``profile``: el de otro perfil no sirve de referencia.
+        """
+
+        manifest = cls._read(cls.path_for(dest_dir, profile))
+        if manifest is None and profile:
+            manifest = cls._read(cls.path_for(dest_dir))
+            if manifest is not None and manifest.profile != profile:
+                return None
+        return manifest
+
+    @classmethod
+    def owned_by_others(cls, dest_dir: pathlib.Path, profile: Optional[str]) -> Set[str]:
+        """Rutas que registran en ``dest_dir`` los manifiestos de otros perfiles."""
+
+        owned: Set[str] = set()
+        for path in pathlib.Path(dest_dir).glob(f"{_MANIFEST_PREFIX}*.json"):
+            manifest = cls._read(path)
+            if manifest is not None and manifest.profile != profile:
+                owned.update(manifest.files)
+        return owned
+
+    def save(self, dest_dir: pathlib.Path) -> None:
+        """Escribe el manifiesto de forma atómica."""
+
+        path = self.path_for(dest_dir, self.profile)
+        body = {
+            "version": self.version,
+            "profile": self.profile,
+            "files": {rel: asdict(entry) for rel, entry in sorted(self.files.items())},
+        }
+        fd, tmp = tempfile.mkstemp(prefix=".forgebuild-manifest-", dir=str(path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(body, fh, indent=2)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        legacy = self.path_for(dest_dir)
+        if self.profile and legacy != path:
+            previous = self._read(legacy)
+            if previous is not None and previous.profile == self.profile:
+                try:
+                    legacy.unlink()
+                except OSError:
+                    pass
+
+
+@dataclass
+class DeltaPlan:
+    copy: List[CopyItem] = field(default_factory=list)
+    skipped: Dict[str, ManifestEntry] = field(default_factory=dict)
+    orphans: List[str] = field(default_factory=list)
+
+    @property
+    def skipped_bytes(self) -> int:
+        return sum(entry.size for entry in self.skipped.values())
+
+
+def _key(item: CopyItem) -> str:
+    return item.rel.as_posix()
+
+
+def _unchanged(item: CopyItem, previous: ManifestEntry, dest_dir: pathlib.Path) -> Optional[ManifestEntry]:
+    try:
+        if (dest_dir / item.rel).stat().st_size != previous.size:
+            return None
+    except OSError:
+        return None
+    if item.size != previous.size:
+        return None
+    if item.mtime_ns == previous.mtime_ns:
+        return previous
+    try:
+        digest = file_sha256(item.src)
+    except OSError:
+        return None
+    return ManifestEntry(item.size, item.mtime_ns, digest) if digest == previous.sha256 else None
+
+
+def plan_delta(
+    items: Iterable[CopyItem], dest_dir: pathlib.Path, previous: Optional[DeployManifest]
+) -> DeltaPlan:
+    """Separa ``items`` en los que hay que copiar y los que ya están en ``dest_dir``."""
+
+    plan = DeltaPlan()
+    items = list(items)
+    if previous is None:
+        plan.copy = items
+        return plan
+    dest_dir = pathlib.Path(dest_dir)
+    for item in items:
+        entry = previous.files.get(_key(item))
+        same = _unchanged(item, entry, dest_dir) if entry is not None else None
+        if same is None:
+            plan.copy.append(item)
+        else:
+            plan.skipped[_key(item)] = same
+    planned = {_key(item) for item in items}
+    plan.orphans = sorted(rel for rel in previous.files if rel not in planned)
+    return plan
+
+
+def manifest_for(
+    plan: DeltaPlan, hashes: Dict[CopyItem, str], *, version: Optional[str] = None, profile: Optional[str] = None
+) -> DeployManifest:
+    """Manifiesto con los archivos omitidos y los copiados (los que tienen hash)."""
+
+    files = dict(plan.skipped)
+    for item, digest in hashes.items():
+        files[_key(item)] = ManifestEntry(item.size, item.mtime_ns, digest)
+    return DeployManifest(version, profile, files)
+
+
+def remove_orphans(dest_dir: pathlib.Path, orphans: Iterable[str]) -> Tuple[int, int]:
+    """Borra ``orphans`` de ``dest_dir``; devuelve archivos y bytes eliminados."""
+
+    dest_dir = pathlib.Path(dest_dir)
+    removed = removed_bytes = 0
+    for rel in orphans:
+        relative = pathlib.PurePosixPath(rel)
+        if relative.is_absolute() or ".." in relative.parts:
+            continue
+        path = dest_dir / relative
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            continue
+        removed += 1
+        removed_bytes += size
+        # carpetas que quedan vacías
+        parent = path.parent
+        while parent != dest_dir:
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+    return removed, removed_bytes
+
+
+@dataclass
+class VerifyReport:
+    checked: int = 0
+    bytes: int = 0
+    mismatched: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    unexpected: List[str] = field(default_factory=list)  # en el destino pero no en el manifiesto
+    cancelled: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not (self.mismatched or self.missing or self.cancelled)
+
+
+def _destination_files(dest_dir: pathlib.Path) -> List[str]:
+    found: List[str] = []
+    stack = [dest_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(pathlib.Path(entry.path))
+                    elif not entry.name.startswith(".forgebuild-manifest"):
+                        found.append(pathlib.Path(entry.path).relative_to(dest_dir).as_posix())
+        except OSError:
+            continue
+    return found
+
+
+def verify_manifest(
+    dest_dir: pathlib.Path,
+    manifest: DeployManifest,
+    *,
+    workers: Optional[int] = None,
+    cancel_event: Event | None = None,
+    foreign: Iterable[str] = (),
+) -> VerifyReport:
+    """Recalcula el SHA-256 de cada archivo de ``manifest`` en ``dest_dir``.
+
+    ``foreign`` son rutas de otros perfiles en la misma carpeta: no se
+    comprueban ni se informan como no registradas.
+    """
+
+    dest_dir = pathlib.Path(dest_dir)
+    report = VerifyReport()
+
+    def _check(rel: str) -> Tuple[str, Optional[str], int]:
+        if cancel_event is not None and cancel_event.is_set():
+            return rel, None, -1
+        path = dest_dir / rel
+        try:
+            return rel, file_sha256(path), path.stat().st_size
+        except OSError:
+            return rel, None, 0
+
+    with ThreadPoolExecutor(max_workers=max(1, int(workers or DEFAULT_COPY_WORKERS)),
+                            thread_name_prefix="verify") as pool:
+        for rel, digest, size in pool.map(_check, sorted(manifest.files)):
+            if size < 0:
+                report.cancelled = True
+                continue
+            if digest is None:
+                report.missing.append(rel)
+                continue
+            report.checked += 1
+            report.bytes += size
+            if digest != manifest.files[rel].sha256:
+                report.mismatched.append(rel)
+    report.unexpected = sorted(set(_destination_files(dest_dir)) - set(manifest.files) - set(foreign))
+    return report
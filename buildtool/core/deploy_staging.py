@@ -0,0 +1,173 @@
+"""Deploys preparados en una carpeta de staging y publicados de una vez.
+
+Con ``DeployTarget.staged`` el deploy no escribe en la carpeta final: copia
+en una carpeta hermana (``.<versión>.staging``) y, al terminar, la publica
+con un renombrado. Quien lea el recurso compartido ve la versión anterior o
+la nueva completa, nunca una a medias.
+
+El staging parte de una réplica de la carpeta publicada hecha con
+*hardlinks* (:func:`seed_stage`), así que publicar no pierde los archivos
+que este deploy no escribe: los de otros perfiles con el mismo destino o los
+dejados a mano. Solo se eliminan los huérfanos que registraba el manifiesto
+anterior y, en un deploy delta, los archivos que no cambiaron no se copian.
+Si el destino no admite *hardlinks*, el deploy con staging se rechaza
+(:class:`StagingNotSupported`): replicarlo con copias transferiría la
+carpeta publicada entera en cada deploy.
+
+Cada archivo terminado se anota en un diario (``.forgebuild-journal.jsonl``)
+dentro del staging. Si el deploy se cancela o falla, el staging se conserva
+y el siguiente intento solo copia lo que falta; lo que el diario registra
+nunca se reemplaza por la versión publicada.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import shutil
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from .deploy_manifest import MANIFEST_NAME, DeployManifest, ManifestEntry
+
+JOURNAL_NAME = ".forgebuild-journal.jsonl"
+
+
+class StagingNotSupported(OSError):
+    """El destino no admite los *hardlinks* que necesita el staging."""
+
+
+def staging_dir(dst: pathlib.Path) -> pathlib.Path:
+    dst = pathlib.Path(dst)
+    return dst.parent / f".{dst.name}.staging"
+
+
+class StagingJournal:
+    """Diario de los archivos ya completos en el staging (una línea JSON por archivo)."""
+
+    def __init__(self, stage: pathlib.Path) -> None:
+        self.path = pathlib.Path(stage) / JOURNAL_NAME
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[DeployManifest]:
+        """Archivos registrados, o ``None`` si no hay diario."""
+
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return None
+        files: Dict[str, ManifestEntry] = {}
+        for line in lines:
+            try:
+                data = json.loads(line)
+                files[str(data["rel"])] = ManifestEntry(int(data["size"]), int(data["mtime_ns"]), str(data["sha256"]))
+            except (ValueError, TypeError, KeyError):
+                # última línea cortada por una interrupción
+                continue
+        return DeployManifest(files=files)
+
+    def record(self, rel: str, entry: ManifestEntry) -> None:
+        line = json.dumps({"rel": rel, "size": entry.size, "mtime_ns": entry.mtime_ns, "sha256": entry.sha256})
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+
+    def remove(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def seed_stage(
+    stage: pathlib.Path,
+    live: pathlib.Path,
+    skip: Iterable[str] = (),
+    cancel_event: threading.Event | None = None,
+) -> Set[str]:
+    """Replica en ``stage`` los archivos de ``live``; devuelve sus rutas relativas.
+
+    Cada archivo se enlaza (*hardlink*). Si el sistema de archivos no lo
+    permite (recurso SMB sin soporte) se lanza :class:`StagingNotSupported`
+    en lugar de copiar: la copia no respetaría el delta ni ``max_mbps``. Las
+    rutas de ``skip`` (las que ya preparó este deploy) no se tocan. El
+    diario no se replica; los manifiestos sí, porque los de otros perfiles
+    deben seguir publicados. Si ``cancel_event`` se activa, la réplica se
+    interrumpe y el resultado queda incompleto.
+    """
+
+    stage, live = pathlib.Path(stage), pathlib.Path(live)
+    skip = set(skip) | {JOURNAL_NAME}
+    found: Set[str] = set()
+    if not live.is_dir():
+        return found
+    for path in live.rglob("*"):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        if path.is_dir() and not path.is_symlink():
+            continue
+        rel = path.relative_to(live).as_posix()
+        if rel == JOURNAL_NAME:
+            continue
+        found.add(rel)
+        if rel in skip:
+            continue
+        target = stage / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.exists() or target.is_symlink():
+            target.unlink()
+        try:
+            os.link(path, target)
+        except OSError as err:
+            raise StagingNotSupported(
+                f"No se puede crear un hardlink de {path} en {stage} ({err}); "
+                "desactive 'staged' en este target"
+            ) from err
+    return found
+
+
+def prune_stage(stage: pathlib.Path, keep: Iterable[str]) -> int:
+    """Borra del staging los archivos que no están en ``keep`` (restos de otros intentos)."""
+
+    stage = pathlib.Path(stage)
+    keep = set(keep) | {JOURNAL_NAME, MANIFEST_NAME}
+    removed = 0
+    for path in sorted(stage.rglob("*"), reverse=True):
+        rel = path.relative_to(stage).as_posix()
+        try:
+            if path.is_dir() and not path.is_symlink():
+                continue
+            if rel not in keep:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def publish(stage: pathlib.Path, dst: pathlib.Path) -> None:
+    """Sustituye ``dst`` por ``stage`` con dos renombrados.
+
+    La versión anterior se aparta como ``.<versión>.old`` y se borra al
+    final; si el segundo renombrado falla, se restaura. Entre los dos
+    renombrados ``dst`` no existe durante un instante: quien lo abra justo
+    entonces no lo encuentra y debe reintentar. Lo que se escriba en ``dst``
+    mientras dura el deploy, fuera de este proceso, queda en ``.old`` y se
+    pierde; los deploys de ForgeBuild a una misma carpeta se serializan.
+    """
+
+    stage, dst = pathlib.Path(stage), pathlib.Path(dst)
+    if not dst.exists():
+        os.rename(stage, dst)
+        return
+    old = dst.parent / f".{dst.name}.old"
+    if old.exists():
+        shutil.rmtree(old)
+    os.rename(dst, old)
+    try:
+        os.rename(stage, dst)
+    except OSError:
+        os.rename(old, dst)
+        raise
+    shutil.rmtree(old, ignore_errors=True)
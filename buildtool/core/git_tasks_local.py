@@ -20,6 +20,7 @@ from buildtool.core.branch_store import (
 from buildtool.core.git_console_trace import clog
 from buildtool.core.git_tasks import _iter_modules as _iter_modules_cfg
 from .config import groups_for_user
+from .process_runner import run_process
 from .session import current_username
 
 # --------------------- helpers de salida y ejecución ---------------------
@@ -56,22 +57,16 @@ else:
 def _run(cmd: List[str], cwd: Path, emit=None) -> Tuple[int, str]:
     """Ejecuta un comando y transmite stdout/stderr línea por línea al logger."""
     _out(emit, f"$ {' '.join(cmd)}  (cwd={cwd})")
-    popen_kwargs = _popen_kwargs()
-    p = subprocess.Popen(
+    result = run_process(
         cmd,
         cwd=str(cwd),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        shell=False,
-        **popen_kwargs,
+        on_line=lambda ln: _out(emit, ln.rstrip()),
+        capture=True,
+        **_popen_kwargs(),
     )
-    out = p.communicate()[0]
-    for ln in out.splitlines():
-        _out(emit, ln.rstrip())
-    rc = p.wait()
+    rc = result.returncode
     _out(emit, f"[rc={rc}] {' '.join(cmd)}")
-    return rc, out
+    return rc, result.output or ""
 
 
 def _run_quiet(cmd: List[str], cwd: Path) -> subprocess.CompletedProcess:
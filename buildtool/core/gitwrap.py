@@ -1,8 +1,10 @@
 
 from __future__ import annotations
-import subprocess, os
+import os
 from dataclasses import dataclass
 
+from .process_runner import run_process
+
 @dataclass
 class GitResult:
     code: int
@@ -10,16 +12,8 @@ class GitResult:
 
 def _run(cmd, cwd: str, env: dict | None = None) -> GitResult:
     try:
-        proc = subprocess.Popen(
-            cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
-            env={**os.environ, **(env or {})}
-        )
-        out = []
-        assert proc.stdout is not None
-        for line in proc.stdout:
-            out.append(line)
-        code = proc.wait()
-        return GitResult(code, "".join(out))
+        result = run_process(cmd, cwd=cwd, env={**os.environ, **(env or {})}, capture=True)
+        return GitResult(result.returncode, result.output or "")
     except Exception as e:
         return GitResult(999, f"{type(e).__name__}: {e}")
 
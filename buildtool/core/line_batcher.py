@@ -0,0 +1,71 @@
+"""Agrupación de líneas de log para emitirlas en lotes.
+
+Los workers de Qt emitían una señal por línea, lo que convierte cada línea de
+Maven en un evento entre hilos. :class:`LineBatcher` acumula las líneas en el
+hilo que las produce y entrega listas a ``sink`` cuando se alcanza
+``max_lines`` o cuando pasa ``interval_ms`` desde la última entrega.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, List, Optional
+
+
+class LineBatcher:
+    """Acumula líneas y las entrega a ``sink`` en listas ordenadas.
+
+    ``push`` puede llamarse desde cualquier hilo. Un hilo *daemon* vacía el
+    búfer cada ``interval_ms`` para que las líneas no queden retenidas cuando
+    la tarea deja de escribir; ``flush`` y ``close`` fuerzan la entrega.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[str]], None],
+        *,
+        interval_ms: int = 100,
+        max_lines: int = 200,
+    ) -> None:
+        self._sink = sink
+        self._interval = max(1, int(interval_ms)) / 1000.0
+        self._max_lines = max(1, int(max_lines))
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+        # Serializa las entregas para que los lotes lleguen en orden aunque
+        # ``push`` y el hilo de vaciado coincidan.
+        self._emit_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def push(self, line: str) -> None:
+        with self._lock:
+            self._pending.append(line)
+            full = len(self._pending) >= self._max_lines
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(
+                    target=self._flush_loop, name="line-batcher", daemon=True
+                )
+                self._thread.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._emit_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if batch:
+                self._sink(batch)
+
+    def close(self) -> None:
+        """Detiene el hilo de vaciado y entrega lo pendiente."""
+
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=max(1.0, self._interval * 4))
+        self.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.flush()
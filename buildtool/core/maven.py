@@ -1,17 +1,73 @@
 
 from __future__ import annotations
-import subprocess, os, shlex, time
+import subprocess, os, shlex
 
 from threading import Event
 
-def run_maven(module_path: str, goals, profile: str | None = None,
-              env: dict | None = None, log_cb=print,
-              separate_window: bool = False,
-              cancel_event: Event | None = None) -> int:
+from .maven_events import MavenOutputParser
+from .process_runner import run_process
+
+
+def _has_thread_flag(goals) -> bool:
+    return any(g in ("-T", "--threads") or (g.startswith("-T") and len(g) > 2) or g.startswith("--threads=")
+               for g in goals)
+
+
+def maven_command(goals, profile: str | None = None, threads: int | None = None) -> list[str]:
+    """Línea de comandos de Maven; ``threads`` añade ``-T`` si los goals no lo traen."""
     mvn_exe = "mvn.cmd" if os.name == "nt" else "mvn"
     mvn_cmd = [mvn_exe, *goals]
     if profile:
         mvn_cmd += ["-P", profile]
+    if threads and not _has_thread_flag(goals):
+        mvn_cmd += ["-T", str(int(threads))]
+    return mvn_cmd
+
+
+def maven_env(env: dict | None = None, threads: int | None = None) -> dict:
+    """Entorno del proceso; con ``threads`` la JVM ve solo esos procesadores.
+
+    ``-XX:ActiveProcessorCount`` ajusta los hilos del GC y del JIT a las
+    plazas reservadas, salvo que ``MAVEN_OPTS`` ya lo fije.
+    """
+    merged = {**os.environ, **(env or {})}
+    if threads:
+        opts = merged.get("MAVEN_OPTS", "")
+        if "ActiveProcessorCount" not in opts:
+            merged["MAVEN_OPTS"] = f"{opts} -XX:ActiveProcessorCount={int(threads)}".strip()
+    return merged
+
+
+def _report_stop(result, log_cb) -> None:
+    if result.stop_s is None:
+        return
+    how = "forzado (kill) tras no responder" if result.killed else "terminado"
+    log_cb(f"[cancelación] Maven {how}; árbol de procesos liberado en {result.stop_s:.1f}s.")
+
+
+def run_maven(module_path: str, goals, profile: str | None = None,
+              env: dict | None = None, log_cb=print,
+              separate_window: bool = False,
+              cancel_event: Event | None = None,
+              event_cb=None,
+              threads: int | None = None) -> int:
+    """Ejecuta Maven en ``module_path`` y devuelve el código de salida.
+
+    La salida se lee con :func:`~buildtool.core.process_runner.run_process`.
+    Una tarea aparte vigila ``cancel_event`` y termina el árbol de procesos
+    de Maven (incluidas las JVM de surefire) aunque no escriba nada; si no
+    responde tras el periodo de gracia se fuerza, y el log indica cuánto
+    tardó en liberarse.
+
+    Con ``event_cb`` cada línea pasa además por :class:`MavenOutputParser` y
+    los eventos resultantes (módulos, pruebas, artefactos, resultado) se
+    entregan a ``event_cb`` en el mismo hilo. En ventana separada no hay
+    salida que analizar y no se emiten eventos.
+
+    ``threads`` son las plazas de CPU reservadas para esta invocación: se
+    pasan como ``-T`` al reactor y como ``-XX:ActiveProcessorCount`` a la JVM.
+    """
+    mvn_cmd = maven_command(goals, profile, threads)
 
     log_cb(f"$ cd {module_path}")
     log_cb("$ " + " ".join(shlex.quote(x) for x in mvn_cmd))
@@ -23,40 +79,38 @@ def run_maven(module_path: str, goals, profile: str | None = None,
         else:
             creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
 
-    proc = subprocess.Popen(
-        mvn_cmd,
-        cwd=module_path,
-        stdout=None if separate_window else subprocess.PIPE,
-        stderr=None if separate_window else subprocess.STDOUT,
-        text=True,
-        env={**os.environ, **(env or {})},
-        creationflags=creationflags
-    )
-
     if not separate_window:
-        assert proc.stdout is not None
-        for line in proc.stdout:
-            log_cb(line.rstrip())
-            if cancel_event and cancel_event.is_set():
-                try:
-                    proc.terminate()
-                except Exception:
-                    pass
-                proc.stdout.close()
-                break
-        return proc.wait()
+        parser = MavenOutputParser() if event_cb else None
+
+        def _on_line(line: str) -> None:
+            line = line.rstrip()
+            log_cb(line)
+            if parser is not None:
+                for event in parser.feed(line):
+                    event_cb(event)
+
+        result = run_process(
+            mvn_cmd,
+            cwd=module_path,
+            env=maven_env(env, threads),
+            on_line=_on_line,
+            cancel_event=cancel_event,
+            creationflags=creationflags,
+        )
+        if parser is not None:
+            for event in parser.close():
+                event_cb(event)
+        _report_stop(result, log_cb)
+        return result.returncode
 
     log_cb("[Ventana separada lanzada]")
-    if cancel_event:
-        while True:
-            ret = proc.poll()
-            if ret is not None:
-                return ret
-            if cancel_event.is_set():
-                try:
-                    proc.terminate()
-                except Exception:
-                    pass
-                return proc.wait()
-            time.sleep(0.2)
-    return proc.wait()
+    result = run_process(
+        mvn_cmd,
+        cwd=module_path,
+        env=maven_env(env, threads),
+        cancel_event=cancel_event,
+        stream=False,
+        creationflags=creationflags,
+    )
+    _report_stop(result, log_cb)
+    return result.returncode
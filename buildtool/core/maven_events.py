@@ -0,0 +1,271 @@
+"""Parser incremental de la salida de Maven.
+
+:class:`MavenOutputParser` recibe las líneas de ``mvn`` una a una y devuelve
+eventos tipados (inicio/fin de módulo del *reactor*, resumen de pruebas,
+resultado del build, artefactos generados, advertencias y errores). Cada línea
+se clasifica con comprobaciones de prefijo y solo las candidatas pasan por
+una expresión regular, así que el costo por línea es despreciable frente a la
+lectura del proceso.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+
+@dataclass(frozen=True)
+class ModuleStarted:
+    name: str
+    index: Optional[int] = None
+    total: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ModuleFinished:
+    name: str
+    status: str
+    duration_s: float
+
+
+@dataclass(frozen=True)
+class ReactorEntry:
+    """Línea del *Reactor Summary* con la duración que informa Maven."""
+
+    name: str
+    status: str
+    duration_s: Optional[float]
+
+
+@dataclass(frozen=True)
+class TestSummary:
+    run: int
+    failures: int
+    errors: int
+    skipped: int
+
+
+@dataclass(frozen=True)
+class BuildResult:
+    success: bool
+
+
+@dataclass(frozen=True)
+class ArtifactBuilt:
+    path: str
+
+
+@dataclass(frozen=True)
+class MavenWarning:
+    message: str
+
+
+@dataclass(frozen=True)
+class MavenError:
+    message: str
+
+
+MavenEvent = Union[
+    ModuleStarted,
+    ModuleFinished,
+    ReactorEntry,
+    TestSummary,
+    BuildResult,
+    ArtifactBuilt,
+    MavenWarning,
+    MavenError,
+]
+
+
+@dataclass
+class MavenSummary:
+    """Acumulado de los eventos de una ejecución de Maven."""
+
+    success: Optional[bool] = None
+    total_s: Optional[float] = None
+    tests_run: int = 0
+    tests_failed: int = 0
+    tests_skipped: int = 0
+    warnings: int = 0
+    errors: int = 0
+    modules: List[ModuleFinished] = field(default_factory=list)
+    artifacts: List[str] = field(default_factory=list)
+
+
+_NO_EVENTS: Tuple[MavenEvent, ...] = ()
+
+_BUILDING_RE = re.compile(r"^Building (?P<name>.+?)(?:\s+(?P<version>\S+))?(?:\s+\[(?P<i>\d+)/(?P<n>\d+)\])?$")
+_PACKAGE_RE = re.compile(r"^Building (?:jar|war|ear|zip|tar\.gz): (?P<path>.+)$")
+_INSTALL_RE = re.compile(r"^Installing (?P<path>.+?) to ")
+_TESTS_RE = re.compile(
+    r"Tests run: (?P<run>\d+), Failures: (?P<failures>\d+), Errors: (?P<errors>\d+), Skipped: (?P<skipped>\d+)"
+)
+_REACTOR_RE = re.compile(
+    r"^(?P<name>.+?) \.+ ?(?P<status>SUCCESS|FAILURE|SKIPPED)(?: \[\s*(?P<time>[\d:.,]+) ?(?P<unit>s|min|h)\])?"
+)
+_TOTAL_RE = re.compile(r"^Total time:\s+(?P<time>[\d:.,]+) ?(?P<unit>s|min|h)")
+
+
+def _parse_duration(value: str, unit: str) -> Optional[float]:
+    """Convierte ``"2.345" s`` / ``"01:02" min`` / ``"1:02:03" h`` a segundos."""
+
+    try:
+        parts = [float(part.replace(",", ".")) for part in value.split(":")]
+    except ValueError:
+        return None
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + part
+    if len(parts) == 1:
+        seconds *= {"s": 1, "min": 60, "h": 3600}.get(unit, 1)
+    elif unit == "h" and len(parts) == 2:
+        seconds *= 60
+    return seconds
+
+
+class MavenOutputParser:
+    """Convierte el flujo de líneas de Maven en :data:`MavenEvent`.
+
+    ``feed`` devuelve una secuencia (vacía en la gran mayoría de líneas) y
+    ``close`` cierra el módulo en curso si el proceso terminó sin imprimir
+    ``BUILD SUCCESS``/``BUILD FAILURE`` (por ejemplo, al cancelar).
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._current: Optional[str] = None
+        self._current_started = 0.0
+        self._in_reactor_summary = False
+        self.summary = MavenSummary()
+
+    # ------------------------------------------------------------------
+    def feed(self, line: str) -> Sequence[MavenEvent]:
+        if not line or line[0] != "[":
+            return _NO_EVENTS
+        end = line.find("] ", 1)
+        if end < 0:
+            return _NO_EVENTS
+        level = line[1:end]
+        text = line[end + 2 :].strip()
+        if not text:
+            return _NO_EVENTS
+        if level == "INFO":
+            return self._info(text)
+        if level == "WARNING":
+            if text.startswith("Tests run:"):
+                return self._tests(text)
+            self.summary.warnings += 1
+            return (MavenWarning(text),)
+        if level == "ERROR":
+            if text.startswith("Tests run:"):
+                return self._tests(text)
+            self.summary.errors += 1
+            return (MavenError(text),)
+        return _NO_EVENTS
+
+    def close(self) -> Sequence[MavenEvent]:
+        finished = self._finish_current("FAILURE" if self.summary.success is False else "INCOMPLETE")
+        return (finished,) if finished else _NO_EVENTS
+
+    # ------------------------------------------------------------------
+    def _info(self, text: str) -> Sequence[MavenEvent]:
+        first = text[0]
+        if first == "B":
+            if text.startswith("BUILD "):
+                return self._result(text)
+            if text.startswith("Building "):
+                package = _PACKAGE_RE.match(text)
+                if package:
+                    return self._artifact(package.group("path"))
+                return self._module_started(text)
+            return _NO_EVENTS
+        if first == "T":
+            if text.startswith("Tests run:"):
+                return self._tests(text)
+            if text.startswith("Total time:"):
+                match = _TOTAL_RE.match(text)
+                if match:
+                    self.summary.total_s = _parse_duration(match.group("time"), match.group("unit"))
+                return _NO_EVENTS
+        if first == "I" and text.startswith("Installing "):
+            match = _INSTALL_RE.match(text)
+            if match:
+                return self._artifact(match.group("path"))
+            return _NO_EVENTS
+        if first == "R" and text.startswith("Reactor Summary"):
+            self._in_reactor_summary = True
+            return _NO_EVENTS
+        if self._in_reactor_summary and " ." in text:
+            match = _REACTOR_RE.match(text)
+            if match:
+                duration = None
+                if match.group("time"):
+                    duration = _parse_duration(match.group("time"), match.group("unit"))
+                return (ReactorEntry(match.group("name"), match.group("status"), duration),)
+        return _NO_EVENTS
+
+    def _module_started(self, text: str) -> Sequence[MavenEvent]:
+        match = _BUILDING_RE.match(text)
+        if not match:
+            return _NO_EVENTS
+        events: List[MavenEvent] = []
+        finished = self._finish_current("SUCCESS")
+        if finished:
+            events.append(finished)
+        name = match.group("name")
+        self._current = name
+        self._current_started = self._clock()
+        index = int(match.group("i")) if match.group("i") else None
+        total = int(match.group("n")) if match.group("n") else None
+        events.append(ModuleStarted(name, index, total))
+        return events
+
+    def _finish_current(self, status: str) -> Optional[ModuleFinished]:
+        if self._current is None:
+            return None
+        finished = ModuleFinished(self._current, status, self._clock() - self._current_started)
+        self.summary.modules.append(finished)
+        self._current = None
+        return finished
+
+    def _result(self, text: str) -> Sequence[MavenEvent]:
+        if text.startswith("BUILD SUCCESS"):
+            success = True
+        elif text.startswith("BUILD FAILURE"):
+            success = False
+        else:
+            return _NO_EVENTS
+        self.summary.success = success
+        self._in_reactor_summary = False
+        events: List[MavenEvent] = []
+        finished = self._finish_current("SUCCESS" if success else "FAILURE")
+        if finished:
+            events.append(finished)
+        events.append(BuildResult(success))
+        return events
+
+    def _tests(self, text: str) -> Sequence[MavenEvent]:
+        # Las líneas por clase incluyen "Time elapsed"; solo cuenta el total.
+        if "Time elapsed" in text:
+            return _NO_EVENTS
+        match = _TESTS_RE.search(text)
+        if not match:
+            return _NO_EVENTS
+        summary = TestSummary(
+            run=int(match.group("run")),
+            failures=int(match.group("failures")),
+            errors=int(match.group("errors")),
+            skipped=int(match.group("skipped")),
+        )
+        self.summary.tests_run += summary.run
+        self.summary.tests_failed += summary.failures + summary.errors
+        self.summary.tests_skipped += summary.skipped
+        return (summary,)
+
+    def _artifact(self, path: str) -> Sequence[MavenEvent]:
+        path = path.strip()
+        if path not in self.summary.artifacts:
+            self.summary.artifacts.append(path)
+        return (ArtifactBuilt(path),)
@@ -0,0 +1,278 @@
+"""Grafo de dependencias entre los módulos de un proyecto.
+
+Las dependencias se declaran en ``Module.depends_on`` y, si el proyecto tiene
+``module_deps_from_pom`` activo, se completan leyendo el ``pom.xml`` de cada
+módulo: un módulo depende de otro cuando declara como ``<dependency>`` o
+``<parent>`` alguna de las coordenadas (``groupId:artifactId``) que produce
+el otro, incluidos los submódulos de un agregador.
+
+El scheduler usa el grafo para lanzar cada tarea en cuanto terminan sus
+entradas y para priorizar los módulos del camino crítico.
+"""
+
+from __future__ import annotations
+
+import heapq
+import pathlib
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+Coordinate = Tuple[str, str]
+_MAX_PARENT_DEPTH = 8
+
+
+class DependencyCycleError(ValueError):
+    """Las dependencias declaradas forman un ciclo."""
+
+    def __init__(self, cycle: List[str]) -> None:
+        self.cycle = cycle
+        super().__init__("Dependencias cíclicas entre módulos: " + " -> ".join(cycle))
+
+
+@dataclass
+class PomInfo:
+    coordinate: Optional[Coordinate]
+    parent: Optional[Coordinate] = None
+    dependencies: Set[Coordinate] = field(default_factory=set)
+    modules: List[str] = field(default_factory=list)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child(node: ET.Element, name: str) -> Optional[ET.Element]:
+    for child in node:
+        if _local(child.tag) == name:
+            return child
+    return None
+
+
+def _text(node: Optional[ET.Element], name: str) -> Optional[str]:
+    if node is None:
+        return None
+    child = _child(node, name)
+    if child is None or child.text is None:
+        return None
+    return child.text.strip() or None
+
+
+def read_pom(pom_path: pathlib.Path) -> Optional[PomInfo]:
+    """Lee coordenadas, padre, dependencias y submódulos de ``pom_path``.
+
+    Devuelve ``None`` si el archivo no existe o no es XML válido.
+    """
+
+    try:
+        root = ET.parse(pom_path).getroot()
+    except (OSError, ET.ParseError):
+        return None
+
+    parent_node = _child(root, "parent")
+    parent = None
+    if parent_node is not None:
+        parent_group, parent_artifact = _text(parent_node, "groupId"), _text(parent_node, "artifactId")
+        if parent_group and parent_artifact:
+            parent = (parent_group, parent_artifact)
+
+    group = _text(root, "groupId") or (parent[0] if parent else None)
+    artifact = _text(root, "artifactId")
+    coordinate = (group, artifact) if group and artifact else None
+
+    def _resolve_group(value: Optional[str]) -> Optional[str]:
+        if value in ("${project.groupId}", "${groupId}", "${pom.groupId}"):
+            return group
+        if value == "${project.parent.groupId}":
+            return parent[0] if parent else None
+        return value
+
+    dependencies: Set[Coordinate] = set()
+    deps_node = _child(root, "dependencies")
+    if deps_node is not None:
+        for dep in deps_node:
+            if _local(dep.tag) != "dependency":
+                continue
+            dep_group, dep_artifact = _resolve_group(_text(dep, "groupId")), _text(dep, "artifactId")
+            if dep_group and dep_artifact:
+                dependencies.add((dep_group, dep_artifact))
+
+    modules: List[str] = []
+    modules_node = _child(root, "modules")
+    if modules_node is not None:
+        modules = [m.text.strip() for m in modules_node if _local(m.tag) == "module" and m.text and m.text.strip()]
+
+    return PomInfo(coordinate, parent, dependencies, modules)
+
+
+def _collect_pom(module_dir: pathlib.Path, *, max_depth: int = 4) -> Tuple[Set[Coordinate], Set[Coordinate]]:
+    """Coordenadas producidas y requeridas por ``module_dir`` y sus submódulos."""
+
+    produced: Set[Coordinate] = set()
+    required: Set[Coordinate] = set()
+    visited: Set[pathlib.Path] = set()
+    stack = [(module_dir, 0)]
+    while stack:
+        current, depth = stack.pop()
+        try:
+            key = current.resolve()
+        except OSError:
+            continue
+        if key in visited:
+            continue
+        visited.add(key)
+        info = read_pom(current / "pom.xml")
+        if info is None:
+            continue
+        if info.coordinate:
+            produced.add(info.coordinate)
+        required.update(info.dependencies)
+        if info.parent:
+            required.add(info.parent)
+        if depth < max_depth:
+            stack.extend((current / sub, depth + 1) for sub in info.modules)
+    return produced, required - produced
+
+
+def pom_chain(module_dir: pathlib.Path) -> List[pathlib.Path]:
+    """``pom.xml`` del módulo seguido de los de sus padres disponibles en disco."""
+
+    chain: List[pathlib.Path] = []
+    current = pathlib.Path(module_dir) / "pom.xml"
+    while current.is_file() and len(chain) < _MAX_PARENT_DEPTH:
+        try:
+            resolved = current.resolve()
+        except OSError:
+            break
+        if resolved in chain:
+            break
+        try:
+            root = ET.parse(resolved).getroot()
+        except (OSError, ET.ParseError):
+            break
+        chain.append(resolved)
+        parent = _child(root, "parent")
+        if parent is None:
+            break
+        relative = _text(parent, "relativePath")
+        if relative is None:
+            relative = "../pom.xml"
+        elif not relative:
+            break
+        candidate = resolved.parent / relative
+        current = candidate / "pom.xml" if candidate.is_dir() else candidate
+    return chain
+
+
+def pom_dependencies(repo_path: pathlib.Path, modules: Iterable) -> Dict[str, Set[str]]:
+    """Deriva las dependencias entre ``modules`` desde sus ``pom.xml``."""
+
+    modules = list(modules)
+    produced_by: Dict[Coordinate, str] = {}
+    required: Dict[str, Set[Coordinate]] = {}
+    for mod in modules:
+        produced, needs = _collect_pom(pathlib.Path(repo_path) / mod.path)
+        required[mod.name] = needs
+        for coordinate in produced:
+            produced_by.setdefault(coordinate, mod.name)
+
+    deps: Dict[str, Set[str]] = {}
+    for name, needs in required.items():
+        found = {produced_by[c] for c in needs if c in produced_by} - {name}
+        if found:
+            deps[name] = found
+    return deps
+
+
+def module_dependencies(
+    project,
+    repo_path: Optional[pathlib.Path] = None,
+    module_names: Optional[Iterable[str]] = None,
+) -> Dict[str, Set[str]]:
+    """Dependencias efectivas entre los módulos de ``project``.
+
+    Combina ``depends_on`` con lo derivado de los POM (si el proyecto lo
+    pide) y descarta las aristas hacia módulos fuera de ``module_names``: esos
+    no se compilan en esta ejecución y se usan los artefactos existentes.
+    """
+
+    modules = list(getattr(project, "modules", None) or [])
+    names = {m.name for m in modules} if module_names is None else set(module_names)
+    deps: Dict[str, Set[str]] = {}
+    for mod in modules:
+        declared = set(getattr(mod, "depends_on", None) or [])
+        if declared:
+            deps.setdefault(mod.name, set()).update(declared)
+    if repo_path is not None and getattr(project, "module_deps_from_pom", False):
+        for name, found in pom_dependencies(repo_path, modules).items():
+            deps.setdefault(name, set()).update(found)
+    return {
+        name: found & names - {name}
+        for name, found in deps.items()
+        if name in names and found & names - {name}
+    }
+
+
+def topological_order(names: Iterable[str], deps: Mapping[str, Set[str]]) -> List[str]:
+    """Ordena ``names`` respetando ``deps`` y, a igualdad, el orden original.
+
+    Lanza :class:`DependencyCycleError` si hay un ciclo.
+    """
+
+    names = list(dict.fromkeys(names))
+    position = {name: idx for idx, name in enumerate(names)}
+    remaining = {name: set(deps.get(name, ())) & position.keys() for name in names}
+    dependents: Dict[str, List[str]] = {}
+    for name, needs in remaining.items():
+        for dep in needs:
+            dependents.setdefault(dep, []).append(name)
+    ready = [(position[name], name) for name, needs in remaining.items() if not needs]
+    heapq.heapify(ready)
+    ordered: List[str] = []
+    while ready:
+        _, name = heapq.heappop(ready)
+        ordered.append(name)
+        for dependent in dependents.get(name, ()):
+            needs = remaining[dependent]
+            needs.discard(name)
+            if not needs:
+                heapq.heappush(ready, (position[dependent], dependent))
+    if len(ordered) < len(names):
+        raise DependencyCycleError(_find_cycle({n: r for n, r in remaining.items() if r}))
+    return ordered
+
+
+def _find_cycle(pending: Mapping[str, Set[str]]) -> List[str]:
+    start = next(iter(pending))
+    path: List[str] = []
+    seen: Dict[str, int] = {}
+    node = start
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = sorted(pending[node])[0]
+    return path[seen[node]:] + [node]
+
+
+def critical_path_weights(
+    names: Iterable[str],
+    deps: Mapping[str, Set[str]],
+    cost: Mapping[str, float],
+    default_cost: float = 1.0,
+) -> Dict[str, float]:
+    """Duración estimada desde el inicio de cada módulo hasta el final del grafo.
+
+    Los módulos con mayor peso están en el camino crítico y conviene lanzarlos
+    primero.
+    """
+
+    order = topological_order(names, deps)
+    dependents: Dict[str, List[str]] = {}
+    for name in order:
+        for dep in deps.get(name, ()):
+            dependents.setdefault(dep, []).append(name)
+    weights: Dict[str, float] = {}
+    for name in reversed(order):
+        tail = max((weights[d] for d in dependents.get(name, ())), default=0.0)
+        weights[name] = float(cost.get(name, default_cost) or 0.0) + tail
+    return weights
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import csv
+import gzip
 import json
 import os
+import re
 import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS pipeline_runs (
@@ -27,7 +33,8 @@ CREATE TABLE IF NOT EXISTS pipeline_runs (
     started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     finished_at DATETIME,
     status TEXT,
-    message TEXT
+    message TEXT,
+    parent_id INTEGER
 );
 CREATE TABLE IF NOT EXISTS pipeline_logs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -35,7 +42,105 @@ CREATE TABLE IF NOT EXISTS pipeline_logs (
     ts DATETIME DEFAULT CURRENT_TIMESTAMP,
     message TEXT NOT NULL
 );
+CREATE TABLE IF NOT EXISTS pipeline_log_blocks (
+    run_id INTEGER NOT NULL REFERENCES pipeline_runs(id) ON DELETE CASCADE,
+    block_no INTEGER NOT NULL,
+    line_count INTEGER NOT NULL,
+    first_ts INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (run_id, block_no)
+);
+CREATE TABLE IF NOT EXISTS pipeline_module_timings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES pipeline_runs(id) ON DELETE CASCADE,
+    profile TEXT,
+    module TEXT NOT NULL,
+    started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    queue_s REAL,
+    maven_s REAL,
+    copy_s REAL,
+    exit_code INTEGER,
+    bytes_copied INTEGER,
+    status TEXT,
+    tests_run INTEGER,
+    tests_failed INTEGER,
+    tests_skipped INTEGER,
+    warnings INTEGER,
+    cache TEXT
+);
+"""
+
+# Columnas de ``pipeline_module_timings`` añadidas después de su creación.
+TIMING_EXTRA_COLUMNS = {
+    "tests_run": "INTEGER",
+    "tests_failed": "INTEGER",
+    "tests_skipped": "INTEGER",
+    "warnings": "INTEGER",
+    "cache": "TEXT",
+}
+
+# Agrupaciones admitidas por ``module_timing_stats`` (formato de ``strftime``).
+TIMING_BUCKETS = {
+    "day": "%Y-%m-%d",
+    "week": "%Y-W%W",
+    "month": "%Y-%m",
+}
+
+# Modos de almacenamiento de logs: una fila por línea (legado) o bloques
+# comprimidos de ``LOG_BLOCK_LINES`` líneas por ejecución.
+LOG_STORAGE_ROWS = "rows"
+LOG_STORAGE_BLOCKS = "blocks"
+LOG_BLOCK_LINES = 256
+# Líneas sueltas que ``compact_logs`` migra por transacción.
+COMPACT_COMMIT_LINES = 64 * LOG_BLOCK_LINES
+
+# Índice FTS5 de líneas de log. El ``rowid`` codifica ``(run_id << 32) | n``
+# (``n`` = número de línea dentro de la ejecución), de modo que las entradas de
+# una ejecución forman un rango contiguo y se pueden borrar sin escanear. El
+# índice no guarda el texto (``content=''``): las líneas y los fragmentos se
+# obtienen de los bloques comprimidos. Borrar por ``rowid`` en una tabla sin
+# contenido requiere ``contentless_delete`` (SQLite 3.43+). Con un SQLite
+# anterior se conserva el índice de versiones previas (con texto) si existe y,
+# si no, se crea ``SEARCH_SCHEMA_COMPAT``, cuyas filas se borran con el comando
+# ``'delete'`` de FTS5 pasando el texto original leído de los bloques.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS pipeline_log_search USING fts5(
+    message,
+    content = '',
+    contentless_delete = 1,
+    tokenize = 'unicode61'
+);
+"""
+SEARCH_SCHEMA_COMPAT = """
+CREATE VIRTUAL TABLE IF NOT EXISTS pipeline_log_search USING fts5(
+    message,
+    content = '',
+    tokenize = 'unicode61'
+);
 """
+_CONTENTLESS_DELETE = sqlite3.sqlite_version_info >= (3, 43, 0)
+_SEARCH_RUN_SHIFT = 32
+
+RUN_COLUMNS = (
+    "id",
+    "pipeline",
+    "user",
+    "group_key",
+    "project_key",
+    "profiles",
+    "modules",
+    "version",
+    "hotfix",
+    "card_id",
+    "unit_tests_status",
+    "qa_status",
+    "approved_by",
+    "started_at",
+    "finished_at",
+    "status",
+    "message",
+    "parent_id",
+)
 
 
 def _state_dir() -> Path:
@@ -52,6 +157,340 @@ def history_db_path() -> Path:
     return _state_dir() / "pipeline_history.sqlite3"
 
 
+def _utc_timestamp() -> str:
+    """Devuelve la hora UTC con el mismo formato que ``CURRENT_TIMESTAMP``."""
+
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _ts_to_epoch(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace(" ", "T"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _epoch_to_ts(value: int) -> str:
+    return datetime.fromtimestamp(value, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _encode_block(lines: Sequence[tuple[str, str]]) -> tuple[int, int, bytes]:
+    """Empaqueta ``(ts, message)`` en un bloque comprimido.
+
+    Los *timestamps* se guardan como diferencias en segundos respecto a la
+    línea anterior; el primero se devuelve aparte para indexarlo en la tabla.
+    Devuelve ``(line_count, first_ts, payload)``.
+    """
+
+    deltas: list[int] = []
+    first_ts: Optional[int] = None
+    previous = 0
+    for ts, _ in lines:
+        epoch = _ts_to_epoch(ts)
+        if epoch is None:
+            epoch = previous if first_ts is not None else _ts_to_epoch(_utc_timestamp())
+        if first_ts is None:
+            first_ts = previous = int(epoch)
+        deltas.append(int(epoch) - previous)
+        previous = int(epoch)
+    body = json.dumps(
+        {"d": deltas, "m": [message for _, message in lines]},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return len(lines), int(first_ts or 0), zlib.compress(body.encode("utf-8"), 6)
+
+
+def _search_rowid_range(run_id: int) -> tuple[int, int]:
+    low = int(run_id) << _SEARCH_RUN_SHIFT
+    return low, low + (1 << _SEARCH_RUN_SHIFT) - 1
+
+
+def _next_search_seq(cx: sqlite3.Connection, run_id: int) -> int:
+    low, high = _search_rowid_range(run_id)
+    row = cx.execute(
+        "SELECT MAX(rowid) FROM pipeline_log_search WHERE rowid BETWEEN ? AND ?",
+        (low, high),
+    ).fetchone()
+    return 0 if row[0] is None else int(row[0]) - low + 1
+
+
+def _index_lines(
+    cx: sqlite3.Connection,
+    run_id: int,
+    first_seq: int,
+    lines: Sequence[tuple[str, str]],
+) -> int:
+    """Agrega ``(ts, message)`` al índice de búsqueda y devuelve el siguiente número."""
+
+    low, _ = _search_rowid_range(run_id)
+    cx.executemany(
+        "INSERT INTO pipeline_log_search(rowid, message) VALUES(?, ?)",
+        [(low + first_seq + offset, message) for offset, (_, message) in enumerate(lines)],
+    )
+    return first_seq + len(lines)
+
+
+def _fts_query(text: str) -> str:
+    """Convierte el texto del usuario en una consulta FTS5 segura.
+
+    Cada palabra se busca como frase literal (``java.lang.Foo`` funciona sin
+    errores de sintaxis) y un ``*`` final la convierte en prefijo.
+    """
+
+    terms: list[str] = []
+    for raw in (text or "").split():
+        prefix = raw.endswith("*")
+        term = raw.rstrip("*")
+        if not term:
+            continue
+        quoted = '"' + term.replace('"', '""') + '"'
+        terms.append(quoted + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+# Mismo criterio que el tokenizador ``unicode61``: letras y dígitos, sin
+# distinguir mayúsculas ni diacríticos.
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_SNIPPET_TOKENS = 16
+
+
+def _fold(token: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", token.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _query_terms(text: str) -> list[tuple[list[str], bool]]:
+    """Términos de la consulta como ``(tokens, prefijo)``, igual que :func:`_fts_query`."""
+
+    terms: list[tuple[list[str], bool]] = []
+    for raw in (text or "").split():
+        tokens = [_fold(token) for token in _TOKEN_RE.findall(raw)]
+        if tokens:
+            terms.append((tokens, raw.endswith("*")))
+    return terms
+
+
+def _term_hits(message: str, terms: Sequence[tuple[list[str], bool]]) -> Optional[list[tuple[int, int]]]:
+    """Rangos de caracteres de cada aparición de ``terms``; ``None`` si falta alguno."""
+
+    words = [(_fold(m.group()), m.start(), m.end()) for m in _TOKEN_RE.finditer(message)]
+    hits: list[tuple[int, int]] = []
+    for tokens, prefix in terms:
+        found = False
+        for start in range(len(words) - len(tokens) + 1):
+            window = words[start : start + len(tokens)]
+            if all(word == token for (word, _, _), token in zip(window[:-1], tokens[:-1])) and (
+                window[-1][0].startswith(tokens[-1]) if prefix else window[-1][0] == tokens[-1]
+            ):
+                hits.append((window[0][1], window[-1][2]))
+                found = True
+        if not found:
+            return None
+    return sorted(set(hits))
+
+
+def _snippet(message: str, terms: Sequence[tuple[list[str], bool]]) -> str:
+    """Fragmento de ``message`` con las coincidencias entre corchetes, como ``snippet()`` de FTS5."""
+
+    hits = _term_hits(message, terms) or []
+    words = [m.span() for m in _TOKEN_RE.finditer(message)]
+    if hits and len(words) > _SNIPPET_TOKENS:
+        first = next(n for n, (start, _) in enumerate(words) if start >= hits[0][0])
+        begin = max(0, min(first - _SNIPPET_TOKENS // 4, len(words) - _SNIPPET_TOKENS))
+        end = begin + _SNIPPET_TOKENS
+        low = 0 if begin == 0 else words[begin][0]
+        high = len(message) if end >= len(words) else words[end - 1][1]
+    else:
+        low, high = 0, len(message)
+    parts: list[str] = ["…"] if low > 0 else []
+    cursor = low
+    for start, end in hits:
+        if start < cursor or end > high:
+            continue
+        parts.extend([message[cursor:start], "[", message[start:end], "]"])
+        cursor = end
+    parts.append(message[cursor:high])
+    if high < len(message):
+        parts.append("…")
+    return "".join(parts)
+
+
+def _percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Percentil ``q`` (0-1) con interpolación lineal sobre ``values`` ordenados."""
+
+    if not values:
+        return None
+    pos = (len(values) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def _decode_block(first_ts: int, payload: bytes) -> Iterator[tuple[str, str]]:
+    data = json.loads(zlib.decompress(payload).decode("utf-8"))
+    current = int(first_ts)
+    for delta, message in zip(data.get("d", []), data.get("m", [])):
+        current += int(delta)
+        yield _epoch_to_ts(current), message
+
+
+class LogWriterClosed(RuntimeError):
+    """Se intentó escribir en un :class:`PipelineLogWriter` ya cerrado."""
+
+
+class PipelineLogWriter:
+    """Escritor de logs con buffer para una ejecución del pipeline.
+
+    Mantiene una única conexión SQLite en modo WAL y agrupa las líneas en
+    lotes que se insertan con ``executemany``. El lote se vacía al alcanzar
+    ``batch_size`` líneas, cada ``flush_interval_ms`` milisegundos (mediante un
+    hilo auxiliar) y siempre al cerrar el escritor. Es seguro invocarlo desde
+    varios hilos a la vez.
+
+    Con ``storage=LOG_STORAGE_BLOCKS`` las líneas se escriben directamente en
+    ``pipeline_log_blocks``; el último bloque incompleto se reescribe en cada
+    vaciado hasta alcanzar ``LOG_BLOCK_LINES`` líneas. Con ``search_index`` las
+    líneas también se agregan a ``pipeline_log_search`` en el mismo commit.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        run_id: int,
+        *,
+        batch_size: int = 200,
+        flush_interval_ms: int = 500,
+        storage: str = LOG_STORAGE_ROWS,
+        search_index: bool = False,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.run_id = int(run_id)
+        self.storage = storage
+        self.search_index = search_index
+        self._tail: list[tuple[str, str]] = []
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.01, flush_interval_ms / 1000.0)
+        self._buffer: list[tuple[int, str, str]] = []
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._closed = False
+        self._stop = threading.Event()
+        self._cx = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._cx.execute("PRAGMA journal_mode = WAL")
+        self._cx.execute("PRAGMA synchronous = NORMAL")
+        self._cx.execute("PRAGMA foreign_keys = ON")
+        row = self._cx.execute(
+            "SELECT COALESCE(MAX(block_no) + 1, 0) FROM pipeline_log_blocks WHERE run_id = ?",
+            (self.run_id,),
+        ).fetchone()
+        self._block_no = int(row[0])
+        self._search_seq = _next_search_seq(self._cx, self.run_id) if search_index else 0
+        self._last_flush = time.monotonic()
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name=f"pipeline-log-writer-{self.run_id}",
+            daemon=True,
+        )
+        self._flusher.start()
+
+    # ------------------------------------------------------------------
+    def write(self, message: str) -> None:
+        """Agrega ``message`` al lote pendiente."""
+
+        with self._lock:
+            if self._closed:
+                raise LogWriterClosed("El escritor de logs ya fue cerrado.")
+            self._buffer.append((self.run_id, _utc_timestamp(), message))
+            should_flush = len(self._buffer) >= self.batch_size
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Inserta en la base de datos todas las líneas pendientes."""
+
+        with self._db_lock:
+            with self._lock:
+                pending, self._buffer = self._buffer, []
+                self._last_flush = time.monotonic()
+            if not pending:
+                return
+            if self.storage == LOG_STORAGE_BLOCKS:
+                self._write_blocks(pending)
+            else:
+                self._cx.executemany(
+                    "INSERT INTO pipeline_logs(run_id, ts, message) VALUES(?, ?, ?)",
+                    pending,
+                )
+            if self.search_index:
+                self._search_seq = _index_lines(
+                    self._cx,
+                    self.run_id,
+                    self._search_seq,
+                    [(ts, message) for _, ts, message in pending],
+                )
+            self._cx.commit()
+
+    def _write_blocks(self, pending: list[tuple[int, str, str]]) -> None:
+        self._tail.extend((ts, message) for _, ts, message in pending)
+        rows: list[tuple[int, int, int, int, bytes]] = []
+        while len(self._tail) >= LOG_BLOCK_LINES:
+            chunk = self._tail[:LOG_BLOCK_LINES]
+            self._tail = self._tail[LOG_BLOCK_LINES:]
+            rows.append((self.run_id, self._block_no, *_encode_block(chunk)))
+            self._block_no += 1
+        if self._tail:
+            rows.append((self.run_id, self._block_no, *_encode_block(self._tail)))
+        self._cx.executemany(
+            "INSERT OR REPLACE INTO pipeline_log_blocks"
+            "(run_id, block_no, line_count, first_ts, payload) VALUES(?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def close(self) -> None:
+        """Vacía el buffer, detiene el hilo auxiliar y cierra la conexión."""
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._stop.set()
+        if self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=5)
+        try:
+            self.flush()
+        finally:
+            with self._db_lock:
+                self._cx.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    # ------------------------------------------------------------------
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            with self._lock:
+                due = bool(self._buffer) and (
+                    time.monotonic() - self._last_flush >= self.flush_interval
+                )
+            if not due:
+                continue
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Se reintentará en el siguiente ciclo o al cerrar el escritor.
+                continue
+
+
+RunCursor = Tuple[str, int]
+
+
 @dataclass
 class RunRecord:
     id: int
@@ -71,19 +510,203 @@ class RunRecord:
     finished_at: Optional[str]
     status: Optional[str]
     message: Optional[str]
+    parent_id: Optional[int] = None  # ejecución de lote que agrupa a esta
+
+    @property
+    def cursor(self) -> RunCursor:
+        """Posición del registro para continuar con ``list_runs(after=...)``."""
+
+        return (self.started_at, self.id)
+
+
+@dataclass
+class RetentionPolicy:
+    """Reglas para depurar ``pipeline_history.sqlite3``.
+
+    Cualquier límite en ``None`` se desactiva. Las ejecuciones con estado
+    ``error`` usan sus propios límites (más holgados) y, en la poda por tamaño,
+    se eliminan solo después de todas las demás. Las ejecuciones en curso
+    nunca se eliminan.
+    """
+
+    max_age_days: Optional[int] = 180
+    failed_max_age_days: Optional[int] = 365
+    max_runs_per_pipeline: Optional[int] = None
+    failed_max_runs_per_pipeline: Optional[int] = None
+    max_db_mb: Optional[float] = None
+    batch_size: int = 200
+    pause_ms: int = 50
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional["RetentionPolicy"]:
+        """Crea la política desde ``Config.history_retention`` (o ``None`` si está apagada).
+
+        Sin configuración, o sin ``enabled``, no se borra nada.
+        """
+
+        if settings is None or not getattr(settings, "enabled", False):
+            return None
+        defaults = cls()
+        values = {
+            name: getattr(settings, name, getattr(defaults, name))
+            for name in cls.__dataclass_fields__
+        }
+        return cls(**values)
+
+
+@dataclass
+class RetentionReport:
+    runs_deleted: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    pages_vacuumed: int = 0
+    vacuum_pending: bool = False  # base sin auto_vacuum incremental: ver enable_incremental_vacuum
+
+
+@dataclass
+class ModuleTimingStats:
+    """Percentiles de duración (segundos) de un módulo en un periodo."""
+
+    module: str
+    period: Optional[str]
+    samples: int
+    failures: int
+    p50_s: Optional[float]
+    p95_s: Optional[float]
+    maven_p50_s: Optional[float]
+    maven_p95_s: Optional[float]
+    copy_p50_s: Optional[float]
+    copy_p95_s: Optional[float]
+    queue_p50_s: Optional[float]
+    queue_p95_s: Optional[float]
+
+
+@dataclass
+class LogMatch:
+    run_id: int
+    line_no: int
+    ts: Optional[str]
+    message: str
+    snippet: str
 
 
 class PipelineHistory:
-    """Gestiona el almacenamiento del historial de pipelines en SQLite."""
+    """Gestiona el almacenamiento del historial de pipelines en SQLite.
 
-    def __init__(self, db_path: Optional[Path] = None) -> None:
+    ``log_storage`` indica cómo se guardan los logs nuevos
+    (:data:`LOG_STORAGE_BLOCKS` por defecto). Con ``read_only=True`` la base se
+    abre sin crear ni migrar tablas, de modo que bases antiguas (sin bloques
+    ni columnas de tarjeta) siguen siendo consultables.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        *,
+        log_storage: str = LOG_STORAGE_BLOCKS,
+        read_only: bool = False,
+    ) -> None:
+        if log_storage not in (LOG_STORAGE_ROWS, LOG_STORAGE_BLOCKS):
+            raise ValueError(f"Modo de almacenamiento de logs desconocido: {log_storage}")
         self.db_path = Path(db_path or history_db_path())
+        self.log_storage = log_storage
+        self.read_only = read_only
+        self._writers: Dict[int, PipelineLogWriter] = {}
+        self._writers_lock = threading.Lock()
+        if read_only:
+            with self._connect() as cx:
+                self._tables = self._table_names(cx)
+                self._run_columns = self._column_names(cx, "pipeline_runs")
+                self._search = self._search_usable(cx)
+                self._search_values = self._search and self._search_needs_values(cx)
+            return
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        with sqlite3.connect(self.db_path) as cx:
-            cx.execute("PRAGMA foreign_keys = ON")
+        with self._connect() as cx:
+            if cx.execute("PRAGMA page_count").fetchone()[0] == 0:
+                # Solo tiene efecto antes de crear tablas; las bases antiguas se
+                # convierten fuera de línea con ``enable_incremental_vacuum``.
+                cx.execute("PRAGMA auto_vacuum = INCREMENTAL")
             cx.executescript(SCHEMA)
             columns = self._ensure_columns(cx)
+            self._ensure_timing_columns(cx)
             self._ensure_indexes(cx, columns)
+            reindex = self._ensure_search_index(cx)
+            self._tables = self._table_names(cx)
+            self._run_columns = columns
+            self._search = self._search_usable(cx)
+            self._search_values = self._search and self._search_needs_values(cx)
+        if reindex and self._search:
+            self.rebuild_search_index()
+
+    @staticmethod
+    def _ensure_search_index(cx: sqlite3.Connection) -> bool:
+        """Crea el índice de búsqueda; ``True`` si hay que poblarlo desde los logs.
+
+        El índice de versiones anteriores guardaba el texto de cada línea,
+        duplicando los bloques comprimidos: se sustituye por uno sin contenido
+        solo si este SQLite admite ``contentless_delete``; si no, se conserva.
+        """
+
+        row = cx.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'pipeline_log_search'"
+        ).fetchone()
+        current = (row[0] or "") if row is not None else None
+        if current is not None and ("contentless_delete" in current or not _CONTENTLESS_DELETE):
+            return False
+        try:
+            if current is not None:
+                cx.execute("DROP TABLE pipeline_log_search")
+                cx.commit()
+            cx.executescript(SEARCH_SCHEMA if _CONTENTLESS_DELETE else SEARCH_SCHEMA_COMPAT)
+        except sqlite3.OperationalError:
+            # SQLite sin FTS5: search_logs recorre los logs.
+            return False
+        return current is not None
+
+    @staticmethod
+    def _search_usable(cx: sqlite3.Connection) -> bool:
+        try:
+            cx.execute("SELECT rowid FROM pipeline_log_search LIMIT 0").fetchall()
+        except sqlite3.Error:
+            return False
+        return True
+
+    @staticmethod
+    def _search_needs_values(cx: sqlite3.Connection) -> bool:
+        """``True`` si el índice no tiene contenido ni ``contentless_delete``."""
+
+        row = cx.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'pipeline_log_search'"
+        ).fetchone()
+        sql = re.sub(r"\s+", "", (row[0] or "") if row else "")
+        return "content=''" in sql and "contentless_delete" not in sql
+
+    def _clear_search(self, cx: sqlite3.Connection) -> None:
+        if self._search_values:
+            cx.execute("INSERT INTO pipeline_log_search(pipeline_log_search) VALUES('delete-all')")
+        else:
+            cx.execute("DELETE FROM pipeline_log_search")
+
+    @property
+    def search_enabled(self) -> bool:
+        return self._search
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            uri = self.db_path.resolve().as_uri() + "?mode=ro"
+            return sqlite3.connect(uri, uri=True)
+        cx = sqlite3.connect(self.db_path)
+        cx.execute("PRAGMA foreign_keys = ON")
+        return cx
+
+    @staticmethod
+    def _table_names(cx: sqlite3.Connection) -> set[str]:
+        rows = cx.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return {row[0] for row in rows}
+
+    @staticmethod
+    def _column_names(cx: sqlite3.Connection, table: str) -> set[str]:
+        return {row[1] for row in cx.execute(f"PRAGMA table_info({table})").fetchall()}
 
     def _ensure_columns(self, cx: sqlite3.Connection) -> set[str]:
         info = cx.execute("PRAGMA table_info(pipeline_runs)").fetchall()
@@ -97,6 +720,8 @@ class PipelineHistory:
             statements.append("ALTER TABLE pipeline_runs ADD COLUMN qa_status TEXT")
         if "approved_by" not in columns:
             statements.append("ALTER TABLE pipeline_runs ADD COLUMN approved_by TEXT")
+        if "parent_id" not in columns:
+            statements.append("ALTER TABLE pipeline_runs ADD COLUMN parent_id INTEGER")
         for stmt in statements:
             cx.execute(stmt)
         if statements:
@@ -105,11 +730,25 @@ class PipelineHistory:
             columns = {row[1] for row in info}
         return columns
 
+    def _ensure_timing_columns(self, cx: sqlite3.Connection) -> None:
+        existing = self._column_names(cx, "pipeline_module_timings")
+        missing = [name for name in TIMING_EXTRA_COLUMNS if name not in existing]
+        for name in missing:
+            cx.execute(
+                f"ALTER TABLE pipeline_module_timings ADD COLUMN {name} {TIMING_EXTRA_COLUMNS[name]}"
+            )
+        if missing:
+            cx.commit()
+
     def _ensure_indexes(self, cx: sqlite3.Connection, columns: set[str]) -> None:
         cx.execute(
             "CREATE INDEX IF NOT EXISTS ix_pipeline_runs_pipeline"
             " ON pipeline_runs(pipeline, started_at DESC)"
         )
+        cx.execute(
+            "CREATE INDEX IF NOT EXISTS ix_pipeline_runs_started"
+            " ON pipeline_runs(started_at DESC, id DESC)"
+        )
         cx.execute(
             "CREATE INDEX IF NOT EXISTS ix_pipeline_runs_group"
             " ON pipeline_runs(group_key)"
@@ -123,10 +762,23 @@ class PipelineHistory:
                 "CREATE INDEX IF NOT EXISTS ix_pipeline_runs_card"
                 " ON pipeline_runs(card_id)"
             )
+        if "parent_id" in columns:
+            cx.execute(
+                "CREATE INDEX IF NOT EXISTS ix_pipeline_runs_parent"
+                " ON pipeline_runs(parent_id)"
+            )
         cx.execute(
             "CREATE INDEX IF NOT EXISTS ix_pipeline_logs_run"
             " ON pipeline_logs(run_id, ts)"
         )
+        cx.execute(
+            "CREATE INDEX IF NOT EXISTS ix_pipeline_module_timings_module"
+            " ON pipeline_module_timings(module, started_at)"
+        )
+        cx.execute(
+            "CREATE INDEX IF NOT EXISTS ix_pipeline_module_timings_run"
+            " ON pipeline_module_timings(run_id)"
+        )
         cx.commit()
 
     # ------------------------------------------------------------------
@@ -146,19 +798,23 @@ class PipelineHistory:
         qa_status: Optional[str] = None,
         approved_by: Optional[str] = None,
         started_at: Optional[datetime] = None,
+        parent_id: Optional[int] = None,
     ) -> int:
+        """Registra una ejecución en curso y devuelve su ``id``.
+
+        ``parent_id`` enlaza la ejecución con la de un build por lotes, que
+        agrupa una ejecución hija por proyecto.
+        """
+
         started_at = started_at or datetime.utcnow()
-        with sqlite3.connect(self.db_path) as cx:
-            cx.execute(
-                "PRAGMA foreign_keys = ON",
-            )
+        with self._connect() as cx:
             cur = cx.execute(
                 """
                 INSERT INTO pipeline_runs (
                     pipeline, user, group_key, project_key, profiles, modules,
                     version, hotfix, card_id, unit_tests_status, qa_status, approved_by,
-                    started_at, status
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    started_at, status, parent_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     pipeline,
@@ -175,6 +831,7 @@ class PipelineHistory:
                     approved_by,
                     started_at.isoformat(timespec="seconds"),
                     "running",
+                    parent_id,
                 ),
             )
             run_id = cur.lastrowid
@@ -193,10 +850,10 @@ class PipelineHistory:
         finished_at: Optional[datetime] = None,
     ) -> None:
         finished_at = finished_at or datetime.utcnow()
-        with sqlite3.connect(self.db_path) as cx:
-            cx.execute(
-                "PRAGMA foreign_keys = ON",
-            )
+        self.close_log_writer(run_id)
+        if self.log_storage == LOG_STORAGE_BLOCKS:
+            self.compact_logs([run_id])
+        with self._connect() as cx:
             cx.execute(
                 """
                 UPDATE pipeline_runs
@@ -220,16 +877,66 @@ class PipelineHistory:
             )
             cx.commit()
 
+    def open_log_writer(
+        self,
+        run_id: int,
+        *,
+        batch_size: int = 200,
+        flush_interval_ms: int = 500,
+    ) -> PipelineLogWriter:
+        """Activa el escritor con buffer para ``run_id``.
+
+        A partir de este punto :meth:`log_message` encola las líneas de esa
+        ejecución en lugar de abrir una conexión por mensaje. El escritor se
+        vacía y se cierra automáticamente en :meth:`finish_run`. Las líneas
+        registradas antes de abrirlo se compactan primero, para que sus bloques
+        precedan a los del escritor.
+        """
+
+        with self._writers_lock:
+            writer = self._writers.get(run_id)
+            if writer is None or writer.closed:
+                if self.log_storage == LOG_STORAGE_BLOCKS:
+                    self.compact_logs([run_id])
+                writer = PipelineLogWriter(
+                    self.db_path,
+                    run_id,
+                    batch_size=batch_size,
+                    flush_interval_ms=flush_interval_ms,
+                    storage=self.log_storage,
+                    search_index=self.search_enabled,
+                )
+                self._writers[run_id] = writer
+            return writer
+
+    def close_log_writer(self, run_id: int) -> None:
+        """Vacía y cierra el escritor con buffer de ``run_id`` si existe."""
+
+        with self._writers_lock:
+            writer = self._writers.pop(run_id, None)
+        if writer is not None:
+            writer.close()
+
     def log_message(self, run_id: int, message: str) -> None:
-        with sqlite3.connect(self.db_path) as cx:
-            cx.execute("PRAGMA foreign_keys = ON")
+        writer = self._writers.get(run_id)
+        if writer is not None:
+            try:
+                writer.write(message)
+                return
+            except LogWriterClosed:
+                # finish_run lo cerró entre la consulta y la escritura: inserción directa
+                pass
+        ts = _utc_timestamp()
+        with self._connect() as cx:
             cx.execute(
-                "INSERT INTO pipeline_logs(run_id, message) VALUES(?, ?)",
-                (run_id, message),
+                "INSERT INTO pipeline_logs(run_id, ts, message) VALUES(?, ?, ?)",
+                (run_id, ts, message),
             )
+            if self.search_enabled:
+                _index_lines(cx, run_id, _next_search_seq(cx, run_id), [(ts, message)])
             cx.commit()
 
-    def list_runs(
+    def _run_filters(
         self,
         *,
         pipeline: Optional[str] = None,
@@ -238,10 +945,16 @@ class PipelineHistory:
         status: Optional[str] = None,
         start: Optional[datetime] = None,
         end: Optional[datetime] = None,
-        limit: int = 200,
-    ) -> List[RunRecord]:
-        clauses = []
+        unit_tests_status: Optional[str] = None,
+        qa_status: Optional[str] = None,
+        card: Optional[str | int] = None,
+        parent_id: Optional[int] = None,
+    ) -> tuple[list[str], list]:
+        clauses: list[str] = []
         params: list = []
+        if parent_id is not None:
+            clauses.append("parent_id = ?")
+            params.append(int(parent_id))
         if pipeline:
             clauses.append("pipeline = ?")
             params.append(pipeline)
@@ -260,59 +973,714 @@ class PipelineHistory:
         if end:
             clauses.append("started_at <= ?")
             params.append(end.isoformat(timespec="seconds"))
+        if unit_tests_status:
+            clauses.append("LOWER(COALESCE(unit_tests_status, '')) = ?")
+            params.append(str(unit_tests_status).lower())
+        if qa_status:
+            clauses.append("LOWER(COALESCE(qa_status, '')) = ?")
+            params.append(str(qa_status).lower())
+        if card not in (None, ""):
+            # Un número filtra por tarjeta; cualquier otro texto busca en el mensaje.
+            try:
+                card_id = int(card)
+            except (TypeError, ValueError):
+                clauses.append("instr(LOWER(COALESCE(message, '')), ?) > 0")
+                params.append(str(card).lower())
+            else:
+                clauses.append("card_id = ?")
+                params.append(card_id)
+        return clauses, params
+
+    def list_runs(
+        self,
+        *,
+        pipeline: Optional[str] = None,
+        group_key: Optional[str] = None,
+        project_key: Optional[str] = None,
+        status: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        unit_tests_status: Optional[str] = None,
+        qa_status: Optional[str] = None,
+        card: Optional[str | int] = None,
+        parent_id: Optional[int] = None,
+        after: Optional[RunCursor] = None,
+        limit: int = 200,
+        ascending: bool = False,
+    ) -> List[RunRecord]:
+        """Lista ejecuciones de la más reciente a la más antigua.
+
+        La paginación es por *keyset*: ``after`` recibe el ``cursor`` del
+        último registro de la página anterior (``(started_at, id)``) y la
+        consulta continúa justo después de él sin recorrer las filas previas.
+        Con ``parent_id`` solo se listan las ejecuciones hijas de ese lote.
+        ``ascending`` invierte el orden (de la más antigua a la más reciente).
+        """
+
+        clauses, params = self._run_filters(
+            pipeline=pipeline,
+            group_key=group_key,
+            project_key=project_key,
+            status=status,
+            start=start,
+            end=end,
+            unit_tests_status=unit_tests_status,
+            qa_status=qa_status,
+            card=card,
+            parent_id=parent_id,
+        )
+        op, direction = (">", "ASC") if ascending else ("<", "DESC")
+        if after is not None:
+            after_started, after_id = after
+            clauses.append(f"(started_at {op} ? OR (started_at = ? AND id {op} ?))")
+            params.extend([after_started, after_started, int(after_id)])
 
         where = " WHERE " + " AND ".join(clauses) if clauses else ""
         sql = (
-            "SELECT id, pipeline, user, group_key, project_key, profiles, modules, "
-            "version, hotfix, card_id, unit_tests_status, qa_status, approved_by, "
-            "started_at, finished_at, status, message "
+            f"SELECT {self._select_columns()} "
             "FROM pipeline_runs"
-            f"{where} ORDER BY started_at DESC LIMIT ?"
+            f"{where} ORDER BY started_at {direction}, id {direction} LIMIT ?"
         )
         params.append(limit)
 
-        with sqlite3.connect(self.db_path) as cx:
+        with self._connect() as cx:
             cx.row_factory = sqlite3.Row
             cur = cx.execute(sql, params)
             rows = cur.fetchall()
 
-        records: List[RunRecord] = []
-        for row in rows:
-            records.append(
-                RunRecord(
-                    id=row["id"],
-                    pipeline=row["pipeline"],
-                    user=row["user"],
-                    group_key=row["group_key"],
-                    project_key=row["project_key"],
-                    profiles=json.loads(row["profiles"] or "[]"),
-                    modules=json.loads(row["modules"] or "[]"),
-                    version=row["version"],
-                    hotfix=None if row["hotfix"] is None else bool(row["hotfix"]),
-                    card_id=row["card_id"],
-                    unit_tests_status=row["unit_tests_status"],
-                    qa_status=row["qa_status"],
-                    approved_by=row["approved_by"],
-                    started_at=row["started_at"],
-                    finished_at=row["finished_at"],
-                    status=row["status"],
-                    message=row["message"],
+        return [self._row_to_record(row) for row in rows]
+
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> RunRecord:
+        return RunRecord(
+            id=row["id"],
+            pipeline=row["pipeline"],
+            user=row["user"],
+            group_key=row["group_key"],
+            project_key=row["project_key"],
+            profiles=json.loads(row["profiles"] or "[]"),
+            modules=json.loads(row["modules"] or "[]"),
+            version=row["version"],
+            hotfix=None if row["hotfix"] is None else bool(row["hotfix"]),
+            card_id=row["card_id"],
+            unit_tests_status=row["unit_tests_status"],
+            qa_status=row["qa_status"],
+            approved_by=row["approved_by"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            status=row["status"],
+            message=row["message"],
+            parent_id=row["parent_id"],
+        )
+
+    def _select_columns(self) -> str:
+        return ", ".join(
+            col if col in self._run_columns else f"NULL AS {col}" for col in RUN_COLUMNS
+        )
+
+    def get_logs(self, run_id: int) -> Iterator[tuple[str, str]]:
+        """Genera ``(ts, message)`` de la ejecución en orden cronológico.
+
+        Los bloques comprimidos se decodifican de uno en uno; después se
+        emiten las filas sueltas que aún no se hayan compactado.
+        """
+
+        cx = self._connect()
+        try:
+            if "pipeline_log_blocks" in self._tables:
+                cur = cx.execute(
+                    "SELECT first_ts, payload FROM pipeline_log_blocks"
+                    " WHERE run_id = ? ORDER BY block_no ASC",
+                    (run_id,),
                 )
+                for first_ts, payload in cur:
+                    yield from _decode_block(first_ts, payload)
+            cur = cx.execute(
+                "SELECT ts, message FROM pipeline_logs WHERE run_id = ? ORDER BY ts ASC, id ASC",
+                (run_id,),
             )
-        return records
+            for ts, message in cur:
+                yield ts, message
+        finally:
+            cx.close()
 
-    def get_logs(self, run_id: int) -> List[tuple[str, str]]:
-        with sqlite3.connect(self.db_path) as cx:
-            cx.row_factory = sqlite3.Row
+    def iter_run_logs(self, **filters) -> Iterator[str]:
+        """Genera el log completo de las ejecuciones filtradas, de la más antigua a la más reciente.
+
+        Las ejecuciones se leen por páginas con :meth:`list_runs` en orden
+        ascendente, así que la memoria no crece con el rango exportado.
+        """
+
+        filters = {k: v for k, v in filters.items() if k not in ("after", "limit", "ascending")}
+        after: Optional[RunCursor] = None
+        while True:
+            page = self.list_runs(after=after, limit=100, ascending=True, **filters)
+            for rec in page:
+                yield (
+                    f"== Ejecución #{rec.id} · {rec.pipeline} · {rec.project_key or '-'}"
+                    f" · {rec.started_at} · {rec.status or 'en curso'} =="
+                )
+                for ts, message in self.get_logs(rec.id):
+                    yield f"[{ts}] {message}"
+            if len(page) < 100:
+                break
+            after = page[-1].cursor
+
+    def compact_logs(
+        self,
+        run_ids: Optional[Iterable[int]] = None,
+        *,
+        limit: Optional[int] = None,
+    ) -> int:
+        """Migra las filas de ``pipeline_logs`` a bloques comprimidos.
+
+        Sin ``run_ids`` se procesan las ejecuciones terminadas que aún tengan
+        filas sueltas (ruta de migración para bases antiguas), como máximo
+        ``limit``. Cada transacción migra hasta ``COMPACT_COMMIT_LINES`` líneas
+        de una ejecución, en orden, así que un lector ve siempre los bloques
+        seguidos de las filas pendientes. Devuelve cuántas ejecuciones se
+        compactaron.
+        """
+
+        with self._connect() as cx:
+            if run_ids is None:
+                sql = (
+                    "SELECT DISTINCT l.run_id FROM pipeline_logs l"
+                    " JOIN pipeline_runs r ON r.id = l.run_id"
+                    " WHERE r.finished_at IS NOT NULL ORDER BY l.run_id"
+                )
+                args: tuple = ()
+                if limit is not None:
+                    sql += " LIMIT ?"
+                    args = (int(limit),)
+                targets = [row[0] for row in cx.execute(sql, args).fetchall()]
+            else:
+                targets = [int(run_id) for run_id in run_ids]
+
+            compacted = 0
+            for run_id in targets:
+                migrated = False
+                while True:
+                    rows = cx.execute(
+                        "SELECT id, ts, message FROM pipeline_logs"
+                        " WHERE run_id = ? ORDER BY ts ASC, id ASC LIMIT ?",
+                        (run_id, COMPACT_COMMIT_LINES),
+                    ).fetchall()
+                    if not rows:
+                        break
+                    next_block = cx.execute(
+                        "SELECT COALESCE(MAX(block_no) + 1, 0) FROM pipeline_log_blocks WHERE run_id = ?",
+                        (run_id,),
+                    ).fetchone()[0]
+                    lines = [(ts, message) for _, ts, message in rows]
+                    blocks = []
+                    for offset in range(0, len(lines), LOG_BLOCK_LINES):
+                        chunk = lines[offset : offset + LOG_BLOCK_LINES]
+                        blocks.append((run_id, next_block, *_encode_block(chunk)))
+                        next_block += 1
+                    cx.executemany(
+                        "INSERT INTO pipeline_log_blocks"
+                        "(run_id, block_no, line_count, first_ts, payload) VALUES(?, ?, ?, ?, ?)",
+                        blocks,
+                    )
+                    cx.executemany(
+                        "DELETE FROM pipeline_logs WHERE id = ?",
+                        [(row[0],) for row in rows],
+                    )
+                    cx.commit()
+                    migrated = True
+                    if len(rows) < COMPACT_COMMIT_LINES:
+                        break
+                compacted += int(migrated)
+        return compacted
+
+    def search_logs(
+        self,
+        query: str,
+        filters: Optional[dict] = None,
+        limit: int = 100,
+    ) -> List[LogMatch]:
+        """Busca ``query`` en los logs de todas las ejecuciones.
+
+        ``filters`` acepta los mismos filtros que :meth:`list_runs` (sin
+        paginación). Los resultados van de la ejecución más reciente a la más
+        antigua e incluyen un fragmento con las coincidencias entre corchetes.
+        El índice solo devuelve posiciones: cada línea se lee de su bloque.
+        """
+
+        filters = {k: v for k, v in (filters or {}).items() if k not in ("after", "limit")}
+        terms = _query_terms(query)
+        if not terms:
+            return []
+        if not self.search_enabled:
+            return self._scan_logs(terms, filters, limit)
+        clauses, params = self._run_filters(**filters)
+        sql = "SELECT rowid FROM pipeline_log_search WHERE pipeline_log_search MATCH ?"
+        args: list = [_fts_query(query)]
+        if clauses:
+            sql += (
+                f" AND (rowid >> {_SEARCH_RUN_SHIFT}) IN"
+                " (SELECT id FROM pipeline_runs WHERE " + " AND ".join(clauses) + ")"
+            )
+            args.extend(params)
+        sql += " ORDER BY rowid DESC LIMIT ?"
+        args.append(int(limit))
+        mask = (1 << _SEARCH_RUN_SHIFT) - 1
+        with self._connect() as cx:
+            positions = [(int(row[0]) >> _SEARCH_RUN_SHIFT, int(row[0]) & mask) for row in cx.execute(sql, args)]
+            wanted: Dict[int, List[int]] = {}
+            for run_id, line_no in positions:
+                wanted.setdefault(run_id, []).append(line_no)
+            lines = {run_id: self._log_lines(cx, run_id, line_nos) for run_id, line_nos in wanted.items()}
+        matches: List[LogMatch] = []
+        for run_id, line_no in positions:
+            line = lines[run_id].get(line_no)
+            if line is None:
+                continue
+            ts, message = line
+            matches.append(LogMatch(run_id, line_no, ts, message, _snippet(message, terms)))
+        return matches
+
+    def _log_lines(
+        self, cx: sqlite3.Connection, run_id: int, line_nos: Iterable[int]
+    ) -> Dict[int, tuple[str, str]]:
+        """Líneas ``line_nos`` (numeradas como en :meth:`get_logs`) sin decodificar los demás bloques."""
+
+        pending = sorted(set(line_nos))
+        found: Dict[int, tuple[str, str]] = {}
+        offset = 0
+        if "pipeline_log_blocks" in self._tables:
+            sizes = cx.execute(
+                "SELECT block_no, line_count FROM pipeline_log_blocks WHERE run_id = ? ORDER BY block_no ASC",
+                (run_id,),
+            ).fetchall()
+            for block_no, count in sizes:
+                inside = [n for n in pending if offset <= n < offset + count]
+                if inside:
+                    first_ts, payload = cx.execute(
+                        "SELECT first_ts, payload FROM pipeline_log_blocks WHERE run_id = ? AND block_no = ?",
+                        (run_id, block_no),
+                    ).fetchone()
+                    decoded = list(_decode_block(first_ts, payload))
+                    found.update((n, decoded[n - offset]) for n in inside if n - offset < len(decoded))
+                offset += count
+        rest = [n for n in pending if n >= offset]
+        if rest:
             cur = cx.execute(
-                "SELECT ts, message FROM pipeline_logs WHERE run_id = ? ORDER BY ts ASC",
+                "SELECT ts, message FROM pipeline_logs WHERE run_id = ? ORDER BY ts ASC, id ASC LIMIT ?",
+                (run_id, rest[-1] - offset + 1),
+            )
+            wanted = set(rest)
+            for n, row in enumerate(cur, start=offset):
+                if n in wanted:
+                    found[n] = (row[0], row[1])
+        return found
+
+    def _scan_logs(
+        self, terms: Sequence[tuple[list[str], bool]], filters: dict, limit: int
+    ) -> List[LogMatch]:
+        matches: List[LogMatch] = []
+        after: Optional[RunCursor] = None
+        while len(matches) < limit:
+            page = self.list_runs(after=after, limit=100, **filters)
+            for run in page:
+                for line_no, (ts, message) in enumerate(self.get_logs(run.id)):
+                    if _term_hits(message, terms) is not None:
+                        matches.append(LogMatch(run.id, line_no, ts, message, _snippet(message, terms)))
+                        if len(matches) >= limit:
+                            return matches
+            if len(page) < 100:
+                break
+            after = page[-1].cursor
+        return matches
+
+    def rebuild_search_index(self) -> int:
+        """Reconstruye ``pipeline_log_search`` a partir de los logs guardados.
+
+        Útil para bases creadas antes de existir el índice. Devuelve el número
+        de líneas indexadas.
+        """
+
+        if not self.search_enabled:
+            return 0
+        with self._connect() as cx:
+            self._clear_search(cx)
+            run_ids = [row[0] for row in cx.execute("SELECT id FROM pipeline_runs ORDER BY id")]
+            total = 0
+            for run_id in run_ids:
+                lines = list(self.get_logs(run_id))
+                if lines:
+                    _index_lines(cx, run_id, 0, lines)
+                    total += len(lines)
+            cx.commit()
+        return total
+
+    # ------------------------------------------------------------------
+    def record_module_timing(
+        self,
+        run_id: int,
+        *,
+        module: str,
+        profile: Optional[str] = None,
+        queue_s: Optional[float] = None,
+        maven_s: Optional[float] = None,
+        copy_s: Optional[float] = None,
+        exit_code: Optional[int] = None,
+        bytes_copied: Optional[int] = None,
+        status: Optional[str] = None,
+        tests_run: Optional[int] = None,
+        tests_failed: Optional[int] = None,
+        tests_skipped: Optional[int] = None,
+        warnings: Optional[int] = None,
+        cache: Optional[str] = None,
+    ) -> None:
+        """Guarda los tiempos de una tarea ``(ejecución, perfil, módulo)``.
+
+        Los contadores de pruebas y advertencias provienen de los eventos de
+        :mod:`buildtool.core.maven_events`; ``cache`` vale ``"hit"`` o
+        ``"miss"`` cuando la tarea consultó la caché de builds.
+        """
+
+        with self._connect() as cx:
+            cx.execute(
+                "INSERT INTO pipeline_module_timings("
+                "run_id, profile, module, started_at, queue_s, maven_s, copy_s,"
+                " exit_code, bytes_copied, status, tests_run, tests_failed,"
+                " tests_skipped, warnings, cache"
+                ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    profile,
+                    module,
+                    _utc_timestamp(),
+                    queue_s,
+                    maven_s,
+                    copy_s,
+                    exit_code,
+                    bytes_copied,
+                    status,
+                    tests_run,
+                    tests_failed,
+                    tests_skipped,
+                    warnings,
+                    cache,
+                ),
+            )
+            cx.commit()
+
+    def module_timings(self, run_id: int) -> List[dict]:
+        """Devuelve los tiempos por módulo registrados para ``run_id``."""
+
+        if "pipeline_module_timings" not in self._tables:
+            return []
+        with self._connect() as cx:
+            existing = self._column_names(cx, "pipeline_module_timings")
+            extra = ", ".join(
+                name if name in existing else f"NULL AS {name}" for name in TIMING_EXTRA_COLUMNS
+            )
+            cx.row_factory = sqlite3.Row
+            rows = cx.execute(
+                "SELECT profile, module, started_at, queue_s, maven_s, copy_s,"
+                f" exit_code, bytes_copied, status, {extra}"
+                " FROM pipeline_module_timings WHERE run_id = ? ORDER BY id",
                 (run_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def module_timing_stats(
+        self,
+        *,
+        module: Optional[str] = None,
+        profile: Optional[str] = None,
+        bucket: Optional[str] = None,
+        **filters,
+    ) -> List[ModuleTimingStats]:
+        """Calcula p50/p95 por módulo, opcionalmente agrupados por ``bucket``.
+
+        ``bucket`` admite ``"day"``, ``"week"`` o ``"month"``; ``filters``
+        acepta los mismos filtros de ejecución que :meth:`list_runs`. Se
+        ignoran las tareas canceladas, las reutilizadas por ``run_once`` y las
+        restauradas desde la caché de builds; los fallos se incluyen y además
+        se cuentan en ``failures``.
+        """
+
+        if "pipeline_module_timings" not in self._tables:
+            return []
+        if bucket is not None and bucket not in TIMING_BUCKETS:
+            raise ValueError(f"Agrupación desconocida: {bucket}")
+        run_clauses, params = self._run_filters(**filters)
+        run_where = " WHERE " + " AND ".join(run_clauses) if run_clauses else ""
+        clauses = ["COALESCE(t.status, '') NOT IN ('cancelled', 'reused', 'cached')"]
+        if module:
+            clauses.append("t.module = ?")
+            params.append(module)
+        if profile:
+            clauses.append("t.profile = ?")
+            params.append(profile)
+        period = f"strftime('{TIMING_BUCKETS[bucket]}', t.started_at)" if bucket else "NULL"
+        sql = (
+            f"SELECT t.module, {period} AS period, t.status,"
+            " COALESCE(t.maven_s, 0) + COALESCE(t.copy_s, 0) AS total_s,"
+            " t.maven_s, t.copy_s, t.queue_s"
+            " FROM pipeline_module_timings t"
+            f" JOIN (SELECT id FROM pipeline_runs{run_where}) r ON r.id = t.run_id"
+            f" WHERE {' AND '.join(clauses)}"
+            " ORDER BY t.module, period"
+        )
+
+        stats: List[ModuleTimingStats] = []
+        group: List[sqlite3.Row] = []
+
+        def _flush() -> None:
+            if not group:
+                return
+
+            def _series(key: str) -> List[float]:
+                return sorted(row[key] for row in group if row[key] is not None)
+
+            total, maven, copy, queue = (_series(k) for k in ("total_s", "maven_s", "copy_s", "queue_s"))
+            stats.append(
+                ModuleTimingStats(
+                    module=group[0]["module"],
+                    period=group[0]["period"],
+                    samples=len(group),
+                    failures=sum(1 for row in group if row["status"] == "error"),
+                    p50_s=_percentile(total, 0.5),
+                    p95_s=_percentile(total, 0.95),
+                    maven_p50_s=_percentile(maven, 0.5),
+                    maven_p95_s=_percentile(maven, 0.95),
+                    copy_p50_s=_percentile(copy, 0.5),
+                    copy_p95_s=_percentile(copy, 0.95),
+                    queue_p50_s=_percentile(queue, 0.5),
+                    queue_p95_s=_percentile(queue, 0.95),
+                )
+            )
+            group.clear()
+
+        with self._connect() as cx:
+            cx.row_factory = sqlite3.Row
+            for row in cx.execute(sql, params):
+                if group and (row["module"], row["period"]) != (group[0]["module"], group[0]["period"]):
+                    _flush()
+                group.append(row)
+        _flush()
+        return stats
+
+    # ------------------------------------------------------------------
+    def apply_retention(
+        self,
+        policy: Optional[RetentionPolicy] = None,
+        *,
+        cancel_event: Optional[threading.Event] = None,
+        now: Optional[datetime] = None,
+    ) -> RetentionReport:
+        """Elimina ejecuciones según ``policy`` y devuelve el espacio al disco.
+
+        El borrado se hace en lotes de ``policy.batch_size`` ejecuciones, cada
+        uno en su propia transacción corta y con una pausa entre lotes, para
+        que un build que esté escribiendo logs nunca quede bloqueado. Al final
+        se ejecuta ``incremental_vacuum`` y un *checkpoint* del WAL. Una base
+        creada antes de la retención no admite ``incremental_vacuum``: las
+        páginas libres se reutilizan pero el archivo no se reduce hasta
+        convertirla con :meth:`enable_incremental_vacuum`
+        (``report.vacuum_pending``).
+        """
+
+        policy = policy or RetentionPolicy()
+        now = now or datetime.utcnow()
+        report = RetentionReport(bytes_before=self._used_bytes())
+
+        def _cancelled() -> bool:
+            return bool(cancel_event and cancel_event.is_set())
+
+        stale = self._expired_run_ids(policy, now)
+        seen = set(stale)
+        stale.extend(run_id for run_id in self._excess_run_ids(policy) if run_id not in seen)
+        for offset in range(0, len(stale), max(1, policy.batch_size)):
+            if _cancelled():
+                break
+            report.runs_deleted += self._delete_runs(stale[offset : offset + policy.batch_size])
+            time.sleep(policy.pause_ms / 1000.0)
+
+        if policy.max_db_mb:
+            limit = int(policy.max_db_mb * 1024 * 1024)
+            while not _cancelled() and self._used_bytes() > limit:
+                batch = self._oldest_run_ids(policy.batch_size)
+                if not batch:
+                    break
+                report.runs_deleted += self._delete_runs(batch)
+                self._merge_search_index(pause_ms=policy.pause_ms)
+                time.sleep(policy.pause_ms / 1000.0)
+
+        if report.runs_deleted and not _cancelled():
+            self._merge_search_index(pause_ms=policy.pause_ms)
+            vacuumed = self._incremental_vacuum(pause_ms=policy.pause_ms)
+            report.pages_vacuumed = vacuumed or 0
+            report.vacuum_pending = vacuumed is None
+        report.bytes_after = self._used_bytes()
+        return report
+
+    def _finished_clause(self) -> str:
+        return "finished_at IS NOT NULL AND COALESCE(status, '') != 'running'"
+
+    def _expired_run_ids(self, policy: RetentionPolicy, now: datetime) -> List[int]:
+        rules: List[str] = []
+        params: List = []
+        if policy.max_age_days is not None:
+            rules.append("(COALESCE(status, '') != 'error' AND started_at < ?)")
+            params.append((now - timedelta(days=policy.max_age_days)).isoformat(timespec="seconds"))
+        if policy.failed_max_age_days is not None:
+            rules.append("(COALESCE(status, '') = 'error' AND started_at < ?)")
+            params.append(
+                (now - timedelta(days=policy.failed_max_age_days)).isoformat(timespec="seconds")
             )
-            return [(row["ts"], row["message"]) for row in cur.fetchall()]
+        if not rules:
+            return []
+        sql = (
+            f"SELECT id FROM pipeline_runs WHERE {self._finished_clause()}"
+            f" AND ({' OR '.join(rules)}) ORDER BY started_at ASC, id ASC"
+        )
+        with self._connect() as cx:
+            return [row[0] for row in cx.execute(sql, params)]
+
+    def _excess_run_ids(self, policy: RetentionPolicy) -> List[int]:
+        rules: List[str] = []
+        params: List = []
+        if policy.max_runs_per_pipeline is not None:
+            rules.append("(failed = 0 AND rn > ?)")
+            params.append(int(policy.max_runs_per_pipeline))
+        if policy.failed_max_runs_per_pipeline is not None:
+            rules.append("(failed = 1 AND rn > ?)")
+            params.append(int(policy.failed_max_runs_per_pipeline))
+        if not rules:
+            return []
+        sql = (
+            "SELECT id FROM ("
+            " SELECT id, started_at, (COALESCE(status, '') = 'error') AS failed,"
+            " ROW_NUMBER() OVER ("
+            "  PARTITION BY COALESCE(project_key, ''), pipeline, (COALESCE(status, '') = 'error')"
+            "  ORDER BY started_at DESC, id DESC"
+            " ) AS rn"
+            f" FROM pipeline_runs WHERE {self._finished_clause()}"
+            f") WHERE {' OR '.join(rules)} ORDER BY started_at ASC, id ASC"
+        )
+        with self._connect() as cx:
+            return [row[0] for row in cx.execute(sql, params)]
+
+    def _oldest_run_ids(self, limit: int) -> List[int]:
+        sql = (
+            f"SELECT id FROM pipeline_runs WHERE {self._finished_clause()}"
+            " ORDER BY (COALESCE(status, '') = 'error') ASC, started_at ASC, id ASC LIMIT ?"
+        )
+        with self._connect() as cx:
+            return [row[0] for row in cx.execute(sql, (int(limit),))]
+
+    def _delete_runs(self, run_ids: Sequence[int]) -> int:
+        if not run_ids:
+            return 0
+        params = [(int(run_id),) for run_id in run_ids]
+        with self._connect() as cx:
+            if self.search_enabled and self._search_values:
+                # Sin contentless_delete FTS5 necesita el texto indexado para
+                # borrar cada fila; se lee de los bloques de la ejecución.
+                for (run_id,) in params:
+                    low, high = _search_rowid_range(run_id)
+                    indexed = [
+                        row[0] - low
+                        for row in cx.execute(
+                            "SELECT rowid FROM pipeline_log_search WHERE rowid BETWEEN ? AND ?", (low, high)
+                        )
+                    ]
+                    lines = self._log_lines(cx, run_id, indexed)
+                    cx.executemany(
+                        "INSERT INTO pipeline_log_search(pipeline_log_search, rowid, message) VALUES('delete', ?, ?)",
+                        [(low + n, lines[n][1]) for n in indexed if n in lines],
+                    )
+            elif self.search_enabled:
+                cx.executemany(
+                    "DELETE FROM pipeline_log_search WHERE rowid BETWEEN ? AND ?",
+                    [_search_rowid_range(run_id) for (run_id,) in params],
+                )
+            cx.executemany("DELETE FROM pipeline_module_timings WHERE run_id = ?", params)
+            cx.executemany("DELETE FROM pipeline_log_blocks WHERE run_id = ?", params)
+            cx.executemany("DELETE FROM pipeline_logs WHERE run_id = ?", params)
+            cx.executemany("DELETE FROM pipeline_runs WHERE id = ?", params)
+            cx.commit()
+        return len(params)
+
+    def _merge_search_index(self, *, pause_ms: int = 50, step_pages: int = 256) -> None:
+        """Purga del índice FTS las entradas borradas mediante fusiones acotadas."""
+
+        if not self.search_enabled:
+            return
+        with self._connect() as cx:
+            while True:
+                before = cx.total_changes
+                # N negativo fuerza la fusión aunque haya pocos segmentos.
+                cx.execute(
+                    "INSERT INTO pipeline_log_search(pipeline_log_search, rank) VALUES('merge', ?)",
+                    (-step_pages,),
+                )
+                cx.commit()
+                # Según la documentación de FTS5, menos de 2 cambios indica que no queda trabajo.
+                if cx.total_changes - before < 2:
+                    break
+                time.sleep(pause_ms / 1000.0)
+
+    def _used_bytes(self) -> int:
+        with self._connect() as cx:
+            page_size = cx.execute("PRAGMA page_size").fetchone()[0]
+            page_count = cx.execute("PRAGMA page_count").fetchone()[0]
+            freelist = cx.execute("PRAGMA freelist_count").fetchone()[0]
+        return int((page_count - freelist) * page_size)
+
+    def enable_incremental_vacuum(self) -> bool:
+        """Convierte una base antigua a ``auto_vacuum = INCREMENTAL``.
+
+        Requiere un ``VACUUM`` completo, que reescribe la base y la bloquea
+        mientras dura: hay que ejecutarlo sin builds en curso
+        (``scripts/compact_pipeline_logs.py --vacuum``). Devuelve ``False`` si
+        la base ya estaba convertida.
+        """
+
+        cx = sqlite3.connect(self.db_path)
+        try:
+            if cx.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            cx.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cx.execute("VACUUM")
+            return True
+        finally:
+            cx.close()
+
+    def _incremental_vacuum(self, *, pause_ms: int = 50, step_pages: int = 1024) -> Optional[int]:
+        """Libera páginas por tramos; ``None`` si la base no está en modo incremental."""
+
+        cx = sqlite3.connect(self.db_path)
+        try:
+            if cx.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                cx.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+                return None
+            reclaimed = 0
+            while True:
+                free = cx.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free:
+                    break
+                cx.execute(f"PRAGMA incremental_vacuum({min(free, step_pages)})").fetchall()
+                cx.commit()
+                reclaimed += min(free, step_pages)
+                time.sleep(pause_ms / 1000.0)
+            cx.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            return reclaimed
+        finally:
+            cx.close()
 
     def clear(self) -> None:
-        with sqlite3.connect(self.db_path) as cx:
-            cx.execute("PRAGMA foreign_keys = ON")
+        with self._connect() as cx:
+            if self.search_enabled:
+                self._clear_search(cx)
+            cx.execute("DELETE FROM pipeline_module_timings")
+            cx.execute("DELETE FROM pipeline_log_blocks")
             cx.execute("DELETE FROM pipeline_logs")
             cx.execute("DELETE FROM pipeline_runs")
             cx.commit()
@@ -325,8 +1693,7 @@ class PipelineHistory:
         qa_status: Optional[str] = None,
         approved_by: Optional[str] = None,
     ) -> None:
-        with sqlite3.connect(self.db_path) as cx:
-            cx.execute("PRAGMA foreign_keys = ON")
+        with self._connect() as cx:
             row = cx.execute(
                 "SELECT id FROM pipeline_runs WHERE card_id = ? ORDER BY started_at DESC LIMIT 1",
                 (card_id,),
@@ -356,12 +1723,37 @@ class PipelineHistory:
                 )
             cx.commit()
 
+    def iter_runs(self, **filters) -> Iterator[RunRecord]:
+        """Recorre todas las ejecuciones que cumplen ``filters`` sin límite.
+
+        Acepta los mismos filtros que :meth:`list_runs` y lee directamente del
+        cursor de SQLite, por lo que la memoria no crece con el rango.
+        """
+
+        for row in self._iter_run_rows(filters):
+            yield self._row_to_record(row)
+
+    def _iter_run_rows(self, filters: dict) -> Iterator[sqlite3.Row]:
+        clauses, params = self._run_filters(**filters)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        sql = (
+            f"SELECT {self._select_columns()}, "
+            "CAST(ROUND((julianday(finished_at) - julianday(started_at)) * 86400) AS INTEGER)"
+            " AS duration_s "
+            f"FROM pipeline_runs{where} ORDER BY started_at DESC, id DESC"
+        )
+        cx = self._connect()
+        try:
+            cx.row_factory = sqlite3.Row
+            yield from cx.execute(sql, params)
+        finally:
+            cx.close()
+
     def export_csv(
         self,
         destination: Path,
         **filters,
     ) -> Path:
-        records = self.list_runs(**filters)
         destination.parent.mkdir(parents=True, exist_ok=True)
         with destination.open("w", encoding="utf-8", newline="") as fh:
             writer = csv.writer(fh)
@@ -384,9 +1776,11 @@ class PipelineHistory:
                     "finished_at",
                     "status",
                     "message",
+                    "duration_s",
                 ]
             )
-            for rec in records:
+            for row in self._iter_run_rows(filters):
+                rec = self._row_to_record(row)
                 writer.writerow(
                     [
                         rec.id,
@@ -406,6 +1800,91 @@ class PipelineHistory:
                         rec.finished_at or "",
                         rec.status or "",
                         rec.message or "",
+                        "" if row["duration_s"] is None else row["duration_s"],
                     ]
                 )
         return destination
+
+    def export_ndjson(
+        self,
+        destination: Path,
+        *,
+        include_logs: bool = False,
+        **filters,
+    ) -> Path:
+        """Exporta una ejecución por línea JSON (``.ndjson``, o ``.ndjson.gz`` comprimido).
+
+        Cada objeto incluye ``duration_s`` calculado en SQL y, con
+        ``include_logs``, la lista ``logs`` de pares ``[ts, message]``. Solo se
+        mantiene en memoria la ejecución que se está escribiendo.
+        """
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if destination.suffix == ".gz":
+            fh = gzip.open(destination, "wt", encoding="utf-8", newline="\n")
+        else:
+            fh = destination.open("w", encoding="utf-8", newline="\n")
+        with fh:
+            for row in self._iter_run_rows(filters):
+                item = {key: row[key] for key in row.keys()}
+                item["profiles"] = json.loads(item["profiles"] or "[]")
+                item["modules"] = json.loads(item["modules"] or "[]")
+                if item["hotfix"] is not None:
+                    item["hotfix"] = bool(item["hotfix"])
+                if include_logs:
+                    item["logs"] = [list(line) for line in self.get_logs(row["id"])]
+                fh.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+                fh.write("\n")
+        return destination
+
+
+def run_history_maintenance(
+    settings=None,
+    *,
+    db_path: Optional[Path] = None,
+    log_cb=print,
+    cancel_event: Optional[threading.Event] = None,
+) -> bool:
+    """Compacta logs sueltos y aplica la política de retención configurada.
+
+    Pensado para ejecutarse en segundo plano al iniciar la aplicación con
+    ``Config.history_retention`` como ``settings``; sin ``enabled`` no hace
+    nada. La compactación avanza en lotes de ``batch_size`` ejecuciones con
+    una pausa entre lotes, igual que el borrado.
+
+    Devuelve ``False`` si se cancela o si la base falla (el error se informa
+    por ``log_cb``); ``True`` si terminó o no había nada que hacer.
+    """
+
+    policy = RetentionPolicy.from_settings(settings)
+    if policy is None:
+        return True
+
+    def _cancelled() -> bool:
+        return bool(cancel_event and cancel_event.is_set())
+
+    try:
+        history = PipelineHistory(db_path)
+        batch = max(1, policy.batch_size)
+        while not _cancelled():
+            if history.compact_logs(limit=batch) < batch:
+                break
+            time.sleep(policy.pause_ms / 1000.0)
+        if _cancelled():
+            return False
+        report = history.apply_retention(policy, cancel_event=cancel_event)
+    except sqlite3.Error as err:
+        log_cb(f"[historial] ERROR: falló el mantenimiento del historial: {err}")
+        return False
+    if report.runs_deleted:
+        freed_mb = max(0, report.bytes_before - report.bytes_after) / (1024 * 1024)
+        log_cb(
+            f"[historial] Retención: {report.runs_deleted} ejecuciones eliminadas,"
+            f" {freed_mb:.1f} MB liberados."
+        )
+    if report.vacuum_pending:
+        log_cb(
+            "[historial] La base no reduce su tamaño hasta convertirla: ejecuta"
+            " `python scripts/compact_pipeline_logs.py --vacuum` sin builds en curso."
+        )
+    return not _cancelled()
@@ -0,0 +1,407 @@
+"""Ejecución de comandos externos (Maven, Git) sobre asyncio.
+
+:func:`run_process_async` lanza el comando en su propio grupo de procesos y
+transmite su salida línea a línea sin bloquear el bucle: un lector llena una
+cola acotada y un consumidor entrega cada línea a ``on_line``. Si el
+consumidor va más lento que el proceso, la cola se llena, el lector deja de
+leer y la tubería del sistema frena al proceso (contrapresión) en lugar de
+acumular el log en memoria.
+
+El comando termina por sí solo, por ``timeout``, por ``cancel_event`` o al
+cancelar la tarea de asyncio; en los tres últimos casos se termina el árbol
+de procesos completo, no solo el hijo directo, y se fuerza con *kill* si no
+responde tras un periodo de gracia.
+
+:func:`run_process` es la fachada síncrona para el código existente: ejecuta
+la versión asíncrona en un bucle propio del hilo que llama, de modo que
+``on_line`` se invoca en ese mismo hilo como antes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import locale
+import os
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Mapping, Optional, Sequence
+
+# Líneas pendientes de consumir antes de dejar de leer la tubería.
+DEFAULT_MAX_PENDING_LINES = 1000
+_LINE_LIMIT = 8 * 1024 * 1024
+_CANCEL_POLL_S = 0.05
+# Espera entre la terminación ordenada y el *kill* del árbol de procesos.
+DEFAULT_GRACE_S = 5.0
+_KILL_WAIT_S = 5.0
+# Tiempo para que la salida pendiente llegue al consumidor tras terminar el grupo.
+_DRAIN_S = 2.0
+# API de Windows para enumerar el árbol y saber si un PID sigue vivo.
+_TH32CS_SNAPPROCESS = 0x2
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_ERROR_ACCESS_DENIED = 5
+_STILL_ACTIVE = 259
+
+
+@dataclass
+class ProcessResult:
+    returncode: int
+    output: Optional[str] = None  # solo con ``capture=True``
+    timed_out: bool = False
+    cancelled: bool = False
+    duration_s: float = 0.0
+    stop_s: Optional[float] = None  # segundos en detener el árbol de procesos
+    killed: bool = False  # hubo que forzar el cierre tras ``grace_s``
+
+
+def _group_kwargs(popen_kwargs: Mapping) -> dict:
+    kwargs = dict(popen_kwargs)
+    if os.name == "nt":
+        kwargs["creationflags"] = kwargs.get("creationflags", 0) | getattr(
+            subprocess, "CREATE_NEW_PROCESS_GROUP", 0
+        )
+    else:
+        kwargs.setdefault("start_new_session", True)
+    return kwargs
+
+
+def _win_children() -> dict[int, list[int]]:
+    """Hijos de cada PID en Windows, leídos de una instantánea *toolhelp*."""
+
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESSENTRY32W(ctypes.Structure):
+        _fields_ = [
+            ("dwSize", wintypes.DWORD),
+            ("cntUsage", wintypes.DWORD),
+            ("th32ProcessID", wintypes.DWORD),
+            ("th32DefaultHeapID", ctypes.c_size_t),
+            ("th32ModuleID", wintypes.DWORD),
+            ("cntThreads", wintypes.DWORD),
+            ("th32ParentProcessID", wintypes.DWORD),
+            ("pcPriClassBase", wintypes.LONG),
+            ("dwFlags", wintypes.DWORD),
+            ("szExeFile", wintypes.WCHAR * 260),
+        ]
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    snapshot = kernel32.CreateToolhelp32Snapshot(_TH32CS_SNAPPROCESS, 0)
+    children: dict[int, list[int]] = {}
+    if not snapshot or snapshot == wintypes.HANDLE(-1).value:
+        return children
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(entry)
+        ok = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while ok:
+            children.setdefault(int(entry.th32ParentProcessID), []).append(int(entry.th32ProcessID))
+            ok = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+    finally:
+        kernel32.CloseHandle(snapshot)
+    return children
+
+
+def _win_alive(pid: int) -> bool:
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # sin permiso para abrirlo: existe
+        return ctypes.get_last_error() == _ERROR_ACCESS_DENIED
+    try:
+        code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == _STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _descendants(pid: int) -> list[int]:
+    """PIDs descendientes de ``pid`` (vacío si no se pueden enumerar)."""
+
+    children: dict[int, list[int]] = {}
+    proc_dir = "/proc"
+    if os.name == "nt":
+        try:
+            children = _win_children()
+        except OSError:
+            return []
+    elif os.path.isdir(proc_dir):
+        for entry in os.listdir(proc_dir):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"{proc_dir}/{entry}/stat", "rb") as fh:
+                    stat = fh.read()
+                # el nombre va entre paréntesis y puede contener espacios
+                ppid = int(stat[stat.rindex(b")") + 2 :].split()[1])
+            except (OSError, ValueError, IndexError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    else:
+        try:
+            listing = subprocess.run(
+                ["ps", "-A", "-o", "pid=,ppid="], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+            ).stdout
+        except OSError:
+            return []
+        for line in listing.splitlines():
+            try:
+                child, parent = (int(value) for value in line.split())
+            except ValueError:
+                continue
+            children.setdefault(parent, []).append(child)
+    found: list[int] = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), ()):
+            if child not in found:
+                found.append(child)
+                stack.append(child)
+    return found
+
+
+def _signal_tree(pid: int, pids: Sequence[int], sig: int) -> None:
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+    # descendientes que abrieron su propia sesión o grupo
+    for target in pids:
+        try:
+            os.kill(target, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _alive(pid: int) -> bool:
+    if os.name == "nt":
+        # en Windows ``os.kill(pid, 0)`` terminaría el proceso
+        return _win_alive(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as fh:
+            stat = fh.read()
+        # un zombi ya liberó sus recursos aunque nadie lo haya recogido
+        return stat[stat.rindex(b")") + 2 : stat.rindex(b")") + 3] != b"Z"
+    except (OSError, ValueError):
+        return True
+
+
+async def _wait_gone(proc, pids: Sequence[int], timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while True:
+        if proc.returncode is not None and not any(_alive(pid) for pid in pids):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(_CANCEL_POLL_S)
+
+
+def _taskkill(pid: int, *, force: bool = False) -> bool:
+    """``taskkill /T`` sobre ``pid``; ``True`` si terminó todo el árbol."""
+
+    try:
+        proc = subprocess.run(
+            ["taskkill", "/T", *(["/F"] if force else []), "/PID", str(pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+    except OSError:
+        return False
+    return proc.returncode == 0
+
+
+async def _stop_tree(proc, grace_s: float) -> tuple[float, bool]:
+    """Termina el árbol de ``proc`` y escala a *kill* tras ``grace_s``.
+
+    Devuelve los segundos hasta que el árbol desapareció y si hizo falta
+    forzarlo. Se espera a todo el árbol, no solo al hijo directo: si este
+    termina y un descendiente (p. ej. la JVM de *surefire*) sigue vivo,
+    también se fuerza.
+    """
+
+    started = time.monotonic()
+    killed = False
+    if os.name == "nt":
+        # La aplicación no tiene consola y Maven/Git se lanzan sin ventana o
+        # con consola propia: CTRL_BREAK no les llega. ``taskkill`` sin /F
+        # pide el cierre; si no puede entregarlo se fuerza sin esperar.
+        pids = _descendants(proc.pid)
+        if not _taskkill(proc.pid) or not await _wait_gone(proc, pids, grace_s):
+            killed = True
+            pids = list(dict.fromkeys([*pids, *_descendants(proc.pid)]))
+            _taskkill(proc.pid, force=True)
+            # los huérfanos ya no cuelgan de ``proc.pid`` y /T no los alcanza
+            for pid in pids:
+                if _alive(pid):
+                    _taskkill(pid, force=True)
+            await _wait_gone(proc, pids, _KILL_WAIT_S)
+        return time.monotonic() - started, killed
+    # los descendientes se enumeran antes de que queden huérfanos
+    pids = _descendants(proc.pid)
+    _signal_tree(proc.pid, pids, signal.SIGTERM)
+    if not await _wait_gone(proc, pids, grace_s):
+        killed = True
+        pids = list(dict.fromkeys([*pids, *_descendants(proc.pid)]))
+        _signal_tree(proc.pid, pids, signal.SIGKILL)
+        await _wait_gone(proc, pids, _KILL_WAIT_S)
+    return time.monotonic() - started, killed
+
+
+async def _wait_event(event: threading.Event) -> None:
+    while not event.is_set():
+        await asyncio.sleep(_CANCEL_POLL_S)
+
+
+async def run_process_async(
+    cmd: Sequence[str],
+    *,
+    cwd: Optional[str] = None,
+    env: Optional[Mapping[str, str]] = None,
+    on_line: Optional[Callable[[str], object]] = None,
+    timeout: Optional[float] = None,
+    cancel_event: Optional[threading.Event] = None,
+    capture: bool = False,
+    max_pending_lines: int = DEFAULT_MAX_PENDING_LINES,
+    encoding: Optional[str] = None,
+    grace_s: float = DEFAULT_GRACE_S,
+    stream: bool = True,
+    **popen_kwargs,
+) -> ProcessResult:
+    """Ejecuta ``cmd`` y entrega cada línea de stdout/stderr a ``on_line``.
+
+    ``on_line`` puede ser una función o una corrutina. Con ``capture`` la
+    salida completa se devuelve en :attr:`ProcessResult.output`. Con
+    ``stream=False`` el proceso hereda la salida (p. ej. en una consola
+    propia) y solo se vigilan su fin y la cancelación. Los ``popen_kwargs``
+    adicionales (``creationflags``, ``startupinfo``...) se pasan a
+    :func:`asyncio.create_subprocess_exec`.
+
+    Al cancelar o agotar ``timeout`` se envía ``SIGTERM`` al grupo y a los
+    descendientes (``taskkill /T`` en Windows) y, si alguno sigue vivo tras
+    ``grace_s``, ``SIGKILL`` (``taskkill /T /F``). :attr:`ProcessResult.stop_s`
+    indica cuánto tardó en liberarse el árbol.
+    """
+
+    started = time.monotonic()
+    encoding = encoding or locale.getpreferredencoding(False)
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd,
+        env=dict(env) if env is not None else None,
+        stdout=asyncio.subprocess.PIPE if stream else None,
+        stderr=asyncio.subprocess.STDOUT if stream else None,
+        limit=_LINE_LIMIT,
+        **_group_kwargs(popen_kwargs),
+    )
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, int(max_pending_lines)))
+    lines: Optional[list[str]] = [] if capture else None
+
+    async def _read() -> None:
+        if proc.stdout is None:
+            await proc.wait()
+            await queue.put(None)
+            return
+        try:
+            continued = False
+            while True:
+                try:
+                    raw = await proc.stdout.readuntil(b"\n")
+                except asyncio.IncompleteReadError as err:
+                    # fin de la salida sin salto de línea final
+                    raw = err.partial
+                except asyncio.LimitOverrunError as err:
+                    # Línea más larga que el límite: se entrega por trozos. Los
+                    # datos siguen en el búfer; ``consumed`` indica cuántos leer.
+                    chunk = await proc.stdout.read(max(1, err.consumed))
+                    await queue.put(chunk.decode(encoding, "replace"))
+                    continued = True
+                    continue
+                if not raw:
+                    break
+                line = raw.decode(encoding, "replace").rstrip("\r\n")
+                # el salto que cierra una línea ya entregada por trozos no es una línea vacía
+                if not (continued and not line):
+                    await queue.put(line)
+                continued = False
+        finally:
+            await queue.put(None)
+
+    async def _consume() -> None:
+        while True:
+            line = await queue.get()
+            if line is None:
+                return
+            if lines is not None:
+                lines.append(line)
+            if on_line is not None:
+                result = on_line(line)
+                if inspect.isawaitable(result):
+                    await result
+
+    # ``proc.wait()`` forma parte de la tarea vigilada: un proceso que cierra
+    # stdout y sigue vivo (demonio, *credential helper*) también debe poder
+    # cancelarse o agotar ``timeout``.
+    io_task = asyncio.ensure_future(asyncio.gather(_read(), _consume(), proc.wait()))
+    cancel_task = asyncio.ensure_future(_wait_event(cancel_event)) if cancel_event is not None else None
+    timed_out = cancelled = killed = False
+    stop_s = None
+    try:
+        pending = {io_task} | ({cancel_task} if cancel_task else set())
+        done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if io_task not in done:
+            cancelled = cancel_task is not None and cancel_task in done
+            timed_out = not cancelled
+            stop_s, killed = await _stop_tree(proc, grace_s)
+            try:
+                await asyncio.wait_for(asyncio.shield(io_task), _DRAIN_S)
+            except asyncio.TimeoutError:
+                io_task.cancel()
+        elif io_task.exception() is not None:
+            stop_s, killed = await _stop_tree(proc, grace_s)
+        returncode = await proc.wait()
+        if io_task.done() and not io_task.cancelled() and io_task.exception() is not None:
+            raise io_task.exception()
+    except asyncio.CancelledError:
+        # tarea de asyncio cancelada desde fuera
+        if proc.returncode is None:
+            await _stop_tree(proc, grace_s)
+        raise
+    finally:
+        if cancel_task is not None:
+            cancel_task.cancel()
+        if not io_task.done():
+            io_task.cancel()
+
+    output = None
+    if lines is not None:
+        output = "".join(f"{line}\n" for line in lines)
+    return ProcessResult(
+        returncode, output, timed_out, cancelled, time.monotonic() - started, stop_s, killed
+    )
+
+
+def run_process(cmd: Sequence[str], **kwargs) -> ProcessResult:
+    """Versión síncrona de :func:`run_process_async` (mismos argumentos)."""
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(run_process_async(cmd, **kwargs))
+    raise RuntimeError("run_process no puede llamarse desde un bucle asyncio; usa run_process_async")
@@ -0,0 +1,279 @@
+"""Huella de las entradas de Maven que dependen del perfil.
+
+En una release con varios perfiles muchos módulos compilan exactamente igual
+en todos: su ``pom.xml`` (ni sus padres) no declara ninguno de los perfiles
+pedidos. :class:`ProfileInputs` calcula, por módulo y perfil, una huella de
+lo que ``-P`` cambia en su build; los perfiles con la misma huella comparten
+una única compilación y sus artefactos se copian al destino de cada perfil.
+
+Hay dos modos (``Config.profile_reuse.mode``):
+
+``pom``
+    Lectura estática de los ``<profile>`` del ``pom.xml`` del módulo, de sus
+    padres locales (``<relativePath>``) y de ``~/.m2/settings.xml``. La huella
+    es el contenido de los perfiles que activa (o desactiva con ``!``) el
+    argumento de ``-P``; si ninguno está declarado, la huella es la misma
+    para todos los perfiles. Un padre que solo está en un repositorio remoto
+    no se puede leer y se asume que no declara esos perfiles.
+
+``effective-pom``
+    Ejecuta ``mvn help:effective-pom -P <perfil>`` y resume su salida. Es
+    exacto pero cuesta una invocación de Maven por módulo y perfil, así que
+    el resultado se guarda en ``<estado>/profile_inputs.json`` con una clave
+    derivada de las fuentes del módulo (commit y cambios locales) y de los
+    POM de sus padres.
+
+La huella de un módulo incluye la de los módulos de los que depende: si una
+dependencia cambia con el perfil, el módulo tampoco se comparte.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+import re
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+from .build_cache import source_fingerprint
+from .maven import maven_command
+from .module_graph import _child, _local, _text, pom_chain
+from .process_runner import run_process
+
+MODES = ("off", "pom", "effective-pom")
+# Huella de un módulo que no recibe ``-P``.
+NO_PROFILE = "sin-perfil"
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+
+
+def _state_dir() -> pathlib.Path:
+    base = os.environ.get("APPDATA")
+    if base:
+        return pathlib.Path(base) / "ForgeBuild"
+    return pathlib.Path.home() / ".forgebuild"
+
+
+def profile_inputs_path() -> pathlib.Path:
+    override = os.environ.get("FORGEBUILD_PROFILE_INPUTS_DB")
+    if override:
+        return pathlib.Path(override)
+    return _state_dir() / "profile_inputs.json"
+
+
+def _settings_paths() -> List[pathlib.Path]:
+    return [pathlib.Path.home() / ".m2" / "settings.xml"]
+
+
+def _parse(path: pathlib.Path) -> Optional[ET.Element]:
+    try:
+        return ET.parse(path).getroot()
+    except (OSError, ET.ParseError):
+        return None
+
+
+def declared_profiles(path: pathlib.Path) -> Dict[str, str]:
+    """``{id: resumen}`` de los ``<profile>`` declarados en un POM o settings.xml."""
+
+    root = _parse(path)
+    if root is None:
+        return {}
+    profiles: Dict[str, str] = {}
+    container = _child(root, "profiles")
+    for node in container if container is not None else ():
+        if _local(node.tag) != "profile":
+            continue
+        profile_id = _text(node, "id")
+        if profile_id:
+            profiles[profile_id] = hashlib.sha256(ET.tostring(node)).hexdigest()
+    return profiles
+
+
+def _profile_tokens(profile: str) -> List[str]:
+    return [token.strip() for token in profile.split(",") if token.strip()]
+
+
+def pom_fingerprint(module_dir: pathlib.Path, profile: Optional[str]) -> str:
+    """Huella estática de lo que ``-P profile`` cambia en ``module_dir``."""
+
+    if not profile:
+        return NO_PROFILE
+    sources = [*pom_chain(module_dir), *(p for p in _settings_paths() if p.is_file())]
+    parts = []
+    for index, path in enumerate(sources):
+        declared = declared_profiles(path)
+        for token in _profile_tokens(profile):
+            profile_id = token.lstrip("!-?+")
+            if profile_id in declared:
+                parts.append([index, token, declared[profile_id]])
+    if not parts:
+        return NO_PROFILE
+    body = json.dumps(sorted(parts), separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def _file_digest(paths: Sequence[pathlib.Path]) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(str(path).encode("utf-8") + b"\0")
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            pass
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def effective_pom_digest(module_dir: pathlib.Path, profile: Optional[str], *, log_cb=print) -> Optional[str]:
+    """Resumen de ``mvn help:effective-pom`` (sin comentarios); ``None`` si Maven falla."""
+
+    fd, tmp = tempfile.mkstemp(prefix="effective-pom-", suffix=".xml")
+    os.close(fd)
+    try:
+        cmd = maven_command(["-q", "-B", "help:effective-pom", f"-Doutput={tmp}"], profile)
+        result = run_process(cmd, cwd=str(module_dir), capture=True)
+        if result.returncode != 0:
+            log_cb(f"ADVERTENCIA: help:effective-pom falló en {module_dir} (código {result.returncode}).")
+            return None
+        text = pathlib.Path(tmp).read_text(encoding="utf-8", errors="replace")
+    except OSError as err:
+        log_cb(f"ADVERTENCIA: no se pudo obtener el POM efectivo de {module_dir}: {err}")
+        return None
+    finally:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+    # el plugin añade comentarios con la fecha y el nombre del proyecto
+    normalized = "\n".join(line.strip() for line in _COMMENT_RE.sub("", text).splitlines() if line.strip())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ProfileInputs:
+    """Huellas por módulo y perfil; las de ``effective-pom`` se guardan en disco."""
+
+    def __init__(
+        self,
+        mode: str = "pom",
+        path: Optional[pathlib.Path] = None,
+        *,
+        effective_pom: Callable[..., Optional[str]] = effective_pom_digest,
+    ) -> None:
+        if mode not in MODES or mode == "off":
+            raise ValueError(f"Modo de reutilización entre perfiles no válido: {mode!r}")
+        self.mode = mode
+        self.path = pathlib.Path(path) if path else profile_inputs_path()
+        self._effective_pom = effective_pom
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def from_config(cls, cfg) -> Optional["ProfileInputs"]:
+        """Crea el detector según ``cfg.profile_reuse``; ``None`` si está desactivado."""
+
+        settings = getattr(cfg, "profile_reuse", None)
+        mode = getattr(settings, "mode", "off") if settings is not None else "off"
+        if mode == "off":
+            return None
+        return cls(mode)
+
+    def _load(self) -> Dict[str, str]:
+        if self._entries is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            self._entries = data if isinstance(data, dict) else {}
+        return self._entries
+
+    def _save_locked(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".profile_inputs-", dir=str(self.path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(self._entries, fh, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def _cached_effective_pom(self, module_dir: pathlib.Path, profile: str, log_cb) -> str:
+        key = hashlib.sha256(
+            json.dumps(
+                [str(module_dir), source_fingerprint(module_dir), _file_digest(pom_chain(module_dir)), profile]
+            ).encode("utf-8")
+        ).hexdigest()
+        with self._lock:
+            cached = self._load().get(key)
+        if cached:
+            return cached
+        digest = self._effective_pom(module_dir, profile, log_cb=log_cb)
+        if digest is None:
+            # sin POM efectivo no se puede comparar: el perfil se trata como distinto
+            return f"perfil:{profile}"
+        with self._lock:
+            self._load()[key] = digest
+            self._save_locked()
+        return digest
+
+    def fingerprint(self, module_dir: pathlib.Path, profile: Optional[str], *, log_cb=print) -> str:
+        """Huella de ``module_dir`` compilado con ``-P profile`` (``None``: sin ``-P``)."""
+
+        module_dir = pathlib.Path(module_dir)
+        if not profile:
+            return NO_PROFILE
+        if self.mode == "pom":
+            return pom_fingerprint(module_dir, profile)
+        return self._cached_effective_pom(module_dir, profile, log_cb)
+
+    def share_groups(
+        self,
+        modules: Mapping[str, pathlib.Path],
+        profiles: Sequence[str],
+        profile_for: Callable[[str, str], Optional[str]],
+        deps: Mapping[str, Sequence[str]],
+        *,
+        per_profile: Sequence[str] = (),
+        log_cb=print,
+    ) -> Dict[str, List[List[str]]]:
+        """Agrupa ``profiles`` por huella para cada módulo de ``modules``.
+
+        ``profile_for(module, profile)`` es el argumento de ``-P`` que recibe
+        el módulo en ese perfil (``None`` si no recibe ninguno). Devuelve
+        ``{módulo: [[perfil, ...], ...]}`` con los grupos en el orden de
+        ``profiles``; el primero de cada grupo es el que compila. Los módulos
+        de ``per_profile`` nunca se comparten.
+        """
+
+        own: Dict[tuple, str] = {}
+        combined: Dict[tuple, str] = {}
+
+        def _combined(name: str, profile: str, visiting: frozenset = frozenset()) -> str:
+            key = (name, profile)
+            if key in combined:
+                return combined[key]
+            if name in per_profile:
+                own[key] = f"perfil:{profile}"
+            elif key not in own:
+                own[key] = self.fingerprint(modules[name], profile_for(name, profile), log_cb=log_cb)
+            upstream = [
+                [dep, _combined(dep, profile, visiting | {name})]
+                for dep in sorted(deps.get(name, ()))
+                if dep in modules and dep not in visiting
+            ]
+            body = json.dumps([own[key], upstream], separators=(",", ":"))
+            combined[key] = hashlib.sha256(body.encode("utf-8")).hexdigest()
+            return combined[key]
+
+        groups: Dict[str, List[List[str]]] = {}
+        for name in modules:
+            by_fingerprint: Dict[str, List[str]] = {}
+            for profile in profiles:
+                by_fingerprint.setdefault(_combined(name, profile), []).append(profile)
+            groups[name] = list(by_fingerprint.values())
+        return groups
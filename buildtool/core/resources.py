@@ -0,0 +1,202 @@
+"""Recursos de la máquina para dimensionar los builds en paralelo.
+
+:func:`auto_build_workers` decide cuántas tareas Maven lanzar a la vez cuando
+el usuario deja el número de workers en "Auto": lo limitan los núcleos, la
+memoria disponible frente a la memoria estimada de cada módulo
+(``Module.memory_mb``) y la forma del trabajo según los tiempos históricos.
+No tiene sentido más paralelismo que ``suma de duraciones / camino crítico``.
+
+:class:`CpuBudget` reparte los núcleos entre todos los Maven del proceso:
+cada invocación reserva tantas plazas como hilos (``-T``) va a usar, de modo
+que varios builds simultáneos no superan ``Config.build_cpu_budget``.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+# Memoria estimada de un Maven (JVM + plugins) sin ``memory_mb`` configurado.
+DEFAULT_MODULE_MEMORY_MB = 1024
+# Fracción de la memoria disponible que pueden ocupar los builds.
+MEMORY_HEADROOM = 0.8
+
+
+def available_memory_mb() -> Optional[int]:
+    """Memoria física disponible en MB, o ``None`` si no se puede saber."""
+
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/meminfo", encoding="ascii") as fh:
+                for line in fh:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) // 1024
+        except (OSError, ValueError, IndexError):
+            return None
+        return None
+    if os.name == "nt":
+        try:
+            import ctypes
+
+            class _MemoryStatus(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong),
+                    ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong),
+                    ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong),
+                    ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong),
+                    ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            status = _MemoryStatus()
+            status.dwLength = ctypes.sizeof(_MemoryStatus)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return int(status.ullAvailPhys // (1024 * 1024))
+        except Exception:
+            return None
+        return None
+    try:
+        pages = os.sysconf("SC_AVPHYS_PAGES")
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        return int(pages * page_size // (1024 * 1024))
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class WorkerPlan:
+    workers: int
+    cpu_limit: int
+    memory_limit: Optional[int]
+    shape_limit: Optional[int]
+
+    def describe(self) -> str:
+        parts = [f"CPU {self.cpu_limit}"]
+        if self.memory_limit is not None:
+            parts.append(f"memoria {self.memory_limit}")
+        if self.shape_limit is not None:
+            parts.append(f"histórico {self.shape_limit}")
+        return f"{self.workers} workers (límites: {', '.join(parts)})"
+
+
+def auto_build_workers(
+    task_count: int,
+    *,
+    memory_per_task_mb: Iterable[Optional[int]] = (),
+    total_cost_s: Optional[float] = None,
+    critical_path_s: Optional[float] = None,
+    cpu_count: Optional[int] = None,
+    available_mb: Optional[int] = None,
+) -> WorkerPlan:
+    """Calcula los workers para ``task_count`` tareas.
+
+    - CPU: la mitad de los núcleos lógicos (cada JVM de Maven usa más de uno
+      con el JIT y el GC), al menos 1.
+    - Memoria: cuántas tareas caben con la memoria media estimada por tarea.
+    - Histórico: ``ceil(total_cost_s / critical_path_s)``; más workers no
+      acortan el build si el camino crítico domina.
+    """
+
+    task_count = max(1, int(task_count))
+    cpus = cpu_count or os.cpu_count() or 2
+    cpu_limit = max(1, cpus // 2)
+
+    if available_mb is None:
+        available_mb = available_memory_mb()
+    memory_limit = None
+    estimates = [int(m) if m else DEFAULT_MODULE_MEMORY_MB for m in memory_per_task_mb]
+    if available_mb is not None:
+        per_task = (sum(estimates) / len(estimates)) if estimates else DEFAULT_MODULE_MEMORY_MB
+        memory_limit = max(1, int(available_mb * MEMORY_HEADROOM // max(1, per_task)))
+
+    shape_limit = None
+    if total_cost_s and critical_path_s and critical_path_s > 0:
+        shape_limit = max(1, math.ceil(total_cost_s / critical_path_s))
+
+    workers = min(
+        task_count,
+        cpu_limit,
+        memory_limit if memory_limit is not None else task_count,
+        shape_limit if shape_limit is not None else task_count,
+    )
+    return WorkerPlan(max(1, workers), cpu_limit, memory_limit, shape_limit)
+
+
+def default_cpu_budget() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+class CpuBudget:
+    """Plazas de CPU compartidas por todos los builds del proceso."""
+
+    def __init__(self, total: Optional[int] = None) -> None:
+        self.total = max(1, int(total or default_cpu_budget()))
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def clamp(self, slots: Optional[int]) -> int:
+        """Plazas que se reservarán para una tarea que pide ``slots`` hilos."""
+
+        return min(self.total, max(1, int(slots or 1)))
+
+    def resize(self, total: Optional[int]) -> None:
+        with self._cond:
+            self.total = max(1, int(total or default_cpu_budget()))
+            self._cond.notify_all()
+
+    def try_acquire(self, slots: int) -> Optional[int]:
+        """Reserva sin esperar; devuelve las plazas reservadas o ``None``."""
+
+        with self._cond:
+            slots = self.clamp(slots)
+            if self.in_use + slots > self.total:
+                return None
+            self.in_use += slots
+            return slots
+
+    def acquire(self, slots: int, cancel_event: Optional[threading.Event] = None) -> Optional[int]:
+        """Espera hasta reservar ``slots``; ``None`` si se cancela antes."""
+
+        with self._cond:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                granted = self.clamp(slots)
+                if self.in_use + granted <= self.total:
+                    self.in_use += granted
+                    return granted
+                self._cond.wait(0.2)
+
+    def release(self, slots: int) -> None:
+        with self._cond:
+            self.in_use = max(0, self.in_use - int(slots))
+            self._cond.notify_all()
+
+    def wait_for_release(self, timeout: float) -> None:
+        """Bloquea hasta que se libere alguna plaza o pase ``timeout``."""
+
+        with self._cond:
+            self._cond.wait(timeout)
+
+
+_CPU_BUDGET: Optional[CpuBudget] = None
+_CPU_BUDGET_LOCK = threading.Lock()
+
+
+def cpu_budget(total: Optional[int] = None) -> CpuBudget:
+    """Presupuesto compartido del proceso, ajustado a ``total`` (núcleos si ``None``)."""
+
+    global _CPU_BUDGET
+    with _CPU_BUDGET_LOCK:
+        if _CPU_BUDGET is None:
+            _CPU_BUDGET = CpuBudget(total)
+        elif _CPU_BUDGET.total != max(1, int(total or default_cpu_budget())):
+            _CPU_BUDGET.resize(total)
+        return _CPU_BUDGET
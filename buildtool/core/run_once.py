@@ -0,0 +1,211 @@
+"""Registro persistente de los módulos ``run_once`` ya compilados.
+
+Antes se usaban archivos de bloqueo en una carpeta temporal por proceso, así
+que los módulos comunes se recompilaban tras cada reinicio y nunca dentro de
+una misma sesión aunque cambiaran sus fuentes. Ahora cada compilación se
+registra en ``<estado>/run_once.json`` con una clave derivada de las entradas
+del módulo: el *tree* de Git de su carpeta y los cambios sin confirmar (ver
+:func:`buildtool.core.build_cache.source_fingerprint`) más sus *goals*. Se
+guardan también el commit ``HEAD`` y si había cambios locales, a título
+informativo.
+
+Un módulo se reutiliza mientras la clave coincida y sus artefactos sigan en
+``target/``. Las entradas que superan ``max_age_days`` o cuyo módulo ya no
+existe se eliminan al cargar el registro.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from .build_cache import _git, source_fingerprint
+from .process_runner import _alive
+
+DEFAULT_MAX_AGE_DAYS = 30
+_ARTIFACT_PATTERNS = ("*.war", "*.jar")
+
+
+def _state_dir() -> pathlib.Path:
+    base = os.environ.get("APPDATA")
+    if base:
+        return pathlib.Path(base) / "ForgeBuild"
+    return pathlib.Path.home() / ".forgebuild"
+
+
+def run_once_path() -> pathlib.Path:
+    override = os.environ.get("FORGEBUILD_RUN_ONCE_DB")
+    if override:
+        return pathlib.Path(override)
+    return _state_dir() / "run_once.json"
+
+
+@dataclass(frozen=True)
+class RunOnceInputs:
+    key: str
+    commit: Optional[str]
+    dirty: bool
+
+
+def module_inputs(module_dir: pathlib.Path, goals: Sequence[str]) -> RunOnceInputs:
+    """Calcula la clave de entradas de ``module_dir`` con sus ``goals``."""
+
+    module_dir = pathlib.Path(module_dir)
+    head = _git(module_dir, "rev-parse", "HEAD") if module_dir.is_dir() else None
+    status = _git(module_dir, "status", "--porcelain", "--", ".") if head is not None else None
+    body = json.dumps({"sources": source_fingerprint(module_dir), "goals": list(goals)}, sort_keys=True)
+    return RunOnceInputs(
+        key=hashlib.sha256(body.encode("utf-8")).hexdigest(),
+        commit=head.decode("utf-8").strip() if head else None,
+        dirty=bool(status and status.strip()),
+    )
+
+
+def _artifacts(target_dir: pathlib.Path) -> List[str]:
+    names = set()
+    for pattern in _ARTIFACT_PATTERNS:
+        names.update(path.name for path in target_dir.glob(pattern) if path.is_file())
+    return sorted(names)
+
+
+class RunOnceStore:
+    """Registro en JSON, seguro entre hilos, de las compilaciones ``run_once``."""
+
+    def __init__(self, path: Optional[pathlib.Path] = None, *, max_age_days: int = DEFAULT_MAX_AGE_DAYS) -> None:
+        self.path = pathlib.Path(path) if path else run_once_path()
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, dict]] = None
+
+    @staticmethod
+    def _entry_id(project_key: str, module: str) -> str:
+        return f"{project_key}::{module}"
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            self._entries = data if isinstance(data, dict) else {}
+            if self._prune_locked():
+                self._save_locked()
+        return self._entries
+
+    def _save_locked(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".run_once-", dir=str(self.path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(self._entries, fh, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def _prune_locked(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        max_age = self.max_age_days * 86400 if self.max_age_days is not None else None
+        stale = [
+            entry_id
+            for entry_id, entry in self._entries.items()
+            if not isinstance(entry, dict)
+            or (max_age is not None and now - float(entry.get("updated_at") or 0) > max_age)
+            or not pathlib.Path(entry.get("path") or "").is_dir()
+        ]
+        for entry_id in stale:
+            del self._entries[entry_id]
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    def lookup(
+        self, project_key: str, module: str, inputs: RunOnceInputs, module_dir: pathlib.Path
+    ) -> Optional[dict]:
+        """Entrada vigente para ``inputs`` o ``None`` si hay que compilar."""
+
+        with self._lock:
+            entry = self._load().get(self._entry_id(project_key, module))
+        if not entry or entry.get("key") != inputs.key:
+            return None
+        target_dir = pathlib.Path(module_dir) / "target"
+        if not set(entry.get("artifacts") or ()) <= set(_artifacts(target_dir)):
+            return None
+        return dict(entry)
+
+    def record(
+        self, project_key: str, module: str, inputs: RunOnceInputs, module_dir: pathlib.Path
+    ) -> None:
+        """Registra que ``module`` se compiló con ``inputs``."""
+
+        entry = {
+            "key": inputs.key,
+            "commit": inputs.commit,
+            "dirty": inputs.dirty,
+            "path": str(pathlib.Path(module_dir)),
+            "artifacts": _artifacts(pathlib.Path(module_dir) / "target"),
+            "updated_at": time.time(),
+        }
+        with self._lock:
+            self._load()[self._entry_id(project_key, module)] = entry
+            self._save_locked()
+
+    def forget(self, project_key: str, module: str) -> None:
+        with self._lock:
+            if self._load().pop(self._entry_id(project_key, module), None) is not None:
+                self._save_locked()
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Elimina entradas caducadas o de módulos inexistentes."""
+
+        with self._lock:
+            self._load()
+            removed = self._prune_locked(now)
+            if removed:
+                self._save_locked()
+        return removed
+
+
+def remove_legacy_lock_dirs(temp_dir: Optional[pathlib.Path] = None) -> int:
+    """Borra las carpetas ``forgebuild_runonce_<pid>`` de versiones anteriores.
+
+    La carpeta temporal es compartida: solo se borran las de procesos que ya
+    terminaron, porque una instancia antigua todavía abierta sigue usando la
+    suya. Devuelve cuántas se borraron.
+    """
+
+    removed = 0
+    base = pathlib.Path(temp_dir) if temp_dir is not None else pathlib.Path(tempfile.gettempdir())
+    for legacy in base.glob("forgebuild_runonce_*"):
+        try:
+            pid = int(legacy.name.rsplit("_", 1)[1])
+        except ValueError:
+            continue
+        if 0 < pid != os.getpid() and _alive(pid):
+            continue
+        shutil.rmtree(legacy, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+_DEFAULT_STORE: Optional[RunOnceStore] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_store() -> RunOnceStore:
+    global _DEFAULT_STORE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_STORE is None:
+            remove_legacy_lock_dirs()
+        if _DEFAULT_STORE is None or _DEFAULT_STORE.path != run_once_path():
+            _DEFAULT_STORE = RunOnceStore()
+        return _DEFAULT_STORE
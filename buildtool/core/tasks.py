@@ -2,17 +2,39 @@
 from __future__ import annotations
 from .config import Config, groups_for_user
 from .maven import run_maven
-from .copier import copy_artifacts
+from .maven_events import MavenWarning, ModuleStarted, TestSummary
+from .module_graph import (
+    DependencyCycleError,
+    critical_path_weights,
+    module_dependencies,
+    pom_dependencies,
+    topological_order,
+)
+from .artifact_store import ArtifactStore
+from .build_cache import BuildCache
+from .copier import CopyStats, RateLimiter, copy_artifacts, copy_planned, plan_copy, unlink_if_shared
+from .deploy_manifest import (
+    DeployManifest,
+    ManifestEntry,
+    VerifyReport,
+    manifest_for,
+    manifest_name,
+    plan_delta,
+    remove_orphans,
+    verify_manifest,
+)
+from .deploy_staging import StagingJournal, prune_stage, publish, seed_stage, staging_dir
 from .pipeline_history import PipelineHistory
+from .profile_inputs import ProfileInputs
+from .resources import auto_build_workers, cpu_budget
+from .run_once import default_store as run_once_store, module_inputs
 from .session import current_username
-import pathlib, shutil, tempfile, os, threading, getpass
+import pathlib, shutil, threading, getpass, time, heapq, statistics
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
 from threading import Event
 
-# Carpeta de locks por proceso para módulos con run_once
-_RUNONCE_DIR = pathlib.Path(tempfile.gettempdir()) / f"forgebuild_runonce_{os.getpid()}"
-_RUNONCE_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def _locate_project(cfg: Config, project_key: str, group_key: str | None):
@@ -57,6 +79,18 @@ def _ensure(dir_path: pathlib.Path) -> pathlib.Path:
     dir_path.mkdir(parents=True, exist_ok=True)
     return dir_path
 
+@dataclass(frozen=True)
+class BuildProgress:
+    """Avance de ``build_project_scheduled`` (tareas perfil/módulo terminadas)."""
+
+    done: int
+    total: int
+    profile: str
+    module: str
+    status: str  # running | ok | error | cancelled
+    project: str | None = None  # solo en builds por lotes
+
+
 def _pick_artifact(target_dir: pathlib.Path, patterns: list[str]) -> pathlib.Path | None:
     for pat in patterns:
         matches = sorted(target_dir.glob(pat))
@@ -64,6 +98,13 @@ def _pick_artifact(target_dir: pathlib.Path, patterns: list[str]) -> pathlib.Pat
             return matches[0]
     return None
 
+def _maven_profile(mod, profile: str) -> str | None:
+    """Argumento de ``-P`` que recibe ``mod`` al compilar ``profile``."""
+    if getattr(mod, "no_profile", False):
+        return None
+    return getattr(mod, "profile_override", None) or profile
+
+
 def build_project_for_profile(
     cfg: Config,
     project_key: str,
@@ -73,7 +114,34 @@ def build_project_for_profile(
     group_key: str | None=None,
     modules_filter: set[str] | None = None,
     cancel_event: Event | None = None,
+    timing_cb=None,
+    event_cb=None,
+    cpu_slots: int | None = None,
+    shared_from: str | None = None,
 ) -> bool:
+    """Compila los módulos de ``project_key`` para ``profile`` y copia sus artefactos.
+
+    Si se indica ``timing_cb``, se invoca una vez por módulo ejecutado con un
+    ``dict`` con ``module``, ``profile``, ``maven_s``, ``copy_s``,
+    ``exit_code``, ``bytes_copied``, ``status`` (``ok``, ``reused``,
+    ``cached``, ``error`` o ``cancelled``), ``cache`` (``hit``/``miss``) y
+    los contadores ``tests_run``, ``tests_failed``, ``tests_skipped`` y
+    ``warnings`` obtenidos de la salida de Maven. ``event_cb(module, event)``
+    recibe cada evento de :mod:`buildtool.core.maven_events`.
+
+    Con ``cfg.build_cache`` activo, un módulo cuya clave de contenido ya está
+    en :class:`~buildtool.core.build_cache.BuildCache` restaura sus artefactos
+    en ``target/`` y no ejecuta Maven.
+
+    Cada Maven reserva ``Module.maven_threads`` plazas del presupuesto de CPU
+    compartido (:func:`~buildtool.core.resources.cpu_budget`) y las recibe
+    como ``-T``. ``cpu_slots`` indica que quien llama ya reservó esas plazas.
+
+    ``shared_from`` indica que los módulos ya se compilaron para ese perfil
+    con las mismas entradas (:mod:`buildtool.core.profile_inputs`): no se
+    ejecuta Maven y solo se copian sus artefactos a los destinos de
+    ``profile``.
+    """
     # localizar proyecto
     grp, project = _locate_project(cfg, project_key, group_key)
     if not project:
@@ -139,10 +207,90 @@ def build_project_for_profile(
         for dest in dests:
             _prepare_destination(dest, create=False)
 
+    def _add_bytes(timing: dict, target: pathlib.Path) -> None:
+        try:
+            timing["bytes_copied"] += pathlib.Path(target).stat().st_size
+        except OSError:
+            pass
+
+    def _maven_events(timing: dict):
+        def _on_event(event) -> None:
+            if isinstance(event, TestSummary):
+                timing["tests_run"] = (timing["tests_run"] or 0) + event.run
+                timing["tests_failed"] = (timing["tests_failed"] or 0) + event.failures + event.errors
+                timing["tests_skipped"] = (timing["tests_skipped"] or 0) + event.skipped
+            elif isinstance(event, MavenWarning):
+                timing["warnings"] = (timing["warnings"] or 0) + 1
+            if event_cb:
+                event_cb(timing["module"], event)
+        return _on_event
+
+    def _report_timing(timing: dict, status: str, copy_started: float | None = None) -> None:
+        if not timing_cb:
+            return
+        if copy_started is not None:
+            timing["copy_s"] = time.monotonic() - copy_started
+        timing["status"] = status
+        try:
+            timing_cb(dict(timing))
+        except Exception:
+            pass
+
     # --- ORDEN: primero los módulos "commons": run_once + no_profile (prioridad)
     def _priority(m):
         return 0 if getattr(m, "run_once", False) and getattr(m, "no_profile", False) else 1
     modules_in_order = sorted(project.modules, key=_priority)
+    build_cache = BuildCache.from_config(cfg)
+    artifact_store = ArtifactStore.from_config(cfg)
+    if artifact_store is not None and not artifact_store.can_link(output_base):
+        log_cb(
+            f"[{profile}] almacén de artefactos omitido: {output_base} está en otro volumen"
+            " y cada artefacto se escribiría dos veces."
+        )
+        artifact_store = None
+
+    def _install(src: pathlib.Path, dest: pathlib.Path) -> None:
+        if artifact_store is not None:
+            artifact_store.install(src, dest)
+        else:
+            unlink_if_shared(dest)
+            shutil.copy2(src, dest)
+    graph = module_dependencies(project, repo_path) if build_cache or not modules_filter or len(modules_filter) > 1 else {}
+    cache_graph = graph
+    if build_cache is not None:
+        # La clave cubre las dependencias Maven entre módulos aunque el
+        # proyecto no declare depends_on ni module_deps_from_pom.
+        cache_graph = {name: set(deps) for name, deps in graph.items()}
+        for name, found in pom_dependencies(repo_path, project.modules).items():
+            cache_graph.setdefault(name, set()).update(found)
+    # Con varios módulos, respetar además depends_on / pom.xml
+    if not modules_filter or len(modules_filter) > 1:
+        try:
+            by_name = {m.name: m for m in modules_in_order}
+            order = topological_order(by_name, graph)
+            modules_in_order = [by_name[name] for name in order]
+        except DependencyCycleError as err:
+            log_cb(f"[{profile}] ADVERTENCIA: {err}. Se usa el orden configurado.")
+
+    cache_keys: dict[str, str] = {}
+
+    def _cache_key(mod, visiting: frozenset = frozenset()) -> str:
+        # La clave incluye las de sus dependencias: si cambia un módulo de
+        # entrada, los que dependen de él también se recompilan.
+        key = cache_keys.get(mod.name)
+        if key is not None:
+            return key
+        by_name = {m.name: m for m in project.modules}
+        upstream = {
+            dep: _cache_key(by_name[dep], visiting | {mod.name})
+            for dep in sorted(cache_graph.get(mod.name, ()))
+            if dep in by_name and dep not in visiting
+        }
+        key = build_cache.module_key(
+            repo_path / mod.path, goals=mod.goals, profile=_maven_profile(mod, profile), upstream=upstream
+        )
+        cache_keys[mod.name] = key
+        return key
 
     for mod in modules_in_order:
         module_dests = _module_destinations(mod)
@@ -165,42 +313,122 @@ def build_project_for_profile(
             log_cb(f"[{profile}] Saltando {mod.name} (solo para perfil {mod.only_if_profile_equals})")
             continue
 
+        timing = {
+            "module": mod.name,
+            "profile": profile,
+            "maven_s": None,
+            "copy_s": None,
+            "exit_code": None,
+            "bytes_copied": 0,
+            "tests_run": None,
+            "tests_failed": None,
+            "tests_skipped": None,
+            "warnings": None,
+            "cache": None,
+        }
         module_path = repo_path / mod.path
         if not module_path.exists():
             log_cb(f"[{profile}] ADVERTENCIA: ruta de módulo no existe: {module_path}")
 
-        effective_profile = getattr(mod, "profile_override", None) or profile
-        profile_to_pass = None if getattr(mod, "no_profile", False) else effective_profile
+        profile_to_pass = _maven_profile(mod, profile)
 
         separate = (getattr(project, "execution_mode", None) or getattr(cfg, "default_execution_mode", "integrated")) == "separate_windows"
 
-        # run_once: compilar solo una vez por sesión
-        lock_file = _RUNONCE_DIR / f"{project_key}__{mod.name}.lock"
-        if getattr(mod, "run_once", False) and lock_file.exists():
-            log_cb(f"[{profile}] {mod.name}: run_once, reutilizando artefactos de esta sesión.")
-        else:
-            ret = run_maven(
-                str(module_path),
-                mod.goals,
-                profile=profile_to_pass,
-                log_cb=lambda s: log_cb(f"[{profile}] {s}"),
-                separate_window=separate,
-                cancel_event=cancel_event,
-            )
+        # run_once: compilar solo cuando cambian sus entradas (commit/cambios locales)
+        run_once_inputs = None
+        reused = False
+        if shared_from is not None:
+            reused = True
+        elif getattr(mod, "run_once", False):
+            try:
+                run_once_inputs = module_inputs(module_path, mod.goals)
+                previous = run_once_store().lookup(project_key, mod.name, run_once_inputs, module_path)
+            except Exception as err:
+                log_cb(f"[{profile}] ADVERTENCIA: registro run_once no disponible para {mod.name}: {err}")
+                previous = None
+            reused = previous is not None
+        cache_key = None
+        cached = False
+        extra_patterns = [mod.select_pattern] if getattr(mod, "select_pattern", None) else []
+        if shared_from is not None:
+            log_cb(f"[{profile}] {mod.name}: mismas entradas que en el perfil {shared_from}; se copian sus artefactos.")
+        elif reused:
+            commit = (previous.get("commit") or "")[:10] or "sin Git"
+            log_cb(f"[{profile}] {mod.name}: run_once, sin cambios desde el último build ({commit}); reutilizando artefactos.")
+        elif build_cache is not None and not separate and not build_cache.cacheable(mod.goals):
+            log_cb(f"[{profile}] {mod.name}: sin caché de build (sus goals instalan fuera de target/).")
+        elif build_cache is not None and not separate:
+            try:
+                cache_key = _cache_key(mod)
+                cached = build_cache.restore(
+                    project_key, mod.name, cache_key, module_path / "target", extra_patterns=extra_patterns
+                ) is not None
+            except Exception as err:
+                log_cb(f"[{profile}] ADVERTENCIA: caché de build no disponible para {mod.name}: {err}")
+                cache_key = None
+            if cache_key:
+                timing["cache"] = "hit" if cached else "miss"
+                if cached:
+                    log_cb(f"[{profile}] {mod.name}: caché HIT ({cache_key[:12]}), se omite Maven.")
+                else:
+                    log_cb(f"[{profile}] {mod.name}: caché MISS ({cache_key[:12]}).")
+        if not reused and not cached:
+            threads = cpu_slots
+            budget = None
+            if threads is None:
+                budget = cpu_budget(getattr(cfg, "build_cpu_budget", None))
+                threads = budget.acquire(getattr(mod, "maven_threads", None) or 1, cancel_event)
+                if threads is None:
+                    log_cb(f"[{profile}] {mod.name}: cancelado por el usuario.")
+                    _report_timing(timing, "cancelled")
+                    return False
+            maven_started = time.monotonic()
+            try:
+                ret = run_maven(
+                    str(module_path),
+                    mod.goals,
+                    profile=profile_to_pass,
+                    log_cb=lambda s: log_cb(f"[{profile}] {s}"),
+                    separate_window=separate,
+                    cancel_event=cancel_event,
+                    event_cb=_maven_events(timing),
+                    threads=threads,
+                )
+            finally:
+                if budget is not None:
+                    budget.release(threads)
+            timing["maven_s"] = time.monotonic() - maven_started
+            timing["exit_code"] = ret
             if cancel_event and cancel_event.is_set():
                 log_cb(f"[{profile}] {mod.name}: cancelado por el usuario.")
+                _report_timing(timing, "cancelled")
                 return False
             if ret != 0:
                 log_cb(f"[{profile}] ERROR: Maven falló en {mod.name} (código {ret}). Abortando perfil.")
+                _report_timing(timing, "error")
                 return False
-            if getattr(mod, "run_once", False):
+            if cache_key:
                 try:
-                    lock_file.write_text("ok", encoding="utf-8")
-                except Exception:
-                    pass
+                    build_cache.store(
+                        project_key,
+                        mod.name,
+                        cache_key,
+                        module_path / "target",
+                        profile=profile_to_pass,
+                        extra_patterns=extra_patterns,
+                    )
+                except Exception as err:
+                    log_cb(f"[{profile}] ADVERTENCIA: no se pudo guardar {mod.name} en la caché de build: {err}")
+        if not reused and run_once_inputs is not None:
+            try:
+                run_once_store().record(project_key, mod.name, run_once_inputs, module_path)
+            except Exception:
+                pass
 
         # --- Copia de artefactos ---
         target_dir = module_path / "target"
+        copy_started = time.monotonic()
+        done_status = "reused" if reused else ("cached" if cached else "ok")
 
         # Caso selectivo: tomar UN archivo exacto y renombrarlo
         if getattr(mod, "select_pattern", None) and getattr(mod, "rename_jar_to", None):
@@ -223,8 +451,10 @@ def build_project_for_profile(
             if not src:
                 log_cb(f"[{profile}] ADVERTENCIA: no se encontró patrón {mod.select_pattern} en {target_dir}")
             else:
-                shutil.copy2(src, dest_dir / mod.rename_jar_to)
+                _install(src, dest_dir / mod.rename_jar_to)
+                _add_bytes(timing, dest_dir / mod.rename_jar_to)
                 log_cb(f"[{profile}] Copiado único: {src.name} -> {dest_dir/mod.rename_jar_to}")
+            _report_timing(timing, done_status, copy_started)
             continue  # no copiar nada más
 
         # Flujo clásico
@@ -240,6 +470,8 @@ def build_project_for_profile(
                 log_cb=lambda s: log_cb(f"[{profile}] {s}"),
                 recursive=False,
                 cancel_event=cancel_event,
+                on_copied=lambda target: _add_bytes(timing, target),
+                store=artifact_store,
             )
         if getattr(mod, "copy_to_profile_ui", False):
             dest = (_prepare_destination(output_base, create=True)
@@ -252,6 +484,8 @@ def build_project_for_profile(
                 log_cb=lambda s: log_cb(f"[{profile}] {s}"),
                 recursive=False,
                 cancel_event=cancel_event,
+                on_copied=lambda target: _add_bytes(timing, target),
+                store=artifact_store,
             )
         if getattr(mod, "copy_to_subfolder", None):
             dest = _prepare_destination(output_base / mod.copy_to_subfolder, create=True)
@@ -262,19 +496,84 @@ def build_project_for_profile(
                 log_cb=lambda s: log_cb(f"[{profile}] {s}"),
                 recursive=False,
                 cancel_event=cancel_event,
+                on_copied=lambda target: _add_bytes(timing, target),
+                store=artifact_store,
             )
 
         if getattr(mod, "rename_jar_to", None):
             src = _pick_artifact(target_dir, ["*-jar-with-dependencies.jar", "*.jar", "*.war"])
             if src:
                 dest_dir = _prepare_destination(output_base / (mod.copy_to_subfolder or ""), create=True)
-                shutil.copy2(src, dest_dir / mod.rename_jar_to)
+                _install(src, dest_dir / mod.rename_jar_to)
+                _add_bytes(timing, dest_dir / mod.rename_jar_to)
                 log_cb(f"[{profile}] Renombrado {src.name} -> {mod.rename_jar_to} en {dest_dir}")
 
+        _report_timing(timing, done_status, copy_started)
+
     return True
 
 # ------------------ NUEVO: Scheduler perfiles en serie, módulos en paralelo ------------------
 
+@dataclass
+class BuildSelection:
+    """Proyecto, perfiles y módulos que compila :func:`build_batch_scheduled`."""
+
+    project_key: str
+    profiles: list[str]
+    modules: set[str] | None = None
+    group_key: str | None = None
+
+
+@dataclass
+class _BatchProject:
+    key: str
+    group_key: str | None
+    profiles: list[str]
+    modules: list
+    run_id: int | None = None
+    repo_path: pathlib.Path | None = None
+    deps: dict = field(default_factory=dict)
+    commons: list[str] = field(default_factory=list)
+    pending: int = 0
+    failed: bool = False
+
+
+def _share_profiles(
+    profile_inputs: ProfileInputs,
+    bp: _BatchProject,
+    shared: dict[tuple[str, str, str], list[str]],
+    log_cb,
+) -> set[tuple[str, str]]:
+    """Agrupa los perfiles de ``bp`` cuyas entradas de Maven coinciden por módulo.
+
+    Rellena ``shared`` y devuelve los pares (perfil, módulo) que no se
+    compilan porque reciben los artefactos de otro perfil.
+    """
+    mods = {m.name: m for m in bp.modules if m.name not in bp.commons}
+    try:
+        groups = profile_inputs.share_groups(
+            {name: bp.repo_path / mod.path for name, mod in mods.items()},
+            bp.profiles,
+            lambda name, prof: _maven_profile(mods[name], prof),
+            bp.deps,
+            per_profile=[name for name, mod in mods.items() if getattr(mod, "only_if_profile_equals", None)],
+            log_cb=log_cb,
+        )
+    except Exception as err:
+        log_cb(f"ADVERTENCIA: no se pudieron comparar las entradas de los perfiles: {err}")
+        return set()
+    copied: set[tuple[str, str]] = set()
+    for name, profile_groups in groups.items():
+        for group in profile_groups:
+            if len(group) > 1:
+                shared[(bp.key, group[0], name)] = group[1:]
+                copied.update((prof, name) for prof in group[1:])
+    if copied:
+        log_cb(f"== Módulos iguales entre perfiles ({profile_inputs.mode}): "
+               f"{len(copied)} de {len(mods) * len(bp.profiles)} compilaciones se sustituyen por copias ==")
+    return copied
+
+
 def build_project_scheduled(
     cfg: Config,
     project_key: str,
@@ -284,187 +583,484 @@ def build_project_scheduled(
     group_key: str | None=None,
     max_workers: int | None = None,
     cancel_event: Event | None = None,
+    event_cb=None,
 ) -> bool:
-    # localizar proyecto
-    grp, project = _locate_project(cfg, project_key, group_key)
-    if not project:
-        raise KeyError(f"Proyecto '{project_key}' no encontrado en la configuración")
-    group_key = grp.key if grp else None
+    """Compila los módulos de ``profiles`` en paralelo respetando sus dependencias.
+
+    Equivale a :func:`build_batch_scheduled` con una sola selección.
+    """
+    return build_batch_scheduled(
+        cfg,
+        [BuildSelection(project_key, list(profiles), modules_filter, group_key)],
+        log_cb=log_cb,
+        max_workers=max_workers,
+        cancel_event=cancel_event,
+        event_cb=event_cb,
+    )
+
 
-    all_mods = [m for m in project.modules if (not modules_filter or m.name in modules_filter)]
+def build_batch_scheduled(
+    cfg: Config,
+    selections: list[BuildSelection],
+    log_cb=print,
+    max_workers: int | None = None,
+    cancel_event: Event | None = None,
+    event_cb=None,
+) -> bool:
+    """Compila varios proyectos en un único pool de workers.
+
+    Cada tarea (proyecto, perfil, módulo) se lanza en cuanto terminan los
+    módulos de los que depende dentro del mismo proyecto y perfil
+    (``Module.depends_on`` o los ``pom.xml`` si ``Project.module_deps_from_pom``).
+    Los módulos comunes (``run_once`` + ``no_profile``) de un proyecto forman
+    una tarea previa a todas las demás de ese proyecto. Entre las tareas
+    listas se prioriza la de mayor camino crítico, estimado con el p50 de
+    ``pipeline_module_timings``. Una tarea solo arranca si caben sus
+    ``Module.maven_threads`` en el presupuesto de CPU compartido
+    (``Config.build_cpu_budget``). Un fallo en cualquier proyecto detiene
+    todo el lote.
+
+    Con ``Config.profile_reuse`` activo, un módulo cuyas entradas de Maven
+    coinciden en varios perfiles (:mod:`buildtool.core.profile_inputs`) se
+    compila una sola vez y sus artefactos se copian al destino de cada uno.
+
+    Cada proyecto registra su propia ejecución en el historial; con más de
+    una selección se registra además una ejecución padre que las agrupa
+    (``parent_id``) y los mensajes se prefijan con ``[proyecto]``.
+
+    ``event_cb`` recibe :class:`BuildProgress` cuando Maven empieza a
+    compilar una tarea y cuando esta termina.
+    """
     cancel_event = cancel_event or Event()
+    batch = len(selections) > 1
+
+    # localizar proyectos
+    projects: list[_BatchProject] = []
+    config_projects = {}
+    for sel in selections:
+        grp, project = _locate_project(cfg, sel.project_key, sel.group_key)
+        if not project:
+            raise KeyError(f"Proyecto '{sel.project_key}' no encontrado en la configuración")
+        mods = [m for m in project.modules if (not sel.modules or m.name in sel.modules)]
+        projects.append(_BatchProject(sel.project_key, grp.key if grp else None, list(sel.profiles), mods))
+        config_projects[sel.project_key] = project
 
     history = PipelineHistory()
-    try:
-        history_run_id = history.start_run(
-            "build",
-            user=current_username(getpass.getuser()),
-            group_key=group_key,
-            project_key=project_key,
-            profiles=profiles,
-            modules=[m.name for m in all_mods],
-        )
-    except Exception:
-        history_run_id = None
+    user = current_username(getpass.getuser())
+    parent_run_id = None
+    if batch:
+        try:
+            parent_run_id = history.start_run(
+                "build",
+                user=user,
+                group_key=projects[0].group_key if len({p.group_key for p in projects}) == 1 else None,
+                project_key=None,
+                profiles=list(dict.fromkeys(prof for p in projects for prof in p.profiles)),
+                modules=[p.key for p in projects],
+            )
+            history.open_log_writer(parent_run_id)
+        except Exception:
+            parent_run_id = None
+    for bp in projects:
+        try:
+            bp.run_id = history.start_run(
+                "build",
+                user=user,
+                group_key=bp.group_key,
+                project_key=bp.key,
+                profiles=bp.profiles,
+                modules=[m.name for m in bp.modules],
+                parent_id=parent_run_id,
+            )
+            history.open_log_writer(bp.run_id)
+        except Exception:
+            bp.run_id = None
 
-    def _log(message: str) -> None:
-        log_cb(message)
-        if history_run_id:
+    def _write(run_id: int | None, message: str) -> None:
+        if run_id:
             try:
-                history.log_message(history_run_id, message)
+                history.log_message(run_id, message)
             except Exception:
                 pass
 
-    def _finalize(result: bool, message: str | None = None) -> bool:
-        if history_run_id:
-            status = "success" if result else ("cancelled" if cancel_event.is_set() else "error")
+    def _batch_log(message: str) -> None:
+        if not batch:
+            project_log[projects[0].key](message)
+            return
+        log_cb(message)
+        _write(parent_run_id, message)
+
+    def _logger(bp: _BatchProject):
+        prefix = f"[{bp.key}] " if batch else ""
+
+        def _log(message: str) -> None:
+            log_cb(prefix + message)
+            _write(bp.run_id, message)
+        return _log
+
+    project_log = {bp.key: _logger(bp) for bp in projects}
+
+    def _finish(run_id: int | None, result: bool, message: str | None, failed: bool = False) -> None:
+        if run_id:
+            if result:
+                status = "success"
+            elif failed or not cancel_event.is_set():
+                status = "error"
+            else:
+                status = "cancelled"
             try:
-                history.finish_run(history_run_id, status, message)
+                history.finish_run(run_id, status, message)
             except Exception:
                 pass
+
+    def _finalize(result: bool, message: str | None = None) -> bool:
+        for bp in projects:
+            if not bp.failed and not result and batch and not cancel_event.is_set():
+                # otro proyecto impidió empezar el lote
+                _finish(bp.run_id, False, "Lote detenido antes de empezar.")
+                continue
+            # en un lote, un proyecto que terminó antes del fallo de otro queda como éxito
+            ok = result or (batch and not bp.failed and bp.pending == 0)
+            if ok:
+                summary = "Pipeline completado."
+            elif bp.failed:
+                summary = "Pipeline con errores."
+            elif cancel_event.is_set():
+                summary = "Pipeline cancelado por el usuario."
+            else:
+                summary = message
+            _finish(bp.run_id, ok, summary if batch else message, bp.failed)
+        _finish(parent_run_id, result, message, any(bp.failed for bp in projects))
         return result
 
-    # commons (run_once + no_profile) una sola vez
-    commons = [m.name for m in all_mods if getattr(m, "run_once", False) and getattr(m, "no_profile", False)]
+    def _timing_recorder(bp: _BatchProject, queue_s: float):
+        def _record(timing: dict) -> None:
+            if bp.run_id:
+                history.record_module_timing(bp.run_id, queue_s=queue_s, **timing)
+        return _record
 
-    success = True
-    error_reported = False
+    progress = {"done": 0, "total": 0}
 
-    if commons:
-        first = profiles[0]
-        commons_ok = build_project_for_profile(
-            cfg,
-            project_key,
-            first,
-            True,
-            log_cb=_log,
-            group_key=group_key,
-            modules_filter=set(commons),
-            cancel_event=cancel_event,
-        )
-        if not commons_ok:
-            success = False
-            if not cancel_event.is_set():
-                cancel_event.set()
-            if not error_reported:
-                _log("<< ERROR: Falló la fase común. Deteniendo el pipeline.")
-                error_reported = True
-            return _finalize(False, "Falló la fase común.")
-
-    # módulos que se bloquean entre perfiles
-    import threading
-    from collections import defaultdict
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    mod_locks = defaultdict(threading.Lock)
-    serial_mods = {m.name for m in all_mods if getattr(m, "serial_across_profiles", False)}
+    def _progress(project_key: str, profile: str, module: str, status: str) -> None:
+        if event_cb:
+            try:
+                event_cb(BuildProgress(progress["done"], progress["total"], profile, module, status,
+                                       project_key if batch else None))
+            except Exception:
+                pass
 
-    # tareas por perfil/módulo (excluye commons)
-    tasks = []
-    profile_pending: dict[str, set[str]] = {}
+    def _maven_progress(project_key: str, profile: str):
+        def _on_event(module: str, event) -> None:
+            if isinstance(event, ModuleStarted):
+                _progress(project_key, profile, module, "running")
+        return _on_event
 
-    for prof in profiles:
-        _log(f"== Perfil: {prof} ==")
-        pending: set[str] = set()
-        for mod in all_mods:
-            if mod.name in commons:
-                continue
-            tasks.append((prof, mod.name))
-            pending.add(mod.name)
-        if pending:
-            profile_pending[prof] = pending
+    # grafo de dependencias entre los módulos seleccionados de cada proyecto
+    for bp in projects:
+        project = config_projects[bp.key]
+        try:
+            bp.repo_path = _resolve_repo_path(cfg, bp.key, bp.group_key,
+                                              getattr(project, "repo", None), getattr(project, "workspace", None))
+            bp.deps = module_dependencies(project, bp.repo_path, [m.name for m in bp.modules])
+            topological_order([m.name for m in bp.modules], bp.deps)
+        except DependencyCycleError as err:
+            bp.failed = True
+            project_log[bp.key](f"<< ERROR: {err}")
+            return _finalize(False, str(err))
+
+    if batch:
+        _batch_log(f"== Lote: {', '.join(bp.key for bp in projects)} ==")
+
+    # tareas por proyecto/perfil/módulo; los commons (run_once + no_profile)
+    # son una única tarea (``module`` None) previa al resto del proyecto
+    tasks: list[tuple[str, str, str | None]] = []
+    deps: dict[tuple[str, str | None], set[str | None]] = {}
+    profile_pending: dict[tuple[str, str], set[str]] = {}
+    mods_by_name: dict[tuple[str, str], object] = {}
+    cost: dict[tuple[str, str], float] = {}
+    weights: dict[tuple[str, str | None], float] = {}
+    default_costs: list[float] = []
+    # módulos con las mismas entradas en varios perfiles: (proyecto, perfil que
+    # compila, módulo) -> perfiles que reciben una copia de sus artefactos
+    shared: dict[tuple[str, str, str], list[str]] = {}
+    profile_inputs = ProfileInputs.from_config(cfg)
+
+    for bp in projects:
+        _log = project_log[bp.key]
+        bp.commons = [m.name for m in bp.modules
+                      if getattr(m, "run_once", False) and getattr(m, "no_profile", False)]
+        if bp.commons and bp.profiles:
+            tasks.append((bp.key, bp.profiles[0], None))
+            progress["total"] += len(bp.commons)
+            bp.pending += 1
+        copied: set[tuple[str, str]] = set()
+        if profile_inputs is not None and len(bp.profiles) > 1:
+            copied = _share_profiles(profile_inputs, bp, shared, _log)
+        project_tasks = 0
+        for prof in bp.profiles:
+            _log(f"== Perfil: {prof} ==")
+            pending: set[str] = set()
+            for mod in bp.modules:
+                if mod.name in bp.commons:
+                    continue
+                pending.add(mod.name)
+                if (prof, mod.name) in copied:
+                    continue
+                tasks.append((bp.key, prof, mod.name))
+                project_tasks += 1
+            if pending:
+                profile_pending[(bp.key, prof)] = pending
+        bp.pending += project_tasks
+        progress["total"] += project_tasks + len(copied)
+
+        task_mods = {m.name for m in bp.modules if m.name not in bp.commons}
+        for mod in bp.modules:
+            mods_by_name[(bp.key, mod.name)] = mod
+        for mod in task_mods:
+            needs = set(bp.deps.get(mod, set()) & task_mods)
+            if bp.commons:
+                needs.add(None)
+            deps[(bp.key, mod)] = needs
+
+        # prioridad: camino crítico estimado con el p50 histórico de cada módulo;
+        # sin dependencias equivale a lanzar primero las tareas más largas
+        try:
+            project_cost = {s.module: s.p50_s for s in history.module_timing_stats(project_key=bp.key)
+                            if s.module in task_mods and s.p50_s is not None}
+        except Exception:
+            project_cost = {}
+        default_cost = statistics.median(project_cost.values()) if project_cost else 1.0
+        default_costs.append(default_cost)
+        project_weights = critical_path_weights(
+            [m.name for m in bp.modules if m.name in task_mods],
+            {mod: needs for mod, needs in bp.deps.items() if mod in task_mods},
+            project_cost,
+            default_cost=default_cost,
+        )
+        for mod in task_mods:
+            cost[(bp.key, mod)] = project_cost.get(mod, default_cost)
+            weights[(bp.key, mod)] = project_weights.get(mod, 0.0)
+        # los commons bloquean todo el proyecto: van primero
+        weights[(bp.key, None)] = float("inf")
 
     if not tasks:
         return _finalize(True, "Sin tareas pendientes.")
 
-    workers = max_workers or max(2, min(4, len(tasks)))
-
-    def _run_one(profile: str, mod_name: str) -> str:
+    if max_workers:
+        workers = max_workers
+    else:
+        plan = auto_build_workers(
+            len(tasks),
+            memory_per_task_mb=[getattr(mods_by_name[(key, mod)], "memory_mb", None)
+                                for key, _, mod in tasks if mod is not None],
+            total_cost_s=sum(cost.get((key, mod), 0.0) for key, _, mod in tasks if mod is not None),
+            critical_path_s=max((w for w in weights.values() if w != float("inf")), default=0.0),
+        )
+        workers = plan.workers
+        _batch_log(f"== Paralelismo automático: {plan.describe()} ==")
+
+    # ``Module.weight`` ocupa varias plazas de las ``workers`` disponibles:
+    # dos módulos pesados (peso > workers / 2) nunca coinciden.
+    def _slots(project_key: str, mod_name: str | None) -> float:
+        if mod_name is None:
+            return 1.0
+        weight = getattr(mods_by_name[(project_key, mod_name)], "weight", None)
+        return min(float(workers), max(0.0, float(weight if weight is not None else 1.0)))
+
+    # presupuesto de CPU compartido: cada tarea reserva ``Module.maven_threads``
+    # plazas y Maven las recibe como ``-T``; los commons reservan las suyas
+    # módulo a módulo dentro de ``build_project_for_profile``
+    budget = cpu_budget(getattr(cfg, "build_cpu_budget", None))
+    _batch_log(f"== Presupuesto de CPU: {budget.total} plazas ==")
+
+    def _threads(project_key: str, mod_name: str | None) -> int:
+        return budget.clamp(getattr(mods_by_name[(project_key, mod_name)], "maven_threads", None))
+
+    # módulos que se bloquean entre perfiles; los compartidos también, para
+    # que otro perfil no reescriba ``target/`` mientras se copian
+    mod_locks = defaultdict(threading.Lock)
+    serial_mods = {key for key, mod in mods_by_name.items() if getattr(mod, "serial_across_profiles", False)}
+    serial_mods.update((key, mod) for key, _, mod in shared)
+
+    slots_in_use = 0.0
+    dependents: dict[tuple[str, str | None], list[str]] = defaultdict(list)
+    for (project_key, mod), needs in deps.items():
+        for dep in needs:
+            dependents[(project_key, dep)].append(mod)
+    by_key = {bp.key: bp for bp in projects}
+
+    def _run_one(project_key: str, profile: str, mod_name: str | None, queued_at: float,
+                 threads: int | None) -> str:
         if cancel_event.is_set():
             return "cancelled"
 
-        if mod_name in serial_mods:
-            with mod_locks[mod_name]:
-                ok = build_project_for_profile(
-                    cfg,
-                    project_key,
-                    profile,
-                    True,
-                    log_cb=_log,
-                    group_key=group_key,
-                    modules_filter={mod_name},
-                    cancel_event=cancel_event,
-                )
+        bp = by_key[project_key]
+        kwargs = dict(
+            log_cb=project_log[project_key],
+            group_key=bp.group_key,
+            modules_filter=set(bp.commons) if mod_name is None else {mod_name},
+            cancel_event=cancel_event,
+            timing_cb=_timing_recorder(bp, time.monotonic() - queued_at),
+            event_cb=_maven_progress(project_key, profile),
+            cpu_slots=threads,
+        )
+        def _build() -> bool:
+            if not build_project_for_profile(cfg, project_key, profile, True, **kwargs):
+                return False
+            for other in shared.get((project_key, profile, mod_name), ()):
+                if cancel_event.is_set():
+                    return False
+                copy_kwargs = dict(kwargs, event_cb=None, cpu_slots=None,
+                                   timing_cb=_timing_recorder(bp, time.monotonic() - queued_at))
+                if not build_project_for_profile(cfg, project_key, other, True, shared_from=profile, **copy_kwargs):
+                    return False
+            return True
+
+        if (project_key, mod_name) in serial_mods:
+            with mod_locks[(project_key, mod_name)]:
+                ok = _build()
         else:
-            ok = build_project_for_profile(
-                cfg,
-                project_key,
-                profile,
-                True,
-                log_cb=_log,
-                group_key=group_key,
-                modules_filter={mod_name},
-                cancel_event=cancel_event,
-            )
+            ok = _build()
 
         if ok:
             return "ok"
 
-        if not cancel_event.is_set():
-            cancel_event.set()
+        if cancel_event.is_set():
+            # interrumpida por la cancelación o por el fallo de otra tarea
+            return "cancelled"
+        cancel_event.set()
         return "error"
 
-    with ThreadPoolExecutor(max_workers=workers) as pool:
-        future_map = {pool.submit(_run_one, prof, mod): (prof, mod) for prof, mod in tasks}
-        for f in as_completed(future_map):
-            prof, mod = future_map[f]
-
-            if cancel_event.is_set() and f.cancelled():
-                continue
-
-            try:
-                result = f.result()
-            except Exception as err:
-                success = False
-                if not cancel_event.is_set():
-                    cancel_event.set()
-                if not error_reported:
-                    _log(f"[{prof}] << ERROR en {mod}: {err}")
-                    _log("<< ERROR: Pipeline detenido por fallas.")
-                    error_reported = True
-                continue
-
-            if result == "ok":
-                pending = profile_pending.get(prof)
-                if pending:
-                    pending.discard(mod)
-                    if not pending:
-                        _log(f"[{prof}] >> Perfil completado.")
-                continue
+    # cola de tareas listas (sin dependencias pendientes), ordenada por peso
+    ready: list[tuple[float, int, float, str, str, str | None]] = []
+    waiting: dict[tuple[str, str, str | None], set[str | None]] = {}
+    for idx, (project_key, prof, mod) in enumerate(tasks):
+        needs = deps.get((project_key, mod))
+        if needs:
+            waiting[(project_key, prof, mod)] = set(needs)
+        else:
+            heapq.heappush(ready, (-weights.get((project_key, mod), 0.0), idx, time.monotonic(),
+                                   project_key, prof, mod))
+    task_index = {task: idx for idx, task in enumerate(tasks)}
+    success = True
+    error_reported = False
 
-            if result == "cancelled":
-                success = False
-                continue
+    def _release_dependents(project_key: str, prof: str, mod: str | None) -> None:
+        # los commons desbloquean las tareas del proyecto en todos los perfiles
+        profiles_to_check = by_key[project_key].profiles if mod is None else [prof]
+        for dependent in dependents.get((project_key, mod), ()):
+            for dep_prof in profiles_to_check:
+                needs = waiting.get((project_key, dep_prof, dependent))
+                if needs is None:
+                    continue
+                needs.discard(mod)
+                if not needs:
+                    del waiting[(project_key, dep_prof, dependent)]
+                    heapq.heappush(
+                        ready,
+                        (-weights.get((project_key, dependent), 0.0),
+                         task_index[(project_key, dep_prof, dependent)],
+                         time.monotonic(), project_key, dep_prof, dependent),
+                    )
 
-            if result == "error":
-                success = False
-                if not error_reported:
-                    _log("<< ERROR: Pipeline detenido por fallas.")
-                    error_reported = True
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running: dict = {}
+        while ready or running:
+            # la primera tarea que quepa, en orden de prioridad (backfilling)
+            skipped: list = []
+            over_budget = False
+            while ready and len(running) < workers and not cancel_event.is_set():
+                item = heapq.heappop(ready)
+                _, _, ready_at, project_key, prof, mod = item
+                if running and slots_in_use + _slots(project_key, mod) > workers:
+                    skipped.append(item)
+                    continue
+                threads = None
+                if mod is not None:
+                    threads = budget.try_acquire(_threads(project_key, mod))
+                    if threads is None:
+                        # otro build del proceso ocupa las plazas de CPU
+                        skipped.append(item)
+                        over_budget = True
+                        continue
+                slots_in_use += _slots(project_key, mod)
+                future = pool.submit(_run_one, project_key, prof, mod, ready_at, threads)
+                running[future] = (project_key, prof, mod, threads)
+            for item in skipped:
+                heapq.heappush(ready, item)
+            if not running:
+                if over_budget and not cancel_event.is_set():
+                    budget.wait_for_release(0.2)
+                    continue
+                break
+            done, _ = wait(running, timeout=0.2 if over_budget else None, return_when=FIRST_COMPLETED)
+            for f in done:
+                project_key, prof, mod, threads = running.pop(f)
+                if threads is not None:
+                    budget.release(threads)
+                slots_in_use = round(slots_in_use - _slots(project_key, mod), 6)
+                bp = by_key[project_key]
+                _log = project_log[project_key]
+                label = ", ".join(bp.commons) if mod is None else mod
+                copies = shared.get((project_key, prof, mod), []) if mod is not None else []
+                progress["done"] += len(bp.commons) if mod is None else 1 + len(copies)
 
-        if cancel_event.is_set():
-            for fut in future_map:
-                fut.cancel()
+                try:
+                    result = f.result()
+                except Exception as err:
+                    success = False
+                    bp.failed = True
+                    _progress(project_key, prof, label, "error")
+                    if not cancel_event.is_set():
+                        cancel_event.set()
+                    if not error_reported:
+                        _log(f"[{prof}] << ERROR en {label}: {err}")
+                        _log("<< ERROR: Pipeline detenido por fallas.")
+                        error_reported = True
+                    continue
+
+                _progress(project_key, prof, label, result)
+                if result == "ok":
+                    bp.pending -= 1
+                    for done_prof in [prof, *copies]:
+                        pending = profile_pending.get((project_key, done_prof)) if mod is not None else None
+                        if pending:
+                            pending.discard(mod)
+                            if not pending:
+                                _log(f"[{done_prof}] >> Perfil completado.")
+                        _release_dependents(project_key, done_prof, mod)
+                    continue
+
+                if result == "cancelled":
+                    success = False
+                    continue
+
+                if result == "error":
+                    success = False
+                    bp.failed = True
+                    if not error_reported:
+                        if mod is None:
+                            _log("<< ERROR: Falló la fase común. Deteniendo el pipeline.")
+                        else:
+                            _log("<< ERROR: Pipeline detenido por fallas.")
+                        error_reported = True
+
+    if waiting or ready:
+        success = False
 
     if cancel_event.is_set() and not error_reported and not success:
-        _log("<< Pipeline cancelado por el usuario.")
+        _batch_log("<< Pipeline cancelado por el usuario.")
 
     result = success and not cancel_event.is_set()
     if result:
         summary = "Pipeline completado."
-    elif cancel_event.is_set():
+    elif cancel_event.is_set() and not any(bp.failed for bp in projects):
         summary = "Pipeline cancelado por el usuario."
     else:
         summary = "Pipeline con errores."
+    if batch:
+        failed = [bp.key for bp in projects if bp.failed]
+        _batch_log(f"== Lote terminado: {summary}" + (f" Fallaron: {', '.join(failed)}." if failed else "") + " ==")
     return _finalize(result, summary)
 
 
@@ -482,6 +1078,14 @@ def deploy_profiles_scheduled(
     hotfix: bool = False,
     cancel_event: Event | None = None,
 ) -> bool:
+    """Despliega ``profiles`` en paralelo, cada uno en su target.
+
+    Hasta ``Config.max_deploy_workers`` perfiles se despliegan a la vez (por
+    defecto, todos). Cada target limita los perfiles simultáneos
+    (``DeployTarget.max_parallel``) y el ancho de banda que comparten sus
+    copias (``DeployTarget.max_mbps``). El primer fallo cancela el resto de
+    deploys en curso y detiene el pipeline.
+    """
     cancel_event = cancel_event or Event()
 
     grp, project = _locate_project(cfg, project_key, group_key)
@@ -501,6 +1105,7 @@ def deploy_profiles_scheduled(
             version=version,
             hotfix=hotfix,
         )
+        history.open_log_writer(history_run_id)
     except Exception:
         history_run_id = None
 
@@ -512,37 +1117,54 @@ def deploy_profiles_scheduled(
             except Exception:
                 pass
 
+    failed = False
+
     def _finalize(result: bool, message: str | None = None) -> bool:
         if history_run_id:
-            status = "success" if result else ("cancelled" if cancel_event.is_set() else "error")
+            if result:
+                status = "success"
+            elif failed or not cancel_event.is_set():
+                status = "error"
+            else:
+                status = "cancelled"
             try:
                 history.finish_run(history_run_id, status, message)
             except Exception:
                 pass
         return result
 
-    success = True
-    error_reported = False
-
+    # un perfil sin destino detiene el pipeline antes de copiar nada
     for prof in profiles:
-        if cancel_event.is_set():
-            success = False
-            break
-
-        _log(f"== Perfil: {prof} ==")
-
-        target_name = profile_targets.get(prof)
-        if not target_name:
-            success = False
-            if not error_reported:
-                _log(f"[{prof}] << ERROR: No hay destino configurado.")
-                _log("<< ERROR: Pipeline detenido por fallas.")
-                error_reported = True
+        if not profile_targets.get(prof):
+            failed = True
+            _log(f"[{prof}] << ERROR: No hay destino configurado.")
+            _log("<< ERROR: Pipeline detenido por fallas.")
             if not cancel_event.is_set():
                 cancel_event.set()
-            break
-
+            return _finalize(False, "Deploy con errores.")
+
+    # límites por target: perfiles simultáneos y ancho de banda compartido
+    targets = {t.name: t for t in (getattr(grp, "deploy_targets", None) or [])} if grp else {}
+    slots: dict[str, threading.Semaphore] = {}
+    limiters: dict[str, RateLimiter | None] = {}
+    for target_name in dict.fromkeys(profile_targets[prof] for prof in profiles):
+        tgt = targets.get(target_name)
+        max_parallel = getattr(tgt, "max_parallel", 1)
+        if max_parallel:
+            slots[target_name] = threading.Semaphore(max(1, int(max_parallel)))
+        limiters[target_name] = RateLimiter.from_mbps(getattr(tgt, "max_mbps", None))
+
+    def _run_one(prof: str) -> str:
+        target_name = profile_targets[prof]
+        slot = slots.get(target_name)
+        if slot is not None:
+            while not slot.acquire(timeout=0.2):
+                if cancel_event.is_set():
+                    return "cancelled"
         try:
+            if cancel_event.is_set():
+                return "cancelled"
+            _log(f"== Perfil: {prof} ==")
             ok = deploy_version(
                 cfg,
                 project_key,
@@ -553,32 +1175,41 @@ def deploy_profiles_scheduled(
                 group_key=group_key,
                 hotfix=hotfix,
                 cancel_event=cancel_event,
+                rate_limiter=limiters.get(target_name),
             )
-        except Exception as err:
-            success = False
-            if not cancel_event.is_set():
-                cancel_event.set()
-            if not error_reported:
-                _log(f"[{prof}] << ERROR: {err}")
-                _log("<< ERROR: Pipeline detenido por fallas.")
-                error_reported = True
-            continue
-
-        if cancel_event.is_set():
-            success = False
-            break
-
+        finally:
+            if slot is not None:
+                slot.release()
         if ok:
-            _log(f"[{prof}] >> Perfil completado.")
-            continue
+            return "ok"
+        # interrumpido por la cancelación o por el fallo de otro perfil
+        return "cancelled" if cancel_event.is_set() else "error"
 
-        success = False
-        if not cancel_event.is_set():
-            cancel_event.set()
-        if not error_reported:
-            _log("<< ERROR: Pipeline detenido por fallas.")
-            error_reported = True
-        break
+    success = True
+    error_reported = False
+    workers = max(1, min(getattr(cfg, "max_deploy_workers", None) or len(profiles), len(profiles) or 1))
+    if len(profiles) > 1:
+        _log(f"== Deploy de {len(profiles)} perfiles con {workers} en paralelo ==")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deploy") as pool:
+        futures = {pool.submit(_run_one, prof): prof for prof in profiles}
+        for future in as_completed(futures):
+            prof = futures[future]
+            try:
+                result = future.result()
+            except Exception as err:
+                result = "error"
+                _log(f"[{prof}] << ERROR: {err}")
+            if result == "ok":
+                _log(f"[{prof}] >> Perfil completado.")
+                continue
+            success = False
+            if result == "error":
+                failed = True
+                if not cancel_event.is_set():
+                    cancel_event.set()
+                if not error_reported:
+                    _log("<< ERROR: Pipeline detenido por fallas.")
+                    error_reported = True
 
     if cancel_event.is_set() and not error_reported and not success:
         _log("<< Pipeline cancelado por el usuario.")
@@ -586,7 +1217,7 @@ def deploy_profiles_scheduled(
     result = success and not cancel_event.is_set()
     if result:
         summary = "Deploy completado."
-    elif cancel_event.is_set():
+    elif cancel_event.is_set() and not failed:
         summary = "Deploy cancelado por el usuario."
     else:
         summary = "Deploy con errores."
@@ -606,19 +1237,16 @@ def build_project(
         group_key=group_key, modules_filter=modules_filter
     )
 
-def deploy_version(
+def _deploy_destination(
     cfg: Config,
     project_key: str,
     profile: str,
     version: str,
     target_name: str,
-    log_cb=print,
-    group_key: str | None=None,
-    hotfix: bool = False,
-    cancel_event: Event | None = None,
-) -> bool:
-    """Copia los artefactos del build al target (normal u hotfix)."""
-    # --- resolver target ---
+    group_key: str | None,
+    hotfix: bool,
+):
+    """Target, carpeta de destino y grupo de un deploy (normal u hotfix)."""
     grp, project = _locate_project(cfg, project_key, group_key)
     if not project:
         raise KeyError(f"Proyecto '{project_key}' no encontrado en la configuración")
@@ -645,6 +1273,42 @@ def deploy_version(
     else:
         # si el template ya acaba con separador, ignorarlo y añadir versión como subcarpeta
         dst = pathlib.Path(template) / version
+    return tgt, dst, group_key
+
+
+_DESTINATION_LOCKS: dict[str, threading.Lock] = {}
+_DESTINATION_LOCKS_GUARD = threading.Lock()
+
+
+def _destination_lock(dst: pathlib.Path) -> threading.Lock:
+    """Lock de los deploys que escriben en ``dst`` (carpeta, manifiesto y staging)."""
+    key = str(pathlib.Path(dst).expanduser().resolve())
+    with _DESTINATION_LOCKS_GUARD:
+        return _DESTINATION_LOCKS.setdefault(key, threading.Lock())
+
+
+def deploy_version(
+    cfg: Config,
+    project_key: str,
+    profile: str,
+    version: str,
+    target_name: str,
+    log_cb=print,
+    group_key: str | None=None,
+    hotfix: bool = False,
+    cancel_event: Event | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> bool:
+    """Copia los artefactos del build al target (normal u hotfix).
+
+    Al terminar, el destino contiene ``.forgebuild-manifest.json`` con el
+    SHA-256 de cada archivo copiado (ver :func:`verify_deploy`).
+    ``rate_limiter`` limita el ancho de banda de la copia y puede
+    compartirse con otros deploys al mismo destino. Dos deploys que resuelven
+    la misma carpeta (p. ej. perfiles de un target cuyo ``path_template``
+    solo usa ``{version}``) no se solapan: el segundo espera al primero.
+    """
+    tgt, dst, group_key = _deploy_destination(cfg, project_key, profile, version, target_name, group_key, hotfix)
 
     # --- origen ---
     src_base = _resolve_output_base(cfg, project_key, profile, group_key)
@@ -653,43 +1317,227 @@ def deploy_version(
     if not src_base.exists():
         raise FileNotFoundError(f"No existe la carpeta de build: {src_base}")
 
-    # --- crear destino y copiar ---
-    dst.mkdir(parents=True, exist_ok=True)
     if cancel_event and cancel_event.is_set():
         log_cb(f"[{profile}] Cancelado por el usuario antes de iniciar el deploy.")
         return False
 
+    lock = _destination_lock(dst)
+    if not lock.acquire(blocking=False):
+        log_cb(f"[{profile}] Esperando a otro deploy en {dst}")
+        while not lock.acquire(timeout=0.2):
+            if cancel_event and cancel_event.is_set():
+                log_cb(f"[{profile}] Cancelado por el usuario antes de iniciar el deploy.")
+                return False
+    try:
+        return _deploy_to(cfg, tgt, dst, src_base, profile, version,
+                          log_cb=log_cb, cancel_event=cancel_event, rate_limiter=rate_limiter)
+    finally:
+        lock.release()
+
+
+def _deploy_to(
+    cfg: Config,
+    tgt,
+    dst: pathlib.Path,
+    src_base: pathlib.Path,
+    profile: str,
+    version: str,
+    *,
+    log_cb=print,
+    cancel_event: Event | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> bool:
+    """Cuerpo de :func:`deploy_version` con el lock de ``dst`` ya tomado."""
     log_cb(f"[{profile}] Deploy -> {dst}")
 
-    copy_artifacts(
-        src_base,
-        ["*"],
-        dst,
-        log_cb=lambda s: log_cb(f"[{profile}] {s}"),
-        cancel_event=cancel_event,
-    )
+    # raíz sin recursión y cada subcarpeta recursiva, en una sola cola de copia
+    items = plan_copy(src_base, ["*"])
+    subdirs = [sub.name for sub in sorted(src_base.iterdir()) if sub.is_dir()]
+    for name in subdirs:
+        items += plan_copy(src_base / name, ["*"], recursive=True, prefix=pathlib.PurePath(name))
+    delta = bool(getattr(tgt, "delta", False))
+    delete_orphans = bool(getattr(tgt, "delete_orphans", False))
+    previous = DeployManifest.load(dst, profile) if delta else None
+    # archivos de otros perfiles que despliegan en la misma carpeta: nunca son huérfanos propios
+    shared = DeployManifest.owned_by_others(dst, profile) if previous is not None else set()
+
+    # --- con staging se copia en una carpeta hermana y se publica al final ---
+    staged = bool(getattr(tgt, "staged", False))
+    root = staging_dir(dst) if staged else dst
+    root.mkdir(parents=True, exist_ok=True)
+    for name in subdirs:
+        (root / name).mkdir(parents=True, exist_ok=True)
+    journal = StagingJournal(root) if staged else None
+    if journal is not None:
+        plan = plan_delta(items, root, journal.load())
+        if plan.skipped:
+            log_cb(f"[{profile}] Reanudando deploy: {len(plan.skipped)} archivos ya preparados en {root}")
+        # Lo que falta por preparar se compara con la versión publicada; el
+        # resto del destino se replica en el staging con hardlinks, sin tocar
+        # lo que el diario ya registra como preparado.
+        live = plan_delta(plan.copy, dst, previous)
+        live_files = seed_stage(
+            root,
+            dst,
+            skip=[*plan.skipped, *(item.rel.as_posix() for item in live.copy)],
+            cancel_event=cancel_event,
+        )
+        if cancel_event and cancel_event.is_set():
+            log_cb(f"[{profile}] Deploy cancelado mientras se preparaba el staging.")
+            log_cb(f"[{profile}] El staging se conserva; el próximo intento continuará desde {root}")
+            return False
+        for rel, entry in live.skipped.items():
+            journal.record(rel, entry)
+        plan.copy = live.copy
+        plan.skipped.update(live.skipped)
+        if previous is not None:
+            planned = {item.rel.as_posix() for item in items}
+            plan.orphans = sorted(rel for rel in previous.files if rel not in planned and rel not in shared)
+            if not delete_orphans:
+                plan.skipped.update((rel, previous.files[rel]) for rel in plan.orphans if rel in live_files)
+    else:
+        plan = plan_delta(items, dst, previous)
+        plan.orphans = [rel for rel in plan.orphans if rel not in shared]
+
+    hashes: dict = {}
+    by_target = {root / item.rel: item for item in plan.copy}
+
+    def _journal(target: pathlib.Path) -> None:
+        item = by_target[target]
+        journal.record(item.rel.as_posix(), ManifestEntry(item.size, item.mtime_ns, hashes[item]))
+
+    stats = CopyStats()
+    try:
+        copy_planned(
+            plan.copy,
+            root,
+            log_cb=lambda s: log_cb(f"[{profile}] {s}"),
+            cancel_event=cancel_event,
+            on_copied=_journal if journal is not None else None,
+            workers=getattr(cfg, "copy_workers", None),
+            stats=stats,
+            hashes=hashes,
+            rate_limiter=rate_limiter,
+        )
+    finally:
+        # también tras un fallo o cancelación: en modo delta lo ya copiado no se repite;
+        # con staging el diario ya registra cada archivo terminado
+        if journal is None:
+            try:
+                manifest_for(plan, hashes, version=version, profile=profile).save(dst)
+            except OSError as err:
+                log_cb(f"[{profile}] ADVERTENCIA: no se pudo guardar el manifiesto del deploy: {err}")
     if cancel_event and cancel_event.is_set():
         log_cb(f"[{profile}] Deploy cancelado durante la copia de artefactos.")
+        if journal is not None:
+            log_cb(f"[{profile}] El staging se conserva; el próximo intento continuará desde {root}")
         return False
-
-    for sub in src_base.iterdir():
-        if cancel_event and cancel_event.is_set():
-            log_cb(f"[{profile}] Deploy cancelado por el usuario.")
-            return False
-        if sub.is_dir():
-            sub_dst = dst / sub.name
-            sub_dst.mkdir(parents=True, exist_ok=True)
-            copy_artifacts(
-                sub,
-                ["*"],
-                sub_dst,
-                log_cb=lambda s: log_cb(f"[{profile}] {s}"),
-                recursive=True,
-                cancel_event=cancel_event,
-            )
-            if cancel_event and cancel_event.is_set():
-                log_cb(f"[{profile}] Deploy cancelado durante la copia de {sub.name}.")
-                return False
+    log_cb(f"[{profile}] Copia: {stats.describe()}")
+
+    removed, removed_bytes = (0, 0)
+    if journal is not None:
+        manifest = manifest_for(plan, hashes, version=version, profile=profile)
+        manifest.save(root)
+        if delete_orphans and previous is not None:
+            removed, removed_bytes = remove_orphans(root, plan.orphans)
+        # se conservan los archivos publicados que no son de este deploy
+        owned = set(previous.files) - shared if previous is not None else set()
+        prune_stage(root, set(manifest.files) | (live_files - owned) | {manifest_name(profile)})
+        journal.remove()
+        publish(root, dst)
+        log_cb(f"[{profile}] Publicado: {root.name} -> {dst}")
+    elif delta and delete_orphans:
+        removed, removed_bytes = remove_orphans(dst, plan.orphans)
+    if delta:
+        mb = 1024 * 1024
+        log_cb(
+            f"[{profile}] Delta: {stats.files} copiados ({stats.bytes / mb:.1f} MB), "
+            f"{len(plan.skipped)} sin cambios ({plan.skipped_bytes / mb:.1f} MB omitidos), "
+            + (f"{removed} huérfanos eliminados ({removed_bytes / mb:.1f} MB)." if delete_orphans
+               else f"{len(plan.orphans)} huérfanos conservados.")
+        )
 
     return True
 
+
+def verify_deploy(
+    cfg: Config,
+    project_key: str,
+    profile: str,
+    version: str,
+    target_name: str,
+    log_cb=print,
+    group_key: str | None = None,
+    hotfix: bool = False,
+    cancel_event: Event | None = None,
+) -> VerifyReport:
+    """Comprueba el destino de un deploy contra su manifiesto.
+
+    Recalcula el SHA-256 de cada archivo con ``Config.copy_workers`` hilos y
+    devuelve un :class:`~buildtool.core.deploy_manifest.VerifyReport` con
+    los archivos distintos, ausentes o no registrados. Solo se usa el
+    manifiesto de ``profile``; los archivos que registran otros perfiles en
+    la misma carpeta no cuentan como no registrados.
+    """
+    _tgt, dst, _group = _deploy_destination(cfg, project_key, profile, version, target_name, group_key, hotfix)
+    manifest = DeployManifest.load(dst, profile)
+    if manifest is None or manifest.profile not in (None, profile):
+        raise FileNotFoundError(f"No hay manifiesto de deploy del perfil '{profile}' en {dst}")
+    log_cb(f"[{profile}] Verificando {len(manifest.files)} archivos en {dst}")
+    started = time.monotonic()
+    report = verify_manifest(
+        dst,
+        manifest,
+        workers=getattr(cfg, "copy_workers", None),
+        cancel_event=cancel_event,
+        foreign=DeployManifest.owned_by_others(dst, profile),
+    )
+    elapsed = time.monotonic() - started
+    for rel in report.mismatched:
+        log_cb(f"[{profile}] DIFERENTE: {rel}")
+    for rel in report.missing:
+        log_cb(f"[{profile}] FALTA: {rel}")
+    for rel in report.unexpected:
+        log_cb(f"[{profile}] No registrado en el manifiesto: {rel}")
+    if report.cancelled:
+        log_cb(f"[{profile}] Verificación cancelada por el usuario.")
+    else:
+        log_cb(
+            f"[{profile}] Verificación {'correcta' if report.ok else 'con diferencias'}: "
+            f"{report.checked} archivos, {report.bytes / (1024 * 1024):.1f} MB en {elapsed:.1f}s "
+            f"({len(report.mismatched)} distintos, {len(report.missing)} ausentes)."
+        )
+    return report
+
+
+def verify_profiles(
+    cfg: Config,
+    project_key: str,
+    profiles: list[str],
+    profile_targets: dict[str, str],
+    version: str,
+    *,
+    log_cb=print,
+    group_key: str | None = None,
+    hotfix: bool = False,
+    cancel_event: Event | None = None,
+) -> bool:
+    """Ejecuta :func:`verify_deploy` para cada perfil; ``True`` si todos coinciden."""
+    ok = True
+    for prof in profiles:
+        if cancel_event and cancel_event.is_set():
+            return False
+        target_name = profile_targets.get(prof)
+        if not target_name:
+            log_cb(f"[{prof}] << ERROR: No hay destino configurado.")
+            ok = False
+            continue
+        try:
+            report = verify_deploy(cfg, project_key, prof, version, target_name, log_cb=log_cb,
+                                   group_key=group_key, hotfix=hotfix, cancel_event=cancel_event)
+        except (FileNotFoundError, KeyError, ValueError) as err:
+            log_cb(f"[{prof}] << ERROR: {err}")
+            ok = False
+            continue
+        ok = ok and report.ok
+    return ok
@@ -9,10 +9,12 @@ from __future__ import annotations
 
 from typing import Any, Callable
 
-from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtCore import Signal, Slot
 
+from .bg import ProgressWorker
 
-class PipelineWorker(QObject):
+
+class PipelineWorker(ProgressWorker):
     """Ejecuta una tarea de ``build`` o ``deploy`` reportando progreso.
 
     Parameters
@@ -25,19 +27,30 @@ class PipelineWorker(QObject):
     log_prefix:
         Prefijo a colocar delante de cada línea de log. Útil cuando se lanzan
         múltiples tareas en paralelo y se quiere distinguir su origen.
+    batch_interval_ms:
+        Si se indica, las líneas se emiten agrupadas por ``progress_batch``
+        cada ``batch_interval_ms`` o al juntar ``batch_max_lines`` líneas.
+    forward_events:
+        Si es ``True`` se pasa ``event_cb`` a ``task`` y cada evento que
+        produzca (p. ej. :class:`~buildtool.core.tasks.BuildProgress`) se
+        reemite por la señal ``event``.
     **task_kwargs:
         Parámetros que se pasarán a ``task`` al momento de la ejecución.
 
     Señales
     -------
     progress(str)
-        Emite cada línea generada por ``task``.
+        Emite cada línea generada por ``task`` (modo sin lotes).
+    progress_batch(list)
+        Emite listas de líneas cuando la emisión por lotes está activa.
+    event(object)
+        Eventos estructurados de ``task`` cuando ``forward_events`` está activo.
     finished(bool)
-        Se emite con ``True`` si ``task`` completó sin errores.
+        Se emite con ``True`` si ``task`` completó sin errores, siempre
+        después del último lote.
     """
 
-    progress = Signal(str)
-    finished = Signal(bool)
+    event = Signal(object)
 
     def __init__(
         self,
@@ -45,9 +58,15 @@ class PipelineWorker(QObject):
         *,
         success_message: str | None = None,
         log_prefix: str | None = None,
+        batch_interval_ms: int | None = None,
+        batch_max_lines: int = 200,
+        forward_events: bool = False,
         **task_kwargs: Any,
     ) -> None:
         super().__init__()
+        self.set_batching(batch_interval_ms, batch_max_lines)
+        if forward_events:
+            task_kwargs["event_cb"] = self.event.emit
         self._task = task
         self._success_message = success_message
         self._log_prefix = f"[{log_prefix}] " if log_prefix else ""
@@ -61,8 +80,9 @@ class PipelineWorker(QObject):
         ok = True
 
         def emit(line: str) -> None:
-            self.progress.emit(f"{self._log_prefix}{line}")
+            self.emit_line(f"{self._log_prefix}{line}")
 
+        self._begin_progress()
         try:
             result = self._task(log_cb=emit, **self._task_kwargs)
             ok = True if result is None else bool(result)
@@ -71,8 +91,9 @@ class PipelineWorker(QObject):
         except Exception as exc:  # pragma: no cover - propagación controlada
             ok = False
             emit(f"<< ERROR: {exc}")
+            self.flush_progress()
 
-        self.finished.emit(ok)
+        self._end_progress(ok)
 
 
 def build_worker(
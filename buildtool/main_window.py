@@ -1,3 +1,4 @@
+import threading
 from typing import Optional
 
 from PySide6.QtCore import Qt
@@ -13,6 +14,9 @@ from PySide6.QtWidgets import (
 )
 
 from buildtool import __version__
+from buildtool.core.bg import run_in_thread
+from buildtool.core.pipeline_history import run_history_maintenance
+from buildtool.core.artifact_store import run_artifact_store_gc
 from buildtool.core.thread_tracker import TRACKER
 from .core.config import load_config, Config
 from .core.session import require_roles
@@ -105,6 +109,35 @@ class MainWindow(QWidget):
         splitter.setStretchFactor(1, 1)
         splitter.setSizes([header_widget.sizeHint().height(), 640])
         self.btnGroups.clicked.connect(self.open_groups)
+        self._start_history_maintenance()
+
+    def _start_history_maintenance(self) -> None:
+        """Aplica la retención del historial y el GC de artefactos al iniciar."""
+
+        self._maintenance_cancel = threading.Event()
+        retention = getattr(self.cfg, "history_retention", None)
+        store_settings = getattr(self.cfg, "artifact_store", None)
+
+        def _maintenance(cancel_event: threading.Event) -> bool:
+            ok = run_history_maintenance(retention, cancel_event=cancel_event)
+            if not cancel_event.is_set():
+                run_artifact_store_gc(store_settings, cancel_event=cancel_event)
+            return ok
+
+        th, worker = run_in_thread(_maintenance, self._maintenance_cancel)
+
+        def _cleanup(_ok: bool) -> None:
+            try:
+                th.quit()
+                th.wait()
+            except Exception:
+                pass
+            worker.deleteLater()
+            th.deleteLater()
+            TRACKER.remove(th)
+
+        worker.finished.connect(_cleanup, Qt.QueuedConnection)
+        th.start()
 
     def reload_config(self):
         self.cfg = load_config()
@@ -166,6 +199,9 @@ class MainWindow(QWidget):
     
     def closeEvent(self, event):
         # apaga todos los hilos ANTES de cerrar la UI
+        cancel = getattr(self, "_maintenance_cancel", None)
+        if cancel is not None:
+            cancel.set()
         try:
             TRACKER.stop_all(timeout_ms=7000)
         except Exception:
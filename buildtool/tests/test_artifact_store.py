@@ -0,0 +1,93 @@
+import os
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from buildtool.core.artifact_store import ArtifactStore
+from buildtool.core.copier import copy_artifacts, copy_planned, plan_copy
+
+
+class ArtifactStoreTests(unittest.TestCase):
+    def test_identical_artifacts_share_one_blob(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            store = ArtifactStore(base / "store", link_mode="hardlink")
+            target = base / "target"
+            target.mkdir()
+            (target / "app.war").write_bytes(b"war-bytes")
+            (target / "app-sources.jar").write_bytes(b"ignored")
+
+            for profile in ("qa", "prod"):
+                copied = copy_artifacts(
+                    target, ["*.war", "*.jar"], base / "out" / profile, log_cb=lambda _m: None, store=store
+                )
+                self.assertEqual(copied, 1)
+
+            qa, prod = (base / "out" / p / "app.war" for p in ("qa", "prod"))
+            self.assertEqual(prod.read_bytes(), b"war-bytes")
+            self.assertEqual(len(list((base / "store" / "objects").glob("*/*"))), 1)
+            self.assertEqual(os.stat(qa).st_ino, os.stat(prod).st_ino)
+            self.assertEqual(store.digest_of(qa), store.put(target / "app.war"))
+            self.assertEqual(
+                store.install(target / "app.war", qa), ("unchanged", store.digest_of(qa))
+            )
+
+    def test_replacing_an_output_does_not_touch_the_shared_blob(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            store = ArtifactStore(base / "store", link_mode="hardlink")
+            (base / "v1.jar").write_bytes(b"v1")
+            (base / "v2.jar").write_bytes(b"v2")
+            store.install(base / "v1.jar", base / "qa" / "app.jar")
+            store.install(base / "v1.jar", base / "prod" / "app.jar")
+
+            store.install(base / "v2.jar", base / "qa" / "app.jar")
+            new_build = base / "target"
+            new_build.mkdir()
+            (new_build / "app.jar").write_bytes(b"v3")
+            copy_artifacts(new_build, ["*.jar"], base / "prod", log_cb=lambda _m: None)
+
+            self.assertEqual((base / "qa" / "app.jar").read_bytes(), b"v2")
+            self.assertEqual((base / "prod" / "app.jar").read_bytes(), b"v3")
+            self.assertEqual(store.blob_path(store.put(base / "v1.jar")).read_bytes(), b"v1")
+
+    def test_gc_removes_blobs_without_references(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            store = ArtifactStore(base / "store", link_mode="copy", gc_grace_hours=0)
+            (base / "a.jar").write_bytes(b"a" * 10)
+            (base / "b.jar").write_bytes(b"b" * 20)
+            store.install(base / "a.jar", base / "qa" / "a.jar")
+            store.install(base / "a.jar", base / "prod" / "a.jar")
+            store.install(base / "b.jar", base / "qa" / "b.jar")
+
+            (base / "qa" / "a.jar").unlink()
+            (base / "qa" / "b.jar").write_bytes(b"edited")
+            report = store.gc()
+
+            self.assertEqual((report.refs_dropped, report.blobs_deleted, report.bytes_freed), (2, 1, 20))
+            self.assertTrue(store.blob_path(store.put(base / "a.jar")).exists())
+            self.assertIsNone(store.digest_of(base / "qa" / "b.jar"))
+
+    def test_copy_hashes_come_from_the_store_and_other_volumes_skip_it(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            store = ArtifactStore(base / "store", link_mode="copy")
+            target = base / "target"
+            target.mkdir()
+            (target / "app.war").write_bytes(b"war-bytes")
+            items = plan_copy(target, ["*.war"])
+            hashes = {}
+
+            with patch("buildtool.core.copier.file_sha256", side_effect=AssertionError("relectura")):
+                copy_planned(items, base / "out", lambda _m: None, store=store, hashes=hashes)
+
+            self.assertEqual(hashes[items[0]], store.digest_of(base / "out" / "app.war"))
+            self.assertTrue(store.can_link(base / "out" / "qa" / "nueva"))
+            if os.path.isdir("/proc") and os.stat("/proc").st_dev != os.stat(tmpdir).st_dev:
+                self.assertFalse(store.can_link(Path("/proc/forgebuild/out")))
+
+
+if __name__ == "__main__":
+    unittest.main()
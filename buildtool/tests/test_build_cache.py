@@ -0,0 +1,109 @@
+import os
+import shutil
+import subprocess
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from buildtool.core.build_cache import BuildCache, source_fingerprint
+
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class SourceFingerprintTests(unittest.TestCase):
+    def test_plain_directory_ignores_target(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            module = Path(tmpdir)
+            (module / "src").mkdir()
+            (module / "src" / "App.java").write_text("class App {}", encoding="utf-8")
+            first = source_fingerprint(module)
+            (module / "target").mkdir()
+            (module / "target" / "app.jar").write_bytes(b"jar")
+            self.assertEqual(source_fingerprint(module), first)
+            (module / "src" / "App.java").write_text("class App { int x; }", encoding="utf-8")
+            self.assertNotEqual(source_fingerprint(module), first)
+
+    @unittest.skipIf(shutil.which("git") is None, "git no disponible")
+    def test_git_module_tracks_commits_and_uncommitted_changes(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            repo = Path(tmpdir)
+            _git(repo, "init", "-q")
+            _git(repo, "config", "user.email", "dev@example.com")
+            _git(repo, "config", "user.name", "dev")
+            for name in ("core", "web"):
+                (repo / name).mkdir()
+                (repo / name / "pom.xml").write_text(f"<project>{name}</project>", encoding="utf-8")
+            _git(repo, "add", ".")
+            _git(repo, "commit", "-q", "-m", "init")
+
+            clean = source_fingerprint(repo / "core")
+            (repo / "web" / "pom.xml").write_text("<project>web2</project>", encoding="utf-8")
+            self.assertEqual(source_fingerprint(repo / "core"), clean)
+
+            (repo / "core" / "pom.xml").write_text("<project>core2</project>", encoding="utf-8")
+            dirty = source_fingerprint(repo / "core")
+            self.assertNotEqual(dirty, clean)
+            (repo / "core" / "pom.xml").write_text("<project>core3</project>", encoding="utf-8")
+            self.assertNotEqual(source_fingerprint(repo / "core"), dirty)
+
+            (repo / "core" / "pom.xml").write_text("<project>core</project>", encoding="utf-8")
+            (repo / "core" / "New.java").write_text("class New {}", encoding="utf-8")
+            self.assertNotEqual(source_fingerprint(repo / "core"), clean)
+
+
+class BuildCacheTests(unittest.TestCase):
+    def test_store_restore_and_evict(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            module = base / "web"
+            target = module / "target"
+            target.mkdir(parents=True)
+            (target / "web.war").write_bytes(b"v1")
+            (target / "classes").mkdir()
+            cache = BuildCache(base / "cache", max_entries_per_module=2)
+
+            key = cache.module_key(module, goals=["clean", "package"], profile="qa")
+            self.assertNotEqual(key, cache.module_key(module, goals=["clean", "package"], profile="prod"))
+            self.assertNotEqual(
+                key, cache.module_key(module, goals=["clean", "package"], profile="qa", upstream={"core": "x"})
+            )
+            self.assertIsNone(cache.restore("proj", "web", key, target))
+            self.assertTrue(cache.store("proj", "web", key, target, profile="qa"))
+
+            (target / "web.war").write_bytes(b"stale")
+            (target / "other.jar").write_bytes(b"stale")
+            restored = cache.restore("proj", "web", key, target)
+            self.assertEqual([path.name for path in restored], ["web.war"])
+            self.assertEqual((target / "web.war").read_bytes(), b"v1")
+            self.assertFalse((target / "other.jar").exists())
+
+            self.assertTrue(cache.store("proj", "web", "k2", target))
+            for age, name in ((30, key), (20, "k2")):
+                manifest = base / "cache" / "proj" / "web" / name / "manifest.json"
+                os.utime(manifest, (manifest.stat().st_mtime - age,) * 2)
+            self.assertTrue(cache.store("proj", "web", "k3", target))
+            entries = sorted(p.name for p in (base / "cache" / "proj" / "web").iterdir())
+            self.assertEqual(entries, ["k2", "k3"])
+
+    def test_key_covers_parent_poms_and_skips_install_goals(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            (base / "pom.xml").write_text("<project><version>1</version></project>", encoding="utf-8")
+            module = base / "web"
+            module.mkdir()
+            (module / "pom.xml").write_text("<project><parent/></project>", encoding="utf-8")
+            cache = BuildCache(base / "cache")
+
+            key = cache.module_key(module, goals=["package"], profile=None)
+            (base / "pom.xml").write_text("<project><version>2</version></project>", encoding="utf-8")
+            self.assertNotEqual(key, cache.module_key(module, goals=["package"], profile=None))
+
+            self.assertTrue(BuildCache.cacheable(["clean", "package"]))
+            self.assertFalse(BuildCache.cacheable(["clean", "install"]))
+            self.assertFalse(BuildCache.cacheable(["deploy:deploy"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from pathlib import Path, PurePath
+from tempfile import TemporaryDirectory
+from threading import Event
+
+import time
+
+from buildtool.core.copier import CopyStats, RateLimiter, copy_artifacts, plan_copy
+
+
+class CopierTests(unittest.TestCase):
+    def test_plan_applies_patterns_and_excludes_in_one_pass(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            src = Path(tmpdir)
+            for rel in ("app.war", "app-sources.jar", "notes.txt", "conf/app.jar", "lib/dep.jar", "conf/x/y.jar"):
+                (src / rel).parent.mkdir(parents=True, exist_ok=True)
+                (src / rel).write_bytes(b"x" * 3)
+
+            flat = plan_copy(src, ["*.war", "*.jar"])
+            self.assertEqual([str(item.rel) for item in flat], ["app.war"])
+            deep = plan_copy(src, ["*.jar"], recursive=True, prefix=PurePath("out"))
+            self.assertEqual(
+                sorted(item.rel.as_posix() for item in deep), ["out/conf/app.jar", "out/conf/x/y.jar"]
+            )
+            self.assertEqual({item.size for item in deep}, {3})
+
+    def test_parallel_copy_reports_stats_and_honours_cancel(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            src = base / "src"
+            (src / "sub").mkdir(parents=True)
+            for i in range(6):
+                (src / "sub" / f"m{i}.jar").write_bytes(bytes([i]) * 1000)
+            logs: list[str] = []
+            stats = CopyStats()
+
+            copied = copy_artifacts(
+                src, ["*.jar"], base / "dst", log_cb=logs.append, recursive=True, workers=3, stats=stats
+            )
+
+            self.assertEqual(copied, 6)
+            self.assertEqual((stats.files, stats.bytes), (6, 6000))
+            self.assertEqual(len(logs), 6)
+            self.assertEqual((base / "dst" / "sub" / "m4.jar").read_bytes(), bytes([4]) * 1000)
+            self.assertIn("6 archivos", stats.describe())
+
+            cancel = Event()
+            cancel.set()
+            self.assertEqual(
+                copy_artifacts(src, ["*.jar"], base / "other", log_cb=logs.append, recursive=True,
+                               cancel_event=cancel, workers=3),
+                0,
+            )
+            self.assertEqual(list((base / "other").rglob("*.jar")), [])
+
+    def test_rate_limiter_spreads_transfers_over_time(self) -> None:
+        limiter = RateLimiter(1000)
+        started = time.monotonic()
+        for _ in range(3):
+            self.assertTrue(limiter.consume(500))
+        self.assertGreaterEqual(time.monotonic() - started, 0.45)
+        cancel = Event()
+        cancel.set()
+        self.assertFalse(limiter.consume(5000, cancel))
+
+
+if __name__ == "__main__":
+    unittest.main()
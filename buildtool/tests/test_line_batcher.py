@@ -0,0 +1,59 @@
+import threading
+import time
+import unittest
+
+from buildtool.core.line_batcher import LineBatcher
+
+
+class LineBatcherTest(unittest.TestCase):
+    def test_emits_on_size_threshold_and_on_close(self) -> None:
+        batches: list[list[str]] = []
+        batcher = LineBatcher(batches.append, interval_ms=60000, max_lines=3)
+        for index in range(7):
+            batcher.push(f"l{index}")
+        self.assertEqual(batches, [["l0", "l1", "l2"], ["l3", "l4", "l5"]])
+
+        batcher.close()
+        self.assertEqual(batches[-1], ["l6"])
+
+    def test_interval_flushes_idle_lines(self) -> None:
+        delivered = threading.Event()
+        batches: list[list[str]] = []
+
+        def _sink(batch: list[str]) -> None:
+            batches.append(batch)
+            delivered.set()
+
+        batcher = LineBatcher(_sink, interval_ms=20, max_lines=1000)
+        batcher.push("solo")
+        self.assertTrue(delivered.wait(2))
+        self.assertEqual(batches, [["solo"]])
+        batcher.close()
+
+    def test_concurrent_producers_keep_every_line(self) -> None:
+        batches: list[list[str]] = []
+        batcher = LineBatcher(batches.append, interval_ms=5, max_lines=50)
+
+        def _produce(tag: str) -> None:
+            for index in range(500):
+                batcher.push(f"{tag}-{index}")
+                if index % 100 == 0:
+                    time.sleep(0.001)
+
+        threads = [threading.Thread(target=_produce, args=(str(n),)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+
+        lines = [line for batch in batches for line in batch]
+        self.assertEqual(len(lines), 2000)
+        self.assertLess(len(batches), 2000)
+        for tag in "0123":
+            own = [line for line in lines if line.startswith(f"{tag}-")]
+            self.assertEqual(own, [f"{tag}-{index}" for index in range(500)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+IMPORT_ERROR = None
+try:
+    from PySide6.QtWidgets import QApplication
+    PYSIDE_AVAILABLE = True
+except ImportError as exc:  # pragma: no cover - entorno sin Qt/GL
+    QApplication = None  # type: ignore
+    IMPORT_ERROR = exc
+    PYSIDE_AVAILABLE = False
+
+if PYSIDE_AVAILABLE:  # pragma: no cover - solo se importa si hay Qt
+    from buildtool.ui.log_console import LogConsole
+else:  # pragma: no cover - evita fallos en entornos sin GL
+    LogConsole = None  # type: ignore
+
+
+@unittest.skipUnless(PYSIDE_AVAILABLE, f"PySide6 no disponible: {IMPORT_ERROR}")
+class LogConsoleTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._app = QApplication.instance() or QApplication([])
+
+    def test_appends_are_coalesced_into_a_bounded_buffer(self) -> None:
+        console = LogConsole(max_lines=100, flush_interval_ms=1000)
+        model = console.model()
+        for index in range(250):
+            console.append(f"linea {index}")
+        self.assertEqual(model.rowCount(), 0)
+
+        console.flush()
+        self.assertEqual(model.rowCount(), 100)
+        self.assertEqual(model.index(0, 0).data(), "linea 150")
+        self.assertEqual(model.index(99, 0).data(), "linea 249")
+        self.assertEqual(model.dropped, 150)
+
+        console.append("a\nb")
+        console.flush()
+        self.assertEqual(console.lines()[-2:], ["a", "b"])
+        self.assertEqual(model.rowCount(), 100)
+
+        console.clear()
+        self.assertEqual(model.rowCount(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
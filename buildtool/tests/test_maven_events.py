@@ -0,0 +1,77 @@
+import itertools
+import unittest
+
+from buildtool.core import maven_events as ev
+
+REACTOR_OUTPUT = """\
+[INFO] Scanning for projects...
+[INFO] ------------------------------------------------------------------------
+[INFO] Reactor Build Order:
+[INFO] --------------------------< com.acme:core >---------------------------
+[INFO] Building core 1.0-SNAPSHOT                                         [1/2]
+[INFO] --------------------------------[ jar ]---------------------------------
+[WARNING] Using platform encoding (Cp1252 actually) to copy filtered resources
+[INFO] Tests run: 3, Failures: 0, Errors: 0, Skipped: 0, Time elapsed: 0.05 s - in com.acme.CoreTest
+[INFO] Tests run: 3, Failures: 0, Errors: 0, Skipped: 1
+[INFO] Building jar: /repo/core/target/core-1.0-SNAPSHOT.jar
+[INFO] --------------------------< com.acme:web >----------------------------
+[INFO] Building web app 1.0-SNAPSHOT                                      [2/2]
+[ERROR] Tests run: 2, Failures: 1, Errors: 0, Skipped: 0
+[ERROR] Failed to execute goal org.apache.maven.plugins:maven-surefire-plugin
+[INFO] Reactor Summary for parent 1.0-SNAPSHOT:
+[INFO]
+[INFO] core ............................................... SUCCESS [  2.345 s]
+[INFO] web app ............................................ FAILURE [01:02 min]
+[INFO] ------------------------------------------------------------------------
+[INFO] BUILD FAILURE
+[INFO] ------------------------------------------------------------------------
+[INFO] Total time:  01:05 min
+"""
+
+
+class MavenOutputParserTest(unittest.TestCase):
+    def test_reactor_build_produces_typed_events_and_summary(self) -> None:
+        ticks = itertools.count(0, 5)
+        parser = ev.MavenOutputParser(clock=lambda: float(next(ticks)))
+        events = []
+        for line in REACTOR_OUTPUT.splitlines():
+            events.extend(parser.feed(line))
+        events.extend(parser.close())
+
+        self.assertEqual(
+            [event for event in events if isinstance(event, ev.ModuleStarted)],
+            [ev.ModuleStarted("core", 1, 2), ev.ModuleStarted("web app", 2, 2)],
+        )
+        self.assertEqual(
+            [event for event in events if isinstance(event, ev.ModuleFinished)],
+            [ev.ModuleFinished("core", "SUCCESS", 5.0), ev.ModuleFinished("web app", "FAILURE", 5.0)],
+        )
+        self.assertEqual(
+            [event for event in events if isinstance(event, ev.ReactorEntry)],
+            [ev.ReactorEntry("core", "SUCCESS", 2.345), ev.ReactorEntry("web app", "FAILURE", 62.0)],
+        )
+        self.assertEqual(
+            [event for event in events if isinstance(event, ev.TestSummary)],
+            [ev.TestSummary(3, 0, 0, 1), ev.TestSummary(2, 1, 0, 0)],
+        )
+        self.assertIn(ev.ArtifactBuilt("/repo/core/target/core-1.0-SNAPSHOT.jar"), events)
+        self.assertEqual(sum(isinstance(event, ev.MavenWarning) for event in events), 1)
+        self.assertEqual(sum(isinstance(event, ev.MavenError) for event in events), 1)
+        self.assertEqual(events[-1], ev.BuildResult(False))
+
+        summary = parser.summary
+        self.assertFalse(summary.success)
+        self.assertEqual(summary.total_s, 65.0)
+        self.assertEqual((summary.tests_run, summary.tests_failed, summary.tests_skipped), (5, 1, 1))
+        self.assertEqual(summary.artifacts, ["/repo/core/target/core-1.0-SNAPSHOT.jar"])
+
+    def test_unfinished_module_is_closed_as_incomplete(self) -> None:
+        parser = ev.MavenOutputParser(clock=lambda: 0.0)
+        self.assertEqual(parser.feed("Downloading from central: https://repo"), ())
+        parser.feed("[INFO] Building core 1.0")
+        (finished,) = parser.close()
+        self.assertEqual((finished.name, finished.status), ("core", "INCOMPLETE"))
+
+
+if __name__ == "__main__":
+    unittest.main()
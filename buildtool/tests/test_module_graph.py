@@ -0,0 +1,98 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from buildtool.core.module_graph import (
+    DependencyCycleError,
+    critical_path_weights,
+    module_dependencies,
+    topological_order,
+)
+
+POM = """<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  {parent}
+  <groupId>com.acme</groupId>
+  <artifactId>{artifact}</artifactId>
+  {modules}
+  <dependencies>{deps}</dependencies>
+</project>
+"""
+
+
+def _write_pom(path: Path, artifact: str, deps=(), modules=(), parent=None) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+    dep_xml = "".join(
+        f"<dependency><groupId>${{project.groupId}}</groupId><artifactId>{d}</artifactId></dependency>"
+        for d in deps
+    )
+    module_xml = "<modules>" + "".join(f"<module>{m}</module>" for m in modules) + "</modules>" if modules else ""
+    parent_xml = (
+        f"<parent><groupId>com.acme</groupId><artifactId>{parent}</artifactId></parent>" if parent else ""
+    )
+    (path / "pom.xml").write_text(
+        POM.format(artifact=artifact, deps=dep_xml, modules=module_xml, parent=parent_xml), encoding="utf-8"
+    )
+
+
+def _module(name: str, path: str | None = None, depends_on=()):
+    return SimpleNamespace(name=name, path=path or name, depends_on=list(depends_on))
+
+
+class ModuleGraphTests(unittest.TestCase):
+    def test_dependencies_from_declared_and_pom(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            repo = Path(tmpdir)
+            _write_pom(repo / "parent", "acme-parent")
+            _write_pom(repo / "core", "core", parent="acme-parent")
+            _write_pom(repo / "services", "services", modules=["api", "impl"])
+            _write_pom(repo / "services" / "api", "services-api", deps=["core", "junit"])
+            _write_pom(repo / "services" / "impl", "services-impl", deps=["services-api"])
+            _write_pom(repo / "web", "web", deps=["services-impl"])
+            project = SimpleNamespace(
+                module_deps_from_pom=True,
+                modules=[
+                    _module("parent"),
+                    _module("core"),
+                    _module("services"),
+                    _module("web"),
+                    _module("docs", depends_on=["web", "missing"]),
+                ],
+            )
+
+            deps = module_dependencies(project, repo)
+            self.assertEqual(
+                deps,
+                {"core": {"parent"}, "services": {"core"}, "web": {"services"}, "docs": {"web"}},
+            )
+            self.assertEqual(
+                module_dependencies(project, repo, ["core", "web", "docs"]),
+                {"docs": {"web"}},
+            )
+            project.module_deps_from_pom = False
+            self.assertEqual(module_dependencies(project, repo), {"docs": {"web"}})
+
+    def test_topological_order_is_stable_and_detects_cycles(self) -> None:
+        deps = {"web": {"api"}, "api": {"core"}}
+        self.assertEqual(
+            topological_order(["web", "report", "api", "core"], deps),
+            ["report", "core", "api", "web"],
+        )
+        with self.assertRaises(DependencyCycleError) as ctx:
+            topological_order(["a", "b", "c"], {"a": {"b"}, "b": {"c"}, "c": {"a"}})
+        self.assertEqual(ctx.exception.cycle, ["a", "b", "c", "a"])
+
+    def test_critical_path_weights_accumulate_downstream_cost(self) -> None:
+        deps = {"api": {"core"}, "web": {"api"}, "batch": {"core"}}
+        weights = critical_path_weights(
+            ["core", "api", "web", "batch", "report"], deps, {"core": 10, "api": 20, "web": 5, "batch": 1}
+        )
+        self.assertEqual(weights["web"], 5)
+        self.assertEqual(weights["api"], 25)
+        self.assertEqual(weights["core"], 35)
+        self.assertEqual(weights["report"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
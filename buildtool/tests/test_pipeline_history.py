@@ -1,10 +1,22 @@
+import csv
+import gzip
+import json
 import os
 import sqlite3
 import tempfile
+import threading
 import unittest
+from datetime import datetime, timedelta
 from pathlib import Path
+from unittest.mock import patch
 
-from buildtool.core.pipeline_history import PipelineHistory
+from buildtool.core import pipeline_history
+from buildtool.core.config import HistoryRetention
+from buildtool.core.pipeline_history import (
+    PipelineHistory,
+    RetentionPolicy,
+    run_history_maintenance,
+)
 
 
 class PipelineHistoryTest(unittest.TestCase):
@@ -45,7 +57,7 @@ class PipelineHistoryTest(unittest.TestCase):
         self.assertIsNone(rec.unit_tests_status)
         self.assertIsNone(rec.qa_status)
 
-        logs = self.history.get_logs(run_id)
+        logs = list(self.history.get_logs(run_id))
         self.assertEqual(len(logs), 1)
         self.assertEqual(logs[0][1], "Iniciando")
 
@@ -56,6 +68,569 @@ class PipelineHistoryTest(unittest.TestCase):
         self.history.clear()
         self.assertEqual(self.history.list_runs(), [])
 
+    def test_log_writer_batches_until_finish(self) -> None:
+        run_id = self.history.start_run(
+            "build",
+            user="tester",
+            group_key="grp",
+            project_key="proj",
+            profiles=["dev"],
+            modules=["core"],
+        )
+        self.history.open_log_writer(run_id, batch_size=5000, flush_interval_ms=60_000)
+
+        def _emit(prefix: str) -> None:
+            for idx in range(250):
+                self.history.log_message(run_id, f"{prefix}-{idx}")
+
+        threads = [threading.Thread(target=_emit, args=(f"t{n}",)) for n in range(4)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+
+        self.assertEqual(list(self.history.get_logs(run_id)), [])
+
+        self.history.finish_run(run_id, "success")
+
+        logs = list(self.history.get_logs(run_id))
+        self.assertEqual(len(logs), 1000)
+        self.assertIn("t3-249", {message for _, message in logs})
+        with sqlite3.connect(self.db_path) as cx:
+            mode = cx.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode.lower(), "wal")
+
+        # Tras finish_run el escritor se cierra y log_message vuelve a insertar directo.
+        self.history.log_message(run_id, "tardío")
+        self.assertEqual(len(list(self.history.get_logs(run_id))), 1001)
+
+    def test_log_writer_flushes_on_batch_size(self) -> None:
+        run_id = self.history.start_run(
+            "deploy",
+            user=None,
+            group_key=None,
+            project_key=None,
+            profiles=[],
+            modules=[],
+        )
+        self.history.open_log_writer(run_id, batch_size=3, flush_interval_ms=60_000)
+        for idx in range(4):
+            self.history.log_message(run_id, f"linea {idx}")
+        self.assertEqual(len(list(self.history.get_logs(run_id))), 3)
+        self.history.close_log_writer(run_id)
+        self.assertEqual(len(list(self.history.get_logs(run_id))), 4)
+
+    def test_log_message_falls_back_when_writer_closes_concurrently(self) -> None:
+        run_id = self.history.start_run(
+            "deploy",
+            user=None,
+            group_key=None,
+            project_key=None,
+            profiles=[],
+            modules=[],
+        )
+        writer = self.history.open_log_writer(run_id, batch_size=100, flush_interval_ms=60_000)
+        self.history.log_message(run_id, "antes")
+        # el escritor sigue registrado pero otro hilo ya lo cerró
+        writer.close()
+        self.history.log_message(run_id, "después")
+        self.assertEqual([m for _, m in self.history.get_logs(run_id)], ["antes", "después"])
+
+    def test_logs_are_packed_into_compressed_blocks(self) -> None:
+        run_id = self.history.start_run(
+            "build",
+            user="tester",
+            group_key="grp",
+            project_key="proj",
+            profiles=["dev"],
+            modules=["core"],
+        )
+        self.history.open_log_writer(run_id, batch_size=100, flush_interval_ms=60_000)
+        for idx in range(600):
+            self.history.log_message(run_id, f"[INFO] Building module {idx}")
+        self.history.finish_run(run_id, "success")
+
+        with sqlite3.connect(self.db_path) as cx:
+            blocks = cx.execute(
+                "SELECT block_no, line_count FROM pipeline_log_blocks WHERE run_id = ? ORDER BY block_no",
+                (run_id,),
+            ).fetchall()
+            loose = cx.execute("SELECT COUNT(*) FROM pipeline_logs").fetchone()[0]
+        self.assertEqual([count for _, count in blocks], [256, 256, 88])
+        self.assertEqual(loose, 0)
+
+        messages = [message for _, message in self.history.get_logs(run_id)]
+        self.assertEqual(messages[0], "[INFO] Building module 0")
+        self.assertEqual(messages[-1], "[INFO] Building module 599")
+        self.assertEqual(len(messages), 600)
+
+    def test_lines_logged_before_the_writer_keep_their_order(self) -> None:
+        run_id = self.history.start_run(
+            "build",
+            user="tester",
+            group_key="grp",
+            project_key="proj",
+            profiles=["dev"],
+            modules=["core"],
+        )
+        self.history.log_message(run_id, "previa 1")
+        self.history.log_message(run_id, "previa 2")
+        self.history.open_log_writer(run_id, batch_size=100, flush_interval_ms=60_000)
+        for idx in range(300):
+            self.history.log_message(run_id, f"linea {idx}")
+        self.history.finish_run(run_id, "success")
+        self.history.log_message(run_id, "tardía")
+
+        messages = [message for _, message in self.history.get_logs(run_id)]
+        self.assertEqual(messages[:3], ["previa 1", "previa 2", "linea 0"])
+        self.assertEqual(messages[-2:], ["linea 299", "tardía"])
+        self.assertEqual(len(messages), 303)
+
+    def test_legacy_rows_migrate_and_stay_readable_read_only(self) -> None:
+        legacy_db = Path(self.tmp.name) / "legacy_logs.sqlite3"
+        with sqlite3.connect(legacy_db) as cx:
+            cx.executescript(
+                """
+                CREATE TABLE pipeline_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    pipeline TEXT NOT NULL,
+                    user TEXT,
+                    group_key TEXT,
+                    project_key TEXT,
+                    profiles TEXT,
+                    modules TEXT,
+                    version TEXT,
+                    hotfix INTEGER,
+                    started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    finished_at DATETIME,
+                    status TEXT,
+                    message TEXT
+                );
+                CREATE TABLE pipeline_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id INTEGER NOT NULL REFERENCES pipeline_runs(id) ON DELETE CASCADE,
+                    ts DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    message TEXT NOT NULL
+                );
+                INSERT INTO pipeline_runs(id, pipeline, profiles, modules, started_at, finished_at, status)
+                VALUES (1, 'build', '[]', '[]', '2024-01-01T10:00:00', '2024-01-01T10:05:00', 'success');
+                INSERT INTO pipeline_logs(run_id, ts, message) VALUES
+                    (1, '2024-01-01 10:00:00', 'uno'),
+                    (1, '2024-01-01 10:00:03', 'dos'),
+                    (1, '2024-01-01 10:04:59', 'tres');
+                """
+            )
+
+        expected = [
+            ("2024-01-01 10:00:00", "uno"),
+            ("2024-01-01 10:00:03", "dos"),
+            ("2024-01-01 10:04:59", "tres"),
+        ]
+        readonly = PipelineHistory(legacy_db, read_only=True)
+        self.assertEqual(list(readonly.get_logs(1)), expected)
+        self.assertEqual(readonly.list_runs()[0].card_id, None)
+
+        history = PipelineHistory(legacy_db)
+        self.assertEqual(history.compact_logs(), 1)
+        self.assertEqual(list(history.get_logs(1)), expected)
+        with sqlite3.connect(legacy_db) as cx:
+            self.assertEqual(cx.execute("SELECT COUNT(*) FROM pipeline_logs").fetchone()[0], 0)
+
+    def test_list_runs_pages_by_cursor_and_filters_in_sql(self) -> None:
+        base = datetime(2024, 5, 1, 8, 0, 0)
+        for idx in range(25):
+            run_id = self.history.start_run(
+                "build",
+                user="tester",
+                group_key="grp",
+                project_key="proj",
+                profiles=["dev"],
+                modules=["core"],
+                card_id=100 + (idx % 2),
+                unit_tests_status="done" if idx % 3 == 0 else "pending",
+                # Varias ejecuciones comparten el mismo instante para probar el desempate por id.
+                started_at=base + timedelta(minutes=idx // 2),
+            )
+            self.history.finish_run(run_id, "success" if idx % 5 else "error", f"run {idx}")
+
+        seen: list[int] = []
+        after = None
+        while True:
+            page = self.history.list_runs(after=after, limit=7)
+            seen.extend(rec.id for rec in page)
+            if len(page) < 7:
+                break
+            after = page[-1].cursor
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+        done = self.history.list_runs(unit_tests_status="DONE", limit=100)
+        self.assertEqual(len(done), 9)
+        self.assertTrue(all(rec.unit_tests_status == "done" for rec in done))
+        self.assertEqual(len(self.history.list_runs(card="101", limit=100)), 12)
+        self.assertEqual([rec.message for rec in self.history.list_runs(card="RUN 24")], ["run 24"])
+        self.assertEqual(len(self.history.list_runs(status="error", limit=100)), 5)
+
+    def test_search_logs_indexes_lines_incrementally(self) -> None:
+        def _run(project: str, lines: list[str], *, buffered: bool) -> int:
+            run_id = self.history.start_run(
+                "build",
+                user="tester",
+                group_key="grp",
+                project_key=project,
+                profiles=["dev"],
+                modules=["core"],
+            )
+            if buffered:
+                self.history.open_log_writer(run_id, batch_size=2, flush_interval_ms=60_000)
+            for line in lines:
+                self.history.log_message(run_id, line)
+            self.history.finish_run(run_id, "error")
+            return run_id
+
+        first = _run(
+            "alpha",
+            ["[INFO] Compiling", "java.lang.NullPointerException: boom", "[INFO] done"],
+            buffered=True,
+        )
+        second = _run("beta", ["Copiado: core-1.0.jar", "java.lang.NullPointerException"], buffered=False)
+
+        matches = self.history.search_logs("java.lang.NullPointerException")
+        self.assertEqual([m.run_id for m in matches], [second, first])
+        self.assertEqual(matches[1].line_no, 1)
+        self.assertIn("[", matches[1].snippet)
+
+        scoped = self.history.search_logs("NullPointer*", {"project_key": "alpha"})
+        self.assertEqual([(m.run_id, m.message) for m in scoped], [(first, "java.lang.NullPointerException: boom")])
+
+        # Comillas sueltas o puntos no deben romper la sintaxis de FTS5.
+        self.assertEqual(len(self.history.search_logs('core-1.0.jar "')), 1)
+        self.assertEqual(self.history.search_logs("   "), [])
+        self.assertTrue(self.history.search_enabled)
+
+        with sqlite3.connect(self.db_path) as cx:
+            # el índice no guarda el texto de las líneas
+            self.assertEqual(cx.execute("SELECT message FROM pipeline_log_search").fetchall()[0], (None,))
+            cx.execute("INSERT INTO pipeline_log_search(pipeline_log_search) VALUES('delete-all')")
+        self.assertEqual(self.history.search_logs("Compiling"), [])
+        self.assertEqual(self.history.rebuild_search_index(), 5)
+        self.assertEqual([m.run_id for m in self.history.search_logs("Compiling")], [first])
+
+    def test_legacy_search_index_with_text_is_replaced(self) -> None:
+        run_id = self.history.start_run(
+            "build",
+            user="tester",
+            group_key="grp",
+            project_key="proj",
+            profiles=["dev"],
+            modules=["core"],
+        )
+        self.history.log_message(run_id, "BUILD FAILURE en módulo core")
+        self.history.finish_run(run_id, "error")
+        with sqlite3.connect(self.db_path) as cx:
+            cx.execute("DROP TABLE IF EXISTS pipeline_log_search")
+            cx.execute(
+                "CREATE VIRTUAL TABLE pipeline_log_search USING fts5(message, ts UNINDEXED, tokenize = 'unicode61')"
+            )
+            cx.execute(
+                "INSERT INTO pipeline_log_search(rowid, message, ts) VALUES(?, ?, NULL)",
+                (run_id << 32, "BUILD FAILURE en módulo core"),
+            )
+
+        for contentless_delete in (False, True):
+            if contentless_delete and sqlite3.sqlite_version_info < (3, 43, 0):
+                break
+            with patch.object(pipeline_history, "_CONTENTLESS_DELETE", contentless_delete):
+                history = PipelineHistory(self.db_path)
+            with sqlite3.connect(self.db_path) as cx:
+                row = cx.execute("SELECT sql FROM sqlite_master WHERE name = 'pipeline_log_search'").fetchone()
+            # sin contentless_delete el índice anterior se conserva en lugar de perderlo
+            self.assertIn("contentless_delete" if contentless_delete else "ts UNINDEXED", row[0])
+            self.assertTrue(history.search_enabled)
+            with patch.object(history, "_scan_logs", side_effect=AssertionError("recorrido completo")):
+                [match] = history.search_logs("modulo FAIL*")
+            self.assertEqual((match.run_id, match.line_no), (run_id, 0))
+            self.assertEqual(match.snippet, "BUILD [FAILURE] en [módulo] core")
+
+    def test_search_index_without_contentless_delete_deletes_with_original_text(self) -> None:
+        with patch.object(pipeline_history, "_CONTENTLESS_DELETE", False):
+            history = PipelineHistory(Path(self.tmp.name) / "compat.sqlite3")
+        runs = []
+        for index in range(3):
+            run_id = history.start_run(
+                "build", user="tester", group_key="grp", project_key="proj",
+                profiles=["dev"], modules=["core"], version=None, hotfix=None,
+            )
+            writer = history.open_log_writer(run_id)
+            writer.write(f"BUILD FAILURE en ejecución {index}")
+            writer.write("[INFO] done")
+            history.finish_run(run_id, "success")
+            runs.append(run_id)
+        self.assertTrue(history.search_enabled)
+
+        report = history.apply_retention(
+            RetentionPolicy(max_age_days=None, failed_max_age_days=None, max_runs_per_pipeline=1, pause_ms=0)
+        )
+        self.assertEqual(report.runs_deleted, 2)
+        with patch.object(history, "_scan_logs", side_effect=AssertionError("recorrido completo")):
+            self.assertEqual([m.run_id for m in history.search_logs("FAILURE")], [runs[-1]])
+            self.assertEqual([m.run_id for m in history.search_logs("done")], [runs[-1]])
+        with sqlite3.connect(history.db_path) as cx:
+            cx.execute("INSERT INTO pipeline_log_search(pipeline_log_search, rank) VALUES('integrity-check', 0)")
+        self.assertEqual(history.rebuild_search_index(), 2)
+        history.clear()
+        self.assertEqual(history.search_logs("done"), [])
+
+    def test_retention_prunes_by_age_count_and_keeps_failed_longer(self) -> None:
+        now = datetime(2026, 6, 1, 12, 0, 0)
+
+        def _run(days_ago: int, status: str, pipeline: str = "build") -> int:
+            run_id = self.history.start_run(
+                pipeline,
+                user="tester",
+                group_key="grp",
+                project_key="proj",
+                profiles=["dev"],
+                modules=["core"],
+                version=None,
+                hotfix=None,
+            )
+            self.history.log_message(run_id, f"linea {status}")
+            self.history.finish_run(run_id, status, status)
+            started = (now - timedelta(days=days_ago)).isoformat(timespec="seconds")
+            with sqlite3.connect(self.db_path) as cx:
+                cx.execute("UPDATE pipeline_runs SET started_at = ? WHERE id = ?", (started, run_id))
+            return run_id
+
+        old_ok = _run(200, "success")
+        old_failed = _run(200, "error")
+        ancient_failed = _run(400, "error")
+        recent = [_run(days, "success") for days in (5, 4, 3, 2, 1)]
+        running = self.history.start_run(
+            "build", user="tester", group_key="grp", project_key="proj",
+            profiles=["dev"], modules=["core"], version=None, hotfix=None,
+        )
+
+        policy = RetentionPolicy(
+            max_age_days=180,
+            failed_max_age_days=365,
+            max_runs_per_pipeline=3,
+            batch_size=2,
+            pause_ms=0,
+        )
+        report = self.history.apply_retention(policy, now=now)
+
+        remaining = {run.id for run in self.history.list_runs(limit=50)}
+        self.assertEqual(report.runs_deleted, 4)
+        self.assertNotIn(old_ok, remaining)
+        self.assertNotIn(ancient_failed, remaining)
+        self.assertIn(old_failed, remaining)
+        self.assertIn(running, remaining)
+        self.assertEqual(remaining & set(recent), set(recent[-3:]))
+        self.assertEqual(list(self.history.get_logs(recent[0])), [])
+        with sqlite3.connect(self.db_path) as cx:
+            self.assertEqual(cx.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+            self.assertEqual(cx.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+    def test_retention_by_size_drops_successful_runs_first(self) -> None:
+        failed = None
+        empty_bytes = self.history._used_bytes()
+        for index in range(6):
+            run_id = self.history.start_run(
+                "build", user="tester", group_key="grp", project_key="proj",
+                profiles=["dev"], modules=["core"], version=None, hotfix=None,
+            )
+            writer = self.history.open_log_writer(run_id)
+            for line in range(400):
+                writer.write(f"{index}-{line}-" + os.urandom(48).hex())
+            status = "error" if index == 0 else "success"
+            self.history.finish_run(run_id, status, status)
+            if index == 0:
+                failed = run_id
+
+        full_bytes = self.history._used_bytes()
+        policy = RetentionPolicy(
+            max_age_days=None,
+            failed_max_age_days=None,
+            max_db_mb=(empty_bytes + (full_bytes - empty_bytes) / 2) / (1024 * 1024),
+            batch_size=1,
+            pause_ms=0,
+        )
+        report = self.history.apply_retention(policy)
+
+        remaining = {run.id for run in self.history.list_runs(limit=50)}
+        self.assertGreater(report.runs_deleted, 0)
+        self.assertLess(report.bytes_after, report.bytes_before)
+        self.assertIn(failed, remaining)
+
+    def test_maintenance_is_opt_in_and_never_runs_a_full_vacuum(self) -> None:
+        legacy_db = Path(self.tmp.name) / "sin_auto_vacuum.sqlite3"
+        with sqlite3.connect(legacy_db) as cx:
+            cx.execute("CREATE TABLE previa(x INTEGER)")
+        history = PipelineHistory(legacy_db)
+        old = datetime.utcnow() - timedelta(days=400)
+        for index in range(3):
+            run_id = history.start_run(
+                "build", user="tester", group_key="grp", project_key="proj",
+                profiles=["dev"], modules=["core"], started_at=old,
+            )
+            with sqlite3.connect(legacy_db) as cx:
+                cx.executemany(
+                    "INSERT INTO pipeline_logs(run_id, ts, message) VALUES(?, ?, ?)",
+                    [(run_id, "2025-01-01 10:00:00", f"{index}-{line}") for line in range(40)],
+                )
+                cx.execute(
+                    "UPDATE pipeline_runs SET status = 'success', finished_at = ? WHERE id = ?",
+                    (old.isoformat(timespec="seconds"), run_id),
+                )
+
+        self.assertIsNone(RetentionPolicy.from_settings(None))
+        self.assertIsNone(RetentionPolicy.from_settings(HistoryRetention()))
+        self.assertTrue(run_history_maintenance(HistoryRetention(), db_path=legacy_db, log_cb=lambda _m: None))
+        self.assertEqual(len(history.list_runs()), 3)
+
+        logs: list[str] = []
+        with patch("buildtool.core.pipeline_history.COMPACT_COMMIT_LINES", 16):
+            ok = run_history_maintenance(
+                HistoryRetention(enabled=True, batch_size=1, pause_ms=0),
+                db_path=legacy_db,
+                log_cb=logs.append,
+            )
+        self.assertTrue(ok)
+        self.assertEqual(history.list_runs(), [])
+        self.assertIn("--vacuum", logs[-1])
+        with sqlite3.connect(legacy_db) as cx:
+            self.assertEqual(cx.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+        self.assertTrue(history.enable_incremental_vacuum())
+        self.assertFalse(history.enable_incremental_vacuum())
+
+    def test_history_maintenance_reports_database_errors_and_cancellation(self) -> None:
+        settings = HistoryRetention(enabled=True, batch_size=1, pause_ms=0)
+        logs: list[str] = []
+        with patch.object(PipelineHistory, "apply_retention", side_effect=sqlite3.OperationalError("database is locked")):
+            ok = run_history_maintenance(settings, db_path=self.db_path, log_cb=logs.append)
+        self.assertFalse(ok)
+        self.assertIn("database is locked", logs[-1])
+
+        cancel = threading.Event()
+        cancel.set()
+        self.assertFalse(
+            run_history_maintenance(settings, db_path=self.db_path, log_cb=logs.append, cancel_event=cancel)
+        )
+        self.assertTrue(run_history_maintenance(settings, db_path=self.db_path, log_cb=logs.append))
+
+    def test_compaction_commits_in_bounded_chunks_and_keeps_order(self) -> None:
+        run_ids = []
+        for index in range(3):
+            run_id = self.history.start_run(
+                "build", user="tester", group_key="grp", project_key="proj",
+                profiles=["dev"], modules=["core"],
+            )
+            with sqlite3.connect(self.db_path) as cx:
+                cx.executemany(
+                    "INSERT INTO pipeline_logs(run_id, ts, message) VALUES(?, '2025-01-01 10:00:00', ?)",
+                    [(run_id, f"linea {line}") for line in range(50)],
+                )
+                cx.execute("UPDATE pipeline_runs SET finished_at = '2025-01-01T10:01:00' WHERE id = ?", (run_id,))
+            run_ids.append(run_id)
+
+        with patch("buildtool.core.pipeline_history.COMPACT_COMMIT_LINES", 16):
+            self.assertEqual(self.history.compact_logs(limit=2), 2)
+            self.assertEqual(self.history.compact_logs(limit=2), 1)
+            self.assertEqual(self.history.compact_logs(limit=2), 0)
+        with sqlite3.connect(self.db_path) as cx:
+            counts = cx.execute(
+                "SELECT line_count FROM pipeline_log_blocks WHERE run_id = ? ORDER BY block_no", (run_ids[0],)
+            ).fetchall()
+        self.assertEqual([count for (count,) in counts], [16, 16, 16, 2])
+        self.assertEqual(
+            [message for _, message in self.history.get_logs(run_ids[2])],
+            [f"linea {line}" for line in range(50)],
+        )
+
+    def test_exports_stream_every_run_with_duration(self) -> None:
+        for index in range(250):
+            run_id = self.history.start_run(
+                "deploy" if index % 5 == 0 else "build",
+                user="tester",
+                group_key="grp",
+                project_key="proj",
+                profiles=["dev"],
+                modules=["core"],
+                version=None,
+                hotfix=None,
+            )
+            self.history.log_message(run_id, f"log {index}")
+            self.history.finish_run(run_id, "success", "ok")
+        with sqlite3.connect(self.db_path) as cx:
+            cx.execute("UPDATE pipeline_runs SET started_at = '2026-01-01T10:00:00'")
+            cx.execute("UPDATE pipeline_runs SET finished_at = '2026-01-01T10:01:30'")
+
+        runs = self.history.iter_runs(pipeline="build")
+        self.assertEqual(next(runs).pipeline, "build")
+        self.assertEqual(sum(1 for _ in runs), 199)
+
+        csv_path = self.history.export_csv(Path(self.tmp.name) / "all.csv")
+        with csv_path.open(encoding="utf-8", newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        self.assertEqual(len(rows), 250)
+        self.assertEqual(rows[0]["duration_s"], "90")
+
+        full_log = list(self.history.iter_run_logs(pipeline="deploy"))
+        self.assertEqual(len(full_log), 100)
+        self.assertTrue(full_log[0].startswith("== Ejecución #1 · deploy"))
+        self.assertTrue(full_log[1].endswith("log 0"))
+        # varias páginas con el mismo started_at: el keyset desempata por id
+        headers = [line for line in self.history.iter_run_logs() if line.startswith("== ")]
+        self.assertEqual([int(line.split("#")[1].split(" ")[0]) for line in headers], list(range(1, 251)))
+        oldest = self.history.list_runs(limit=2, ascending=True)
+        self.assertEqual([rec.id for rec in oldest], [1, 2])
+        self.assertEqual([rec.id for rec in self.history.list_runs(after=oldest[-1].cursor, limit=2, ascending=True)], [3, 4])
+
+        ndjson_path = self.history.export_ndjson(
+            Path(self.tmp.name) / "deploys.ndjson.gz", include_logs=True, pipeline="deploy"
+        )
+        with gzip.open(ndjson_path, "rt", encoding="utf-8") as fh:
+            items = [json.loads(line) for line in fh]
+        self.assertEqual(len(items), 50)
+        self.assertEqual(items[0]["duration_s"], 90)
+        self.assertEqual(items[0]["profiles"], ["dev"])
+        self.assertEqual(items[0]["logs"][0][1], f"log {items[0]['id'] - 1}")
+
+    def test_module_timing_stats_report_percentiles_per_period(self) -> None:
+        run_id = self.history.start_run(
+            "build", user="tester", group_key="grp", project_key="proj",
+            profiles=["dev"], modules=["core", "api"], version=None, hotfix=None,
+        )
+        for seconds in range(1, 11):
+            self.history.record_module_timing(
+                run_id, module="core", profile="dev", queue_s=0.5,
+                maven_s=float(seconds), copy_s=1.0, exit_code=0,
+                bytes_copied=1024, status="ok",
+            )
+        self.history.record_module_timing(
+            run_id, module="api", profile="dev", maven_s=3.0, exit_code=1, status="error",
+        )
+        self.history.record_module_timing(run_id, module="api", profile="dev", status="cancelled")
+        self.history.finish_run(run_id, "error", "fallo")
+
+        stats = {item.module: item for item in self.history.module_timing_stats(project_key="proj")}
+        self.assertEqual(stats["core"].samples, 10)
+        self.assertAlmostEqual(stats["core"].p50_s, 6.5)
+        self.assertAlmostEqual(stats["core"].p95_s, 10.55)
+        self.assertAlmostEqual(stats["core"].queue_p95_s, 0.5)
+        self.assertEqual((stats["api"].samples, stats["api"].failures), (1, 1))
+        self.assertEqual(self.history.module_timing_stats(project_key="otro"), [])
+
+        by_day = self.history.module_timing_stats(module="core", bucket="day")
+        self.assertEqual(len(by_day), 1)
+        self.assertEqual(by_day[0].period, datetime.utcnow().strftime("%Y-%m-%d"))
+        self.assertEqual(len(self.history.module_timings(run_id)), 12)
+
+        self.history.apply_retention(RetentionPolicy(failed_max_age_days=-1, pause_ms=0))
+        self.assertEqual(self.history.module_timings(run_id), [])
+
     def test_legacy_database_adds_card_columns_and_indexes(self) -> None:
         legacy_db = Path(self.tmp.name) / "legacy.sqlite3"
         with sqlite3.connect(legacy_db) as cx:
@@ -0,0 +1,171 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from buildtool.core import process_runner
+from buildtool.core.process_runner import run_process, run_process_async
+
+_CHILD_AND_SLEEP = (
+    "import subprocess, sys, time\n"
+    "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+    "print('listo', flush=True)\n"
+    "time.sleep(30)\n"
+)
+
+
+class ProcessRunnerTests(unittest.TestCase):
+    def test_streams_lines_and_captures_output(self) -> None:
+        seen: list[str] = []
+        result = run_process(
+            [sys.executable, "-c", "import sys\nfor i in range(50): print(i)\nsys.exit(3)"],
+            on_line=seen.append,
+            capture=True,
+            max_pending_lines=4,
+        )
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(seen, [str(i) for i in range(50)])
+        self.assertEqual(result.output.splitlines(), seen)
+
+    def test_lines_longer_than_the_limit_arrive_in_chunks(self) -> None:
+        seen: list[str] = []
+        with patch.object(process_runner, "_LINE_LIMIT", 64):
+            result = run_process(
+                [sys.executable, "-c", "import sys; print('A' * 200); print('tail'); sys.stdout.write('fin')"],
+                on_line=seen.append,
+            )
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(seen[-2:], ["tail", "fin"])
+        self.assertNotIn("", seen)
+        self.assertEqual("".join(seen[:-2]), "A" * 200)
+
+    def test_cancel_event_stops_a_silent_process_group(self) -> None:
+        cancel = threading.Event()
+        lines: list[str] = []
+
+        def _on_line(line: str) -> None:
+            lines.append(line)
+            threading.Timer(0.1, cancel.set).start()
+
+        started = time.monotonic()
+        result = run_process([sys.executable, "-c", _CHILD_AND_SLEEP], on_line=_on_line, cancel_event=cancel)
+        self.assertTrue(result.cancelled)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertEqual(lines, ["listo"])
+        self.assertLess(time.monotonic() - started, 10)
+
+        result = run_process([sys.executable, "-c", _CHILD_AND_SLEEP], timeout=0.5)
+        self.assertTrue(result.timed_out)
+
+    def test_cancel_and_timeout_still_apply_after_stdout_closes(self) -> None:
+        closes_stdout = (
+            "import os, sys, time\n"
+            "print('listo', flush=True)\n"
+            "os.close(1); os.close(2)\n"
+            "time.sleep(30)\n"
+        )
+        cancel = threading.Event()
+
+        def _on_line(_line: str) -> None:
+            threading.Timer(0.3, cancel.set).start()
+
+        started = time.monotonic()
+        result = run_process([sys.executable, "-c", closes_stdout], on_line=_on_line, cancel_event=cancel)
+        self.assertTrue(result.cancelled)
+        self.assertLess(time.monotonic() - started, 10)
+
+        result = run_process([sys.executable, "-c", closes_stdout], timeout=0.5)
+        self.assertTrue(result.timed_out)
+        self.assertLess(time.monotonic() - started, 20)
+
+    @unittest.skipIf(os.name == "nt", "señales POSIX")
+    def test_ignored_sigterm_escalates_to_kill_across_the_tree(self) -> None:
+        stubborn = (
+            "import signal, subprocess, sys, time\n"
+            "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+            "child = subprocess.Popen([sys.executable, '-c', 'import os, signal, time; os.setsid();"
+            " signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(60)'])\n"
+            "print(child.pid, flush=True)\n"
+            "time.sleep(60)\n"
+        )
+        cancel = threading.Event()
+        pids: list[int] = []
+
+        def _on_line(line: str) -> None:
+            pids.append(int(line))
+            threading.Timer(0.2, cancel.set).start()
+
+        result = run_process([sys.executable, "-c", stubborn], on_line=_on_line, cancel_event=cancel, grace_s=0.5)
+        self.assertTrue(result.cancelled)
+        self.assertTrue(result.killed)
+        self.assertGreaterEqual(result.stop_s, 0.5)
+        self.assertLess(result.stop_s, 5)
+        # el nieto abrió su propia sesión y aun así ya no está en ejecución
+        self.assertFalse(process_runner._alive(pids[0]))
+
+    def test_async_api_runs_commands_concurrently_on_one_loop(self) -> None:
+        async def _main():
+            cmd = [sys.executable, "-c", "import time; time.sleep(0.5); print('ok')"]
+            return await asyncio.gather(*(run_process_async(cmd, capture=True) for _ in range(6)))
+
+        started = time.monotonic()
+        results = asyncio.run(_main())
+        self.assertEqual([r.output for r in results], ["ok\n"] * 6)
+        self.assertLess(time.monotonic() - started, 2.5)
+
+    def test_windows_stop_uses_taskkill_and_waits_for_the_whole_tree(self) -> None:
+        surefire = 4242
+        alive = {surefire}
+        calls: list[tuple[int, bool]] = []
+
+        def _stop(fake_proc, taskkill):
+            loop = asyncio.new_event_loop()
+            try:
+                with patch.object(os, "name", "nt"), patch.object(
+                    process_runner, "_taskkill", side_effect=taskkill
+                ), patch.object(process_runner, "_descendants", return_value=[surefire]), patch.object(
+                    process_runner, "_alive", side_effect=lambda pid: pid in alive
+                ):
+                    return loop.run_until_complete(process_runner._stop_tree(fake_proc, 0.3))
+            finally:
+                loop.close()
+
+        # taskkill sin /F no puede cerrar procesos sin ventana: se fuerza al momento
+        proc = SimpleNamespace(pid=100, returncode=None)
+
+        def _no_console(pid, force=False):
+            calls.append((pid, force))
+            if force:
+                proc.returncode = 1
+                alive.discard(surefire)
+            return force
+
+        stop_s, killed = _stop(proc, _no_console)
+        self.assertTrue(killed)
+        self.assertLess(stop_s, 0.3)
+        self.assertEqual(calls, [(100, False), (100, True)])
+
+        # cmd.exe termina pero la JVM hija sigue viva: también se escala
+        alive.add(surefire)
+        calls.clear()
+        proc = SimpleNamespace(pid=100, returncode=None)
+
+        def _child_survives(pid, force=False):
+            calls.append((pid, force))
+            proc.returncode = 1
+            if force and pid == surefire:
+                alive.discard(surefire)
+            return True
+
+        stop_s, killed = _stop(proc, _child_survives)
+        self.assertTrue(killed)
+        self.assertGreaterEqual(stop_s, 0.3)
+        self.assertEqual(calls, [(100, False), (100, True), (surefire, True)])
+
+
+if __name__ == "__main__":
+    unittest.main()
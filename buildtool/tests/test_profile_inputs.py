@@ -0,0 +1,83 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from buildtool.core.profile_inputs import NO_PROFILE, ProfileInputs, pom_fingerprint
+
+_PARENT = """<project>
+  <groupId>g</groupId><artifactId>parent</artifactId>
+  <profiles>
+    <profile><id>prod</id><properties><env>prod</env></properties></profile>
+  </profiles>
+</project>"""
+
+_CHILD = """<project>
+  <parent><groupId>g</groupId><artifactId>parent</artifactId></parent>
+  <artifactId>{name}</artifactId>
+  {profiles}
+</project>"""
+
+
+class ProfileInputsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "pom.xml").write_text(_PARENT, encoding="utf-8")
+        settings = patch("buildtool.core.profile_inputs._settings_paths", return_value=[])
+        settings.start()
+        self.addCleanup(settings.stop)
+        self.addCleanup(self._tmp.cleanup)
+
+    def _module(self, name: str, profiles: str = "") -> Path:
+        module_dir = self.root / name
+        module_dir.mkdir()
+        (module_dir / "pom.xml").write_text(_CHILD.format(name=name, profiles=profiles), encoding="utf-8")
+        return module_dir
+
+    def test_pom_fingerprint_follows_declared_profiles_in_parent_chain(self) -> None:
+        core = self._module("core")
+        web = self._module("web", "<profiles><profile><id>qa</id></profile></profiles>")
+        self.assertEqual(pom_fingerprint(core, "qa"), NO_PROFILE)
+        self.assertEqual(pom_fingerprint(core, "dev"), NO_PROFILE)
+        self.assertNotEqual(pom_fingerprint(core, "prod"), NO_PROFILE)
+        self.assertNotEqual(pom_fingerprint(web, "qa"), pom_fingerprint(web, "dev"))
+        self.assertEqual(pom_fingerprint(web, None), NO_PROFILE)
+
+    def test_share_groups_include_upstream_modules(self) -> None:
+        modules = {
+            "core": self._module("core"),
+            "web": self._module("web", "<profiles><profile><id>qa</id></profile></profiles>"),
+            "app": self._module("app"),
+            "batch": self._module("batch"),
+        }
+        groups = ProfileInputs("pom").share_groups(
+            modules, ["dev", "qa", "test", "prod"], lambda _name, prof: prof, {"app": ["web"]},
+            per_profile=["batch"],
+        )
+        self.assertEqual(groups["core"], [["dev", "qa", "test"], ["prod"]])
+        self.assertEqual(groups["web"], [["dev", "test"], ["qa"], ["prod"]])
+        self.assertEqual(groups["app"], [["dev", "test"], ["qa"], ["prod"]])
+        self.assertEqual(groups["batch"], [["dev"], ["qa"], ["test"], ["prod"]])
+
+    def test_effective_pom_digest_is_cached_per_sources(self) -> None:
+        core = self._module("core")
+        calls = []
+
+        def _fake_effective_pom(module_dir, profile, log_cb=print):
+            calls.append(profile)
+            return "same"
+
+        db = self.root / "profile_inputs.json"
+        inputs = ProfileInputs("effective-pom", db, effective_pom=_fake_effective_pom)
+        self.assertEqual(inputs.fingerprint(core, "qa"), inputs.fingerprint(core, "prod"))
+        reloaded = ProfileInputs("effective-pom", db, effective_pom=_fake_effective_pom)
+        reloaded.fingerprint(core, "qa")
+        self.assertEqual(calls, ["qa", "prod"])
+        (core / "pom.xml").write_text(_CHILD.format(name="core", profiles="<!-- cambio -->"), encoding="utf-8")
+        reloaded.fingerprint(core, "qa")
+        self.assertEqual(calls, ["qa", "prod", "qa"])
+
+
+if __name__ == "__main__":
+    unittest.main()
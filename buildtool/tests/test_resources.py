@@ -0,0 +1,35 @@
+import unittest
+
+from buildtool.core.resources import DEFAULT_MODULE_MEMORY_MB, CpuBudget, auto_build_workers
+
+
+class AutoBuildWorkersTests(unittest.TestCase):
+    def test_limited_by_cpu_memory_and_task_count(self) -> None:
+        plan = auto_build_workers(10, cpu_count=16, available_mb=100000)
+        self.assertEqual((plan.workers, plan.cpu_limit), (8, 8))
+        self.assertEqual(auto_build_workers(3, cpu_count=16, available_mb=100000).workers, 3)
+        plan = auto_build_workers(
+            10, cpu_count=16, available_mb=6000, memory_per_task_mb=[2000, None, 2000 + DEFAULT_MODULE_MEMORY_MB]
+        )
+        self.assertEqual((plan.workers, plan.memory_limit), (2, 2))
+        self.assertEqual(auto_build_workers(10, cpu_count=1, available_mb=None).workers, 1)
+
+    def test_history_shape_caps_useless_parallelism(self) -> None:
+        plan = auto_build_workers(8, cpu_count=32, available_mb=100000, total_cost_s=100.0, critical_path_s=40.0)
+        self.assertEqual((plan.workers, plan.shape_limit), (3, 3))
+        self.assertIn("histórico 3", plan.describe())
+
+
+class CpuBudgetTests(unittest.TestCase):
+    def test_slots_are_clamped_and_released(self) -> None:
+        budget = CpuBudget(4)
+        self.assertEqual(budget.try_acquire(8), 4)
+        self.assertIsNone(budget.try_acquire(1))
+        budget.release(4)
+        self.assertEqual(budget.try_acquire(None), 1)
+        self.assertEqual(budget.try_acquire(3), 3)
+        self.assertEqual(budget.in_use, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
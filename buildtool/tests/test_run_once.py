@@ -0,0 +1,84 @@
+import json
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from buildtool.core.run_once import RunOnceStore, module_inputs, remove_legacy_lock_dirs
+
+
+class RunOnceStoreTests(unittest.TestCase):
+    def _module(self, base: Path) -> Path:
+        module = base / "commons"
+        (module / "src").mkdir(parents=True)
+        (module / "src" / "Util.java").write_text("class Util {}", encoding="utf-8")
+        (module / "target").mkdir()
+        (module / "target" / "commons.jar").write_bytes(b"jar")
+        return module
+
+    def test_reuse_survives_restart_until_inputs_or_artifacts_change(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            module = self._module(base)
+            db = base / "state" / "run_once.json"
+
+            inputs = module_inputs(module, ["clean", "install"])
+            self.assertIsNone(RunOnceStore(db).lookup("proj", "commons", inputs, module))
+            RunOnceStore(db).record("proj", "commons", inputs, module)
+
+            restarted = RunOnceStore(db)
+            self.assertIsNotNone(restarted.lookup("proj", "commons", module_inputs(module, ["clean", "install"]), module))
+            self.assertIsNone(restarted.lookup("proj", "commons", module_inputs(module, ["package"]), module))
+
+            (module / "src" / "Util.java").write_text("class Util { int x; }", encoding="utf-8")
+            self.assertIsNone(restarted.lookup("proj", "commons", module_inputs(module, ["clean", "install"]), module))
+
+            current = module_inputs(module, ["clean", "install"])
+            restarted.record("proj", "commons", current, module)
+            (module / "target" / "commons.jar").unlink()
+            self.assertIsNone(restarted.lookup("proj", "commons", current, module))
+
+    def test_stale_entries_are_pruned_on_load(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            module = self._module(base)
+            db = base / "run_once.json"
+            store = RunOnceStore(db, max_age_days=30)
+            inputs = module_inputs(module, ["install"])
+            store.record("proj", "commons", inputs, module)
+            store.record("proj", "gone", inputs, base / "missing")
+            store.record("proj", "old", inputs, module)
+
+            data = json.loads(db.read_text(encoding="utf-8"))
+            data["proj::old"]["updated_at"] = time.time() - 31 * 86400
+            db.write_text(json.dumps(data), encoding="utf-8")
+
+            reloaded = RunOnceStore(db, max_age_days=30)
+            self.assertIsNotNone(reloaded.lookup("proj", "commons", inputs, module))
+            self.assertEqual(set(json.loads(db.read_text(encoding="utf-8"))), {"proj::commons"})
+
+    def test_legacy_lock_dirs_of_running_instances_are_kept(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            running = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+            finished = subprocess.Popen([sys.executable, "-c", "pass"])
+            finished.wait()
+            try:
+                for name in (f"forgebuild_runonce_{running.pid}", f"forgebuild_runonce_{finished.pid}", "forgebuild_runonce_x"):
+                    (base / name).mkdir()
+                    (base / name / "commons.lock").write_text("", encoding="utf-8")
+
+                self.assertEqual(remove_legacy_lock_dirs(base), 1)
+            finally:
+                running.kill()
+                running.wait()
+            self.assertEqual(
+                sorted(p.name for p in base.iterdir()),
+                [f"forgebuild_runonce_{running.pid}", "forgebuild_runonce_x"],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
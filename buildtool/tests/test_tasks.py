@@ -1,4 +1,8 @@
+import os
+import shutil
 import sys
+import threading
+import time
 import types
 import unittest
 from pathlib import Path
@@ -16,7 +20,19 @@ if "buildtool.core.branch_store" not in sys.modules:
     branch_store_stub.User = _User
     sys.modules["buildtool.core.branch_store"] = branch_store_stub
 
-from buildtool.core.tasks import build_project_for_profile
+from buildtool.core import maven_events
+from buildtool.core.copier import copy_planned
+from buildtool.core.deploy_staging import StagingNotSupported
+from buildtool.core.pipeline_history import PipelineHistory
+from buildtool.core.tasks import (
+    BuildSelection,
+    build_batch_scheduled,
+    build_project_for_profile,
+    build_project_scheduled,
+    deploy_profiles_scheduled,
+    deploy_version,
+    verify_deploy,
+)
 
 
 class BuildProjectCleaningTests(unittest.TestCase):
@@ -189,5 +205,1023 @@ class BuildProjectCleaningTests(unittest.TestCase):
             self.assertTrue(second_artifact.exists())
 
 
+class BuildProjectTimingTests(unittest.TestCase):
+    def test_timing_cb_reports_maven_copy_and_bytes(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            repo_dir = base_path / "repo"
+            target_dir = repo_dir / "web" / "target"
+            target_dir.mkdir(parents=True)
+            (target_dir / "web.war").write_text("data", encoding="utf-8")
+            output_dir = base_path / "output"
+
+            module = SimpleNamespace(
+                name="web",
+                path="web",
+                goals=["package"],
+                optional=False,
+                profile_override=None,
+                only_if_profile_equals=None,
+                copy_to_profile_war=True,
+                copy_to_profile_ui=False,
+                copy_to_subfolder=None,
+                rename_jar_to=None,
+                select_pattern=None,
+                copy_to_root=False,
+                run_once=False,
+                no_profile=False,
+            )
+            project = SimpleNamespace(key="proj", modules=[module], repo="repo", workspace=None)
+            group = SimpleNamespace(
+                key="grp",
+                projects=[project],
+                repos={"repo": str(repo_dir)},
+                output_base=str(output_dir),
+                profiles=[],
+                deploy_targets=[],
+            )
+            cfg = SimpleNamespace(
+                groups=[group],
+                paths=SimpleNamespace(workspaces={"repo": str(repo_dir)}, output_base=str(output_dir)),
+                default_execution_mode="integrated",
+            )
+
+            timings: list[dict] = []
+
+            def _fake_maven(*_args, event_cb=None, **_kwargs):
+                for event in (maven_events.TestSummary(5, 1, 0, 2), maven_events.MavenWarning("deprecado")):
+                    event_cb(event)
+                return 0
+
+            with patch("buildtool.core.tasks.run_maven", side_effect=_fake_maven):
+                self.assertTrue(
+                    build_project_for_profile(
+                        cfg, "proj", "qa", True, log_cb=lambda _m: None, timing_cb=timings.append
+                    )
+                )
+            with patch("buildtool.core.tasks.run_maven", return_value=3):
+                self.assertFalse(
+                    build_project_for_profile(
+                        cfg, "proj", "qa", True, log_cb=lambda _m: None, timing_cb=timings.append
+                    )
+                )
+
+            ok, failed = timings
+            self.assertEqual((ok["module"], ok["profile"], ok["status"]), ("web", "qa", "ok"))
+            self.assertEqual((ok["exit_code"], ok["bytes_copied"]), (0, 4))
+            self.assertIsNotNone(ok["maven_s"])
+            self.assertIsNotNone(ok["copy_s"])
+            self.assertEqual((ok["tests_run"], ok["tests_failed"], ok["tests_skipped"]), (5, 1, 2))
+            self.assertEqual(ok["warnings"], 1)
+            self.assertEqual((failed["status"], failed["exit_code"]), ("error", 3))
+            self.assertIsNone(failed["copy_s"])
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
+
+
+class BuildProjectScheduledDependencyTests(unittest.TestCase):
+    def _config(self, base_path: Path, modules: list, cpu_budget: int = 8) -> SimpleNamespace:
+        repo_dir = base_path / "repo"
+        repo_dir.mkdir(exist_ok=True)
+        project = SimpleNamespace(key="proj", modules=modules, repo="repo", workspace=None)
+        group = SimpleNamespace(
+            key="grp",
+            projects=[project],
+            repos={"repo": str(repo_dir)},
+            output_base=str(base_path / "output"),
+            profiles=[],
+            deploy_targets=[],
+        )
+        return SimpleNamespace(
+            groups=[group],
+            paths=SimpleNamespace(workspaces={"repo": str(repo_dir)}, output_base=str(base_path / "output")),
+            default_execution_mode="integrated",
+            build_cpu_budget=cpu_budget,
+        )
+
+    @staticmethod
+    def _module(name: str, depends_on=()) -> SimpleNamespace:
+        return SimpleNamespace(
+            name=name,
+            path=name,
+            goals=["package"],
+            optional=False,
+            profile_override=None,
+            only_if_profile_equals=None,
+            copy_to_profile_war=False,
+            copy_to_profile_ui=False,
+            copy_to_subfolder=None,
+            rename_jar_to=None,
+            select_pattern=None,
+            copy_to_root=False,
+            run_once=False,
+            no_profile=False,
+            serial_across_profiles=False,
+            depends_on=list(depends_on),
+        )
+
+    def test_dependents_start_after_inputs_and_independent_modules_do_not_wait(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            cfg = self._config(
+                base_path,
+                [
+                    self._module("web", depends_on=["api"]),
+                    self._module("api", depends_on=["core"]),
+                    self._module("core"),
+                    self._module("report"),
+                ],
+            )
+            events: list[tuple[str, str, str]] = []
+            lock = threading.Lock()
+
+            def _fake_maven(module_path, *_args, profile=None, **_kwargs):
+                name = Path(module_path).name
+                with lock:
+                    events.append(("start", profile, name))
+                time.sleep(0.05 if name == "core" else 0.01)
+                with lock:
+                    events.append(("end", profile, name))
+                return 0
+
+            history = PipelineHistory(base_path / "history.sqlite3")
+            with patch("buildtool.core.tasks.PipelineHistory", return_value=history), patch(
+                "buildtool.core.tasks.run_maven", side_effect=_fake_maven
+            ):
+                ok = build_project_scheduled(
+                    cfg, "proj", ["qa", "prod"], None, log_cb=lambda _m: None, max_workers=3
+                )
+
+            self.assertTrue(ok)
+            for profile in ("qa", "prod"):
+                index = {(kind, name): i for i, (kind, prof, name) in enumerate(events) if prof == profile}
+                self.assertLess(index[("end", "core")], index[("start", "api")])
+                self.assertLess(index[("end", "api")], index[("start", "web")])
+            self.assertLess(
+                events.index(("start", "qa", "report")), events.index(("end", "qa", "core"))
+            )
+            self.assertEqual(history.list_runs(limit=1)[0].status, "success")
+
+    def test_longest_history_first_and_heavy_modules_never_overlap(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            heavy_a, heavy_b = self._module("heavy_a"), self._module("heavy_b")
+            heavy_a.weight = heavy_b.weight = 2
+            cfg = self._config(base_path, [self._module("quick"), heavy_a, heavy_b, self._module("slow")])
+            history = PipelineHistory(base_path / "history.sqlite3")
+            previous = history.start_run(
+                "build", user="dev", group_key="grp", project_key="proj", profiles=["qa"], modules=[]
+            )
+            for module, seconds in (("quick", 1.0), ("slow", 90.0), ("heavy_a", 30.0), ("heavy_b", 20.0)):
+                history.record_module_timing(previous, module=module, profile="qa", maven_s=seconds, status="ok")
+            history.finish_run(previous, "success")
+
+            started: list[str] = []
+            running: set[str] = set()
+            overlaps: list[set[str]] = []
+            lock = threading.Lock()
+
+            def _fake_maven(module_path, *_args, **_kwargs):
+                name = Path(module_path).name
+                with lock:
+                    started.append(name)
+                    running.add(name)
+                    if {"heavy_a", "heavy_b"} <= running:
+                        overlaps.append(set(running))
+                time.sleep(0.02)
+                with lock:
+                    running.discard(name)
+                return 0
+
+            with patch("buildtool.core.tasks.PipelineHistory", return_value=history), patch(
+                "buildtool.core.tasks.run_maven", side_effect=_fake_maven
+            ):
+                self.assertTrue(build_project_scheduled(cfg, "proj", ["qa"], None, log_cb=lambda _m: None, max_workers=3))
+
+            # Los dos más largos arrancan juntos (el orden entre hilos varía).
+            self.assertEqual(set(started[:2]), {"slow", "heavy_a"})
+            self.assertEqual(overlaps, [])
+            self.assertEqual(sorted(started), ["heavy_a", "heavy_b", "quick", "slow"])
+
+    def test_profile_independent_modules_are_built_once_and_copied(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            core, web = self._module("core"), self._module("web", depends_on=["core"])
+            core.copy_to_subfolder = web.copy_to_subfolder = "lib"
+            # web se compila en ambos perfiles sobre el mismo target/
+            web.serial_across_profiles = True
+            cfg = self._config(base_path, [core, web])
+            cfg.profile_reuse = SimpleNamespace(mode="pom")
+            repo_dir = base_path / "repo"
+            (repo_dir / "core").mkdir()
+            (repo_dir / "core" / "pom.xml").write_text("<project><artifactId>core</artifactId></project>")
+            (repo_dir / "web").mkdir()
+            (repo_dir / "web" / "pom.xml").write_text(
+                "<project><artifactId>web</artifactId><profiles>"
+                "<profile><id>qa</id></profile><profile><id>prod</id></profile></profiles></project>"
+            )
+            built: list[tuple[str, str]] = []
+
+            def _fake_maven(module_path, *_args, profile=None, **_kwargs):
+                name = Path(module_path).name
+                built.append((profile, name))
+                target = Path(module_path) / "target"
+                target.mkdir(exist_ok=True)
+                (target / f"{name}.jar").write_text(f"{name}-{profile}")
+                return 0
+
+            history = PipelineHistory(base_path / "history.sqlite3")
+            with patch("buildtool.core.tasks.PipelineHistory", return_value=history), patch(
+                "buildtool.core.tasks.run_maven", side_effect=_fake_maven
+            ), patch("buildtool.core.profile_inputs._settings_paths", return_value=[]):
+                ok = build_project_scheduled(
+                    cfg, "proj", ["qa", "prod"], None, log_cb=lambda _m: None, max_workers=2
+                )
+
+            self.assertTrue(ok)
+            self.assertEqual(sorted(built), [("prod", "web"), ("qa", "core"), ("qa", "web")])
+            for profile in ("qa", "prod"):
+                lib = base_path / "output" / "proj" / profile / "lib"
+                self.assertEqual((lib / "core.jar").read_text(), "core-qa")
+                self.assertEqual((lib / "web.jar").read_text(), f"web-{profile}")
+            run = history.list_runs()[0]
+            statuses = {(t["profile"], t["module"]): t["status"] for t in history.module_timings(run.id)}
+            self.assertEqual(statuses[("prod", "core")], "reused")
+
+    def test_cpu_budget_limits_total_maven_threads(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            wide = self._module("wide")
+            wide.maven_threads = 3
+            modules = [wide, self._module("a"), self._module("b"), self._module("c")]
+            cfg = self._config(base_path, modules, cpu_budget=4)
+            in_use: list[int] = []
+            current = {"threads": 0}
+            passed: dict[str, int] = {}
+            lock = threading.Lock()
+
+            def _fake_maven(module_path, *_args, threads=None, **_kwargs):
+                with lock:
+                    passed[Path(module_path).name] = threads
+                    current["threads"] += threads
+                    in_use.append(current["threads"])
+                time.sleep(0.02)
+                with lock:
+                    current["threads"] -= threads
+                return 0
+
+            history = PipelineHistory(base_path / "history.sqlite3")
+            with patch("buildtool.core.tasks.PipelineHistory", return_value=history), patch(
+                "buildtool.core.tasks.run_maven", side_effect=_fake_maven
+            ):
+                self.assertTrue(build_project_scheduled(cfg, "proj", ["qa"], None, log_cb=lambda _m: None, max_workers=4))
+
+            self.assertEqual(passed, {"wide": 3, "a": 1, "b": 1, "c": 1})
+            self.assertLessEqual(max(in_use), 4)
+
+    def test_dependency_cycle_fails_before_running_maven(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            cfg = self._config(
+                base_path,
+                [self._module("a", depends_on=["b"]), self._module("b", depends_on=["a"])],
+            )
+            logs: list[str] = []
+            history = PipelineHistory(base_path / "history.sqlite3")
+            with patch("buildtool.core.tasks.PipelineHistory", return_value=history), patch(
+                "buildtool.core.tasks.run_maven", return_value=0
+            ) as run_maven:
+                self.assertFalse(build_project_scheduled(cfg, "proj", ["qa"], None, log_cb=logs.append))
+
+            run_maven.assert_not_called()
+            self.assertTrue(any("cíclicas" in line for line in logs))
+
+
+class BuildBatchScheduledTests(unittest.TestCase):
+    def _config(self, base_path: Path) -> SimpleNamespace:
+        projects = []
+        repos = {}
+        for key in ("alpha", "beta"):
+            repo_dir = base_path / key
+            repo_dir.mkdir()
+            repos[key] = str(repo_dir)
+            modules = [BuildProjectScheduledDependencyTests._module(f"{key}_{n}") for n in ("core", "web")]
+            modules[1].depends_on = [modules[0].name]
+            projects.append(SimpleNamespace(key=key, modules=modules, repo=key, workspace=None))
+        group = SimpleNamespace(
+            key="grp",
+            projects=projects,
+            repos=repos,
+            output_base=str(base_path / "output"),
+            profiles=[],
+            deploy_targets=[],
+        )
+        return SimpleNamespace(
+            groups=[group],
+            paths=SimpleNamespace(workspaces=repos, output_base=str(base_path / "output")),
+            default_execution_mode="integrated",
+            build_cpu_budget=8,
+        )
+
+    def _run(self, base_path: Path, fake_maven, logs: list[str]) -> tuple[bool, PipelineHistory]:
+        cfg = self._config(base_path)
+        history = PipelineHistory(base_path / "history.sqlite3")
+        selections = [BuildSelection("alpha", ["qa"], group_key="grp"), BuildSelection("beta", ["qa", "prod"])]
+        with patch("buildtool.core.tasks.PipelineHistory", return_value=history), patch(
+            "buildtool.core.tasks.run_maven", side_effect=fake_maven
+        ):
+            ok = build_batch_scheduled(cfg, selections, log_cb=logs.append, max_workers=4)
+        return ok, history
+
+    def test_projects_share_one_pool_and_record_parent_with_child_runs(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            running: set[str] = set()
+            overlapped: set[str] = set()
+            lock = threading.Lock()
+
+            def _fake_maven(module_path, *_args, **_kwargs):
+                project = Path(module_path).parent.name
+                with lock:
+                    running.add(project)
+                    if len(running) > 1:
+                        overlapped.update(running)
+                time.sleep(0.03)
+                with lock:
+                    running.discard(project)
+                return 0
+
+            logs: list[str] = []
+            ok, history = self._run(base_path, _fake_maven, logs)
+
+            self.assertTrue(ok)
+            self.assertEqual(overlapped, {"alpha", "beta"})
+            self.assertTrue(any(line.startswith("[beta] [prod]") for line in logs))
+            parent = next(run for run in history.list_runs() if run.project_key is None)
+            children = history.list_runs(parent_id=parent.id)
+            self.assertEqual(sorted(run.project_key for run in children), ["alpha", "beta"])
+            self.assertEqual({run.status for run in [parent, *children]}, {"success"})
+            beta = next(run for run in children if run.project_key == "beta")
+            self.assertEqual(len(history.module_timings(beta.id)), 4)
+
+    def test_failure_in_one_project_stops_the_batch(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            started: list[str] = []
+
+            def _fake_maven(module_path, *_args, **_kwargs):
+                started.append(Path(module_path).name)
+                return 1 if Path(module_path).name == "alpha_core" else 0
+
+            ok, history = self._run(base_path, _fake_maven, [])
+
+            self.assertFalse(ok)
+            self.assertNotIn("alpha_web", started)
+            runs = {run.project_key: run.status for run in history.list_runs()}
+            self.assertEqual(runs["alpha"], "error")
+            self.assertEqual(runs[None], "error")
+            self.assertIn(runs["beta"], {"cancelled", "success"})
+
+
+class BuildProjectCacheTests(unittest.TestCase):
+    def test_unchanged_module_is_restored_from_cache_without_maven(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            repo_dir = base_path / "repo"
+            (repo_dir / "web" / "src").mkdir(parents=True)
+            source = repo_dir / "web" / "src" / "App.java"
+            source.write_text("class App {}", encoding="utf-8")
+            output_dir = base_path / "output"
+            module = SimpleNamespace(
+                name="web",
+                path="web",
+                goals=["clean", "package"],
+                optional=False,
+                profile_override=None,
+                only_if_profile_equals=None,
+                copy_to_profile_war=True,
+                copy_to_profile_ui=False,
+                copy_to_subfolder=None,
+                rename_jar_to=None,
+                select_pattern=None,
+                copy_to_root=False,
+                run_once=False,
+                no_profile=False,
+            )
+            project = SimpleNamespace(key="proj", modules=[module], repo="repo", workspace=None)
+            group = SimpleNamespace(
+                key="grp",
+                projects=[project],
+                repos={"repo": str(repo_dir)},
+                output_base=str(output_dir),
+                profiles=[],
+                deploy_targets=[],
+            )
+            cfg = SimpleNamespace(
+                groups=[group],
+                paths=SimpleNamespace(workspaces={"repo": str(repo_dir)}, output_base=str(output_dir)),
+                default_execution_mode="integrated",
+                artifact_patterns=["*.war", "*.jar"],
+                build_cache=SimpleNamespace(enabled=True, path=str(base_path / "cache"), max_entries_per_module=3),
+            )
+
+            def _fake_maven(module_path, *_args, **_kwargs):
+                target = Path(module_path) / "target"
+                shutil.rmtree(target, ignore_errors=True)
+                target.mkdir()
+                (target / "web.war").write_text(source.read_text(encoding="utf-8"), encoding="utf-8")
+                return 0
+
+            def _build() -> tuple[int, list[dict], list[str]]:
+                timings: list[dict] = []
+                logs: list[str] = []
+                with patch("buildtool.core.tasks.run_maven", side_effect=_fake_maven) as run_maven:
+                    self.assertTrue(
+                        build_project_for_profile(
+                            cfg, "proj", "qa", True, log_cb=logs.append, timing_cb=timings.append
+                        )
+                    )
+                return run_maven.call_count, timings, logs
+
+            calls, timings, logs = _build()
+            self.assertEqual((calls, timings[0]["cache"], timings[0]["status"]), (1, "miss", "ok"))
+
+            shutil.rmtree(repo_dir / "web" / "target")
+            shutil.rmtree(output_dir)
+            calls, timings, logs = _build()
+            self.assertEqual((calls, timings[0]["cache"], timings[0]["status"]), (0, "hit", "cached"))
+            self.assertTrue(any("caché HIT" in line for line in logs))
+            self.assertEqual(
+                (output_dir / "proj" / "qa" / "war" / "web.war").read_text(encoding="utf-8"), "class App {}"
+            )
+
+            source.write_text("class App { int x; }", encoding="utf-8")
+            calls, timings, _ = _build()
+            self.assertEqual((calls, timings[0]["cache"]), (1, "miss"))
+
+
+    def test_cache_key_follows_pom_dependencies_and_parent_poms(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            repo_dir = base_path / "repo"
+            parent = "<parent><groupId>g</groupId><artifactId>parent</artifactId></parent>"
+            (repo_dir / "pom.xml").parent.mkdir(parents=True)
+            (repo_dir / "pom.xml").write_text(
+                "<project><groupId>g</groupId><artifactId>parent</artifactId><version>1</version></project>",
+                encoding="utf-8",
+            )
+            for name, deps in (("commons", ""), ("web", "<dependencies><dependency><groupId>g</groupId>"
+                                                         "<artifactId>commons</artifactId></dependency></dependencies>")):
+                (repo_dir / name / "src").mkdir(parents=True)
+                (repo_dir / name / "src" / "App.java").write_text(f"class {name} {{}}", encoding="utf-8")
+                (repo_dir / name / "pom.xml").write_text(
+                    f"<project>{parent}<artifactId>{name}</artifactId>{deps}</project>", encoding="utf-8"
+                )
+            modules = [
+                SimpleNamespace(
+                    name=name, path=name, goals=["clean", "package"], optional=False, profile_override=None,
+                    only_if_profile_equals=None, copy_to_profile_war=False, copy_to_profile_ui=False,
+                    copy_to_subfolder=None, rename_jar_to=None, select_pattern=None, copy_to_root=False,
+                    run_once=False, no_profile=False,
+                )
+                for name in ("commons", "web")
+            ]
+            # sin depends_on ni module_deps_from_pom
+            project = SimpleNamespace(key="proj", modules=modules, repo="repo", workspace=None)
+            group = SimpleNamespace(
+                key="grp", projects=[project], repos={"repo": str(repo_dir)},
+                output_base=str(base_path / "output"), profiles=[], deploy_targets=[],
+            )
+            cfg = SimpleNamespace(
+                groups=[group],
+                paths=SimpleNamespace(workspaces={"repo": str(repo_dir)}, output_base=str(base_path / "output")),
+                default_execution_mode="integrated",
+                artifact_patterns=["*.war", "*.jar"],
+                build_cache=SimpleNamespace(enabled=True, path=str(base_path / "cache"), max_entries_per_module=3),
+            )
+
+            def _fake_maven(module_path, *_args, **_kwargs):
+                target = Path(module_path) / "target"
+                target.mkdir(exist_ok=True)
+                (target / f"{Path(module_path).name}.jar").write_bytes(b"jar")
+                return 0
+
+            def _cache_results() -> dict[str, str]:
+                timings: list[dict] = []
+                with patch("buildtool.core.tasks.run_maven", side_effect=_fake_maven):
+                    self.assertTrue(
+                        build_project_for_profile(cfg, "proj", "qa", True, log_cb=lambda _m: None,
+                                                  timing_cb=timings.append)
+                    )
+                return {t["module"]: t["cache"] for t in timings}
+
+            self.assertEqual(_cache_results(), {"commons": "miss", "web": "miss"})
+            self.assertEqual(_cache_results(), {"commons": "hit", "web": "hit"})
+            (repo_dir / "commons" / "src" / "App.java").write_text("class commons { int x; }", encoding="utf-8")
+            self.assertEqual(_cache_results(), {"commons": "miss", "web": "miss"})
+            (repo_dir / "pom.xml").write_text(
+                "<project><groupId>g</groupId><artifactId>parent</artifactId><version>2</version></project>",
+                encoding="utf-8",
+            )
+            self.assertEqual(_cache_results(), {"commons": "miss", "web": "miss"})
+
+            modules[0].goals = ["clean", "install"]
+            self.assertEqual(_cache_results(), {"commons": None, "web": "miss"})
+            self.assertEqual(_cache_results(), {"commons": None, "web": "hit"})
+
+
+class BuildProjectRunOnceTests(unittest.TestCase):
+    def test_run_once_module_rebuilds_only_when_sources_change(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            repo_dir = base_path / "repo"
+            (repo_dir / "commons").mkdir(parents=True)
+            source = repo_dir / "commons" / "pom.xml"
+            source.write_text("<project/>", encoding="utf-8")
+            module = SimpleNamespace(
+                name="commons",
+                path="commons",
+                goals=["clean", "install"],
+                optional=False,
+                profile_override=None,
+                only_if_profile_equals=None,
+                copy_to_profile_war=False,
+                copy_to_profile_ui=False,
+                copy_to_subfolder=None,
+                rename_jar_to=None,
+                select_pattern=None,
+                copy_to_root=False,
+                run_once=True,
+                no_profile=True,
+            )
+            project = SimpleNamespace(key="proj", modules=[module], repo="repo", workspace=None)
+            group = SimpleNamespace(
+                key="grp",
+                projects=[project],
+                repos={"repo": str(repo_dir)},
+                output_base=str(base_path / "output"),
+                profiles=[],
+                deploy_targets=[],
+            )
+            cfg = SimpleNamespace(
+                groups=[group],
+                paths=SimpleNamespace(workspaces={"repo": str(repo_dir)}, output_base=str(base_path / "output")),
+                default_execution_mode="integrated",
+            )
+
+            def _fake_maven(module_path, *_args, **_kwargs):
+                (Path(module_path) / "target").mkdir(exist_ok=True)
+                (Path(module_path) / "target" / "commons.jar").write_bytes(b"jar")
+                return 0
+
+            def _build_calls() -> int:
+                with patch("buildtool.core.tasks.run_maven", side_effect=_fake_maven) as run_maven:
+                    for profile in ("qa", "prod"):
+                        self.assertTrue(build_project_for_profile(cfg, "proj", profile, True, log_cb=lambda _m: None))
+                return run_maven.call_count
+
+            with patch.dict(os.environ, {"FORGEBUILD_RUN_ONCE_DB": str(base_path / "run_once.json")}):
+                self.assertEqual(_build_calls(), 1)
+                self.assertEqual(_build_calls(), 0)
+                source.write_text("<project><version>2</version></project>", encoding="utf-8")
+                self.assertEqual(_build_calls(), 1)
+
+
+class DeployVersionTests(unittest.TestCase):
+    def _config(self, base_path: Path) -> SimpleNamespace:
+        target = SimpleNamespace(
+            name="nas",
+            project_key="proj",
+            profiles=["qa"],
+            path_template=str(base_path / "nas" / "{version}"),
+            hotfix_path_template=None,
+        )
+        project = SimpleNamespace(key="proj", modules=[], repo="repo", workspace=None)
+        group = SimpleNamespace(
+            key="grp",
+            projects=[project],
+            repos={"repo": str(base_path / "repo")},
+            output_base=str(base_path / "output"),
+            profiles=[],
+            deploy_targets=[target],
+        )
+        return SimpleNamespace(
+            groups=[group],
+            paths=SimpleNamespace(workspaces={}, output_base=str(base_path / "output")),
+            default_execution_mode="integrated",
+            copy_workers=3,
+        )
+
+    @staticmethod
+    def _output(base_path: Path) -> Path:
+        out = base_path / "output" / "proj" / "qa"
+        for rel, data in {
+            "app.war": b"war",
+            "app.pom": b"pom",
+            "war/web.war": b"web",
+            "config/conf/app.properties": b"a=1",
+            "config/lib/dep.jar": b"dep",
+        }.items():
+            (out / rel).parent.mkdir(parents=True, exist_ok=True)
+            (out / rel).write_bytes(data)
+        return out
+
+    def test_deploy_copies_output_tree_and_logs_throughput(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            self._output(base_path)
+            logs: list[str] = []
+            with patch("buildtool.core.tasks.PipelineHistory"):
+                ok = deploy_version(self._config(base_path), "proj", "qa", "1.0", "nas", log_cb=logs.append)
+
+            self.assertTrue(ok)
+            dst = base_path / "nas" / "1.0"
+            self.assertEqual(
+                sorted(p.relative_to(dst).as_posix() for p in dst.rglob("*") if p.is_file()),
+                [".forgebuild-manifest.qa.json", "app.war", "config/conf/app.properties", "war/web.war"],
+            )
+            self.assertTrue(any("Copia: 3 archivos" in line for line in logs))
+
+
+    def test_delta_deploy_copies_only_changed_files_and_removes_orphans(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            out = self._output(base_path)
+            cfg = self._config(base_path)
+            target = cfg.groups[0].deploy_targets[0]
+            target.delta = True
+            target.delete_orphans = True
+            dst = base_path / "nas" / "1.0"
+
+            def _deploy() -> list[str]:
+                logs: list[str] = []
+                with patch("buildtool.core.tasks.PipelineHistory"):
+                    self.assertTrue(deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=logs.append))
+                return [line for line in logs if "Copiado:" in line]
+
+            self.assertEqual(len(_deploy()), 3)
+            (out / "war" / "web.war").write_bytes(b"web-v2")
+            os.utime(out / "app.war", ns=(1, 1))  # mismo contenido, otro mtime
+            (out / "config" / "conf" / "app.properties").unlink()
+
+            copied = _deploy()
+            self.assertEqual(len(copied), 1)
+            self.assertIn("web.war", copied[0])
+            self.assertEqual((dst / "war" / "web.war").read_bytes(), b"web-v2")
+            self.assertFalse((dst / "config").exists())
+            self.assertEqual(_deploy(), [])
+
+    def test_profiles_sharing_a_folder_keep_separate_delta_baselines(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            self._output(base_path)
+            uat = base_path / "output" / "proj" / "uat"
+            uat.mkdir(parents=True)
+            (uat / "uat.war").write_bytes(b"uat")
+            cfg = self._config(base_path)
+            target = cfg.groups[0].deploy_targets[0]
+            target.profiles = ["qa", "uat"]
+            target.delta = True
+            target.delete_orphans = True
+            dst = base_path / "nas" / "1.0"
+
+            def _deploy(profile: str) -> list[str]:
+                logs: list[str] = []
+                with patch("buildtool.core.tasks.PipelineHistory"):
+                    self.assertTrue(deploy_version(cfg, "proj", profile, "1.0", "nas", log_cb=logs.append))
+                return [line for line in logs if "Copiado:" in line]
+
+            self.assertEqual(len(_deploy("qa")), 3)
+            self.assertEqual(len(_deploy("uat")), 1)
+            # cada perfil compara con su propio manifiesto y no toma los archivos del otro por huérfanos
+            self.assertEqual(_deploy("qa"), [])
+            self.assertEqual(_deploy("uat"), [])
+            self.assertEqual((dst / "uat.war").read_bytes(), b"uat")
+            self.assertEqual((dst / "app.war").read_bytes(), b"war")
+            self.assertTrue((dst / ".forgebuild-manifest.qa.json").is_file())
+            self.assertTrue((dst / ".forgebuild-manifest.uat.json").is_file())
+
+            target.staged = True
+            (uat / "uat.war").write_bytes(b"uat-v2")
+            self.assertEqual(len(_deploy("uat")), 1)
+            self.assertEqual(_deploy("qa"), [])
+            self.assertEqual((dst / "uat.war").read_bytes(), b"uat-v2")
+            self.assertEqual((dst / "war" / "web.war").read_bytes(), b"web")
+            self.assertTrue((dst / ".forgebuild-manifest.qa.json").is_file())
+
+            # cada perfil se verifica contra su manifiesto; los archivos del otro no son "no registrados"
+            (dst / "uat.war").write_bytes(b"uat-xx")
+            logs: list[str] = []
+            qa_report = verify_deploy(cfg, "proj", "qa", "1.0", "nas", log_cb=logs.append)
+            uat_report = verify_deploy(cfg, "proj", "uat", "1.0", "nas", log_cb=logs.append)
+            self.assertTrue(qa_report.ok)
+            self.assertEqual((qa_report.checked, qa_report.unexpected), (3, []))
+            self.assertEqual((uat_report.mismatched, uat_report.unexpected), (["uat.war"], []))
+            self.assertIn("[uat] DIFERENTE: uat.war", logs)
+            # un perfil sin manifiesto propio no se verifica con el de otro
+            target.profiles.append("prod")
+            with self.assertRaises(FileNotFoundError):
+                verify_deploy(cfg, "proj", "prod", "1.0", "nas", log_cb=logs.append)
+
+    def test_verify_deploy_reports_changed_and_missing_files(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            self._output(base_path)
+            cfg = self._config(base_path)
+            with patch("buildtool.core.tasks.PipelineHistory"):
+                self.assertTrue(deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None))
+
+            report = verify_deploy(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None)
+            self.assertTrue(report.ok)
+            self.assertEqual(report.checked, 3)
+
+            dst = base_path / "nas" / "1.0"
+            (dst / "war" / "web.war").write_bytes(b"wex")
+            (dst / "app.war").unlink()
+            (dst / "extra.txt").write_text("x")
+            logs: list[str] = []
+            report = verify_deploy(cfg, "proj", "qa", "1.0", "nas", log_cb=logs.append)
+            self.assertFalse(report.ok)
+            self.assertEqual(
+                (report.mismatched, report.missing, report.unexpected), (["war/web.war"], ["app.war"], ["extra.txt"])
+            )
+            self.assertTrue(any("DIFERENTE: war/web.war" in line for line in logs))
+
+
+    def test_staged_deploy_resumes_and_publishes_complete_folder(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            self._output(base_path)
+            cfg = self._config(base_path)
+            cfg.copy_workers = 1
+            cfg.groups[0].deploy_targets[0].staged = True
+            dst = base_path / "nas" / "1.0"
+            stage = base_path / "nas" / ".1.0.staging"
+            cancel = threading.Event()
+
+            def _cancel_after_first(line: str) -> None:
+                if "Copiado:" in line:
+                    cancel.set()
+
+            with patch("buildtool.core.tasks.PipelineHistory"):
+                self.assertFalse(
+                    deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=_cancel_after_first, cancel_event=cancel)
+                )
+                self.assertFalse(dst.exists())
+                self.assertTrue((stage / ".forgebuild-journal.jsonl").is_file())
+
+                logs: list[str] = []
+                self.assertTrue(deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=logs.append))
+
+            self.assertEqual(sum("Copiado:" in line for line in logs), 2)
+            self.assertTrue(any("Reanudando deploy: 1 archivos" in line for line in logs))
+            self.assertFalse(stage.exists())
+            self.assertEqual(
+                sorted(p.relative_to(dst).as_posix() for p in dst.rglob("*") if p.is_file()),
+                [".forgebuild-manifest.qa.json", "app.war", "config/conf/app.properties", "war/web.war"],
+            )
+            self.assertTrue(verify_deploy(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None).ok)
+
+            # redeploy delta: lo que no cambió se enlaza desde la versión publicada
+            cfg.groups[0].deploy_targets[0].delta = True
+            (base_path / "output" / "proj" / "qa" / "war" / "web.war").write_bytes(b"web-v2")
+            logs.clear()
+            with patch("buildtool.core.tasks.PipelineHistory"):
+                self.assertTrue(deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=logs.append))
+            self.assertEqual(sum("Copiado:" in line for line in logs), 1)
+            self.assertEqual((dst / "war" / "web.war").read_bytes(), b"web-v2")
+            self.assertEqual((dst / "app.war").read_bytes(), b"war")
+            self.assertTrue(verify_deploy(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None).ok)
+
+    def test_staged_delta_resume_keeps_new_files_and_foreign_ones(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            out = self._output(base_path)
+            cfg = self._config(base_path)
+            cfg.copy_workers = 1
+            target = cfg.groups[0].deploy_targets[0]
+            target.staged = True
+            target.delta = True
+            dst = base_path / "nas" / "1.0"
+            with patch("buildtool.core.tasks.PipelineHistory"):
+                self.assertTrue(deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None))
+            (dst / "otros").mkdir()
+            (dst / "otros" / "uat.war").write_bytes(b"ajeno")
+
+            (out / "app.war").write_bytes(b"war-v2")
+            (out / "war" / "web.war").write_bytes(b"web-v2")
+            (out / "config" / "conf" / "app.properties").unlink()
+            cancel = threading.Event()
+
+            def _cancel_after_first(line: str) -> None:
+                if "Copiado:" in line:
+                    cancel.set()
+
+            with patch("buildtool.core.tasks.PipelineHistory"):
+                self.assertFalse(
+                    deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=_cancel_after_first, cancel_event=cancel)
+                )
+                self.assertTrue(deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None))
+
+            self.assertEqual((dst / "app.war").read_bytes(), b"war-v2")
+            self.assertEqual((dst / "war" / "web.war").read_bytes(), b"web-v2")
+            # huérfano conservado (delete_orphans desactivado) y archivo ajeno al deploy
+            self.assertEqual((dst / "config" / "conf" / "app.properties").read_bytes(), b"a=1")
+            self.assertEqual((dst / "otros" / "uat.war").read_bytes(), b"ajeno")
+            self.assertTrue(verify_deploy(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None).ok)
+
+            target.delete_orphans = True
+            target.delta = False
+            with patch("buildtool.core.tasks.PipelineHistory"):
+                self.assertTrue(deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None))
+            self.assertEqual((dst / "otros" / "uat.war").read_bytes(), b"ajeno")
+            self.assertEqual((dst / "app.war").read_bytes(), b"war-v2")
+
+    def test_staged_deploy_refuses_destinations_without_hardlinks(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            out = self._output(base_path)
+            cfg = self._config(base_path)
+            target = cfg.groups[0].deploy_targets[0]
+            target.staged = True
+            target.delta = True
+            dst = base_path / "nas" / "1.0"
+            with patch("buildtool.core.tasks.PipelineHistory"):
+                self.assertTrue(deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None))
+
+            (out / "war" / "web.war").write_bytes(b"web-v2")
+            logs: list[str] = []
+            with patch("buildtool.core.tasks.PipelineHistory"), \
+                    patch("buildtool.core.deploy_staging.os.link", side_effect=OSError("no soportado")), \
+                    patch("buildtool.core.deploy_staging.shutil.copy2") as copy2:
+                with self.assertRaises(StagingNotSupported):
+                    deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=logs.append)
+
+            # no se replica la carpeta publicada con copias ni se copia ningún artefacto
+            copy2.assert_not_called()
+            self.assertFalse(any("Copiado:" in line for line in logs))
+            self.assertEqual((dst / "war" / "web.war").read_bytes(), b"web")
+
+    def test_staged_deploy_cancelled_while_seeding_keeps_published_folder(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            out = self._output(base_path)
+            cfg = self._config(base_path)
+            target = cfg.groups[0].deploy_targets[0]
+            target.staged = True
+            target.delta = True
+            dst = base_path / "nas" / "1.0"
+            with patch("buildtool.core.tasks.PipelineHistory"):
+                self.assertTrue(deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None))
+
+            (out / "war" / "web.war").write_bytes(b"web-v2")
+            cancel = threading.Event()
+            linked: list[str] = []
+            real_link = os.link
+
+            def _link_then_cancel(src, target_path):
+                linked.append(str(src))
+                real_link(src, target_path)
+                cancel.set()
+
+            logs: list[str] = []
+            with patch("buildtool.core.tasks.PipelineHistory"), \
+                    patch("buildtool.core.deploy_staging.os.link", side_effect=_link_then_cancel):
+                self.assertFalse(
+                    deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=logs.append, cancel_event=cancel)
+                )
+            self.assertEqual(len(linked), 1)
+            self.assertTrue(any("cancelado mientras se preparaba el staging" in line for line in logs))
+            self.assertFalse(any("Copiado:" in line for line in logs))
+            self.assertEqual((dst / "war" / "web.war").read_bytes(), b"web")
+
+            with patch("buildtool.core.tasks.PipelineHistory"):
+                self.assertTrue(deploy_version(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None))
+            self.assertEqual((dst / "war" / "web.war").read_bytes(), b"web-v2")
+            self.assertTrue(verify_deploy(cfg, "proj", "qa", "1.0", "nas", log_cb=lambda _m: None).ok)
+
+    def test_profiles_deploy_concurrently_within_target_limits(self):
+        with TemporaryDirectory() as tmpdir:
+            cfg = self._config(Path(tmpdir))
+            nas = cfg.groups[0].deploy_targets[0]
+            nas.max_parallel = 1
+            cfg.groups[0].deploy_targets.append(SimpleNamespace(name="srv", max_parallel=None, max_mbps=5))
+            targets = {"qa": "nas", "uat": "nas", "prod": "srv"}
+            active: dict[str, int] = {"nas": 0, "srv": 0}
+            peak = {"nas": 0, "total": 0}
+            limiters = {}
+            lock = threading.Lock()
+
+            def _fake_deploy(_cfg, _project, profile, _version, target, **kwargs):
+                limiters[profile] = kwargs["rate_limiter"]
+                with lock:
+                    active[target] += 1
+                    peak["nas"] = max(peak["nas"], active["nas"])
+                    peak["total"] = max(peak["total"], sum(active.values()))
+                time.sleep(0.05)
+                with lock:
+                    active[target] -= 1
+                return True
+
+            with patch("buildtool.core.tasks.PipelineHistory"), patch(
+                "buildtool.core.tasks.deploy_version", side_effect=_fake_deploy
+            ):
+                ok = deploy_profiles_scheduled(cfg, "proj", ["qa", "uat", "prod"], targets, "1.0",
+                                               log_cb=lambda _m: None)
+
+            self.assertTrue(ok)
+            self.assertEqual(peak, {"nas": 1, "total": 2})
+            self.assertIsNone(limiters["qa"])
+            self.assertEqual(limiters["prod"].rate, 5 * 1024 * 1024)
+
+    def test_first_failed_profile_cancels_the_others(self):
+        with TemporaryDirectory() as tmpdir:
+            cfg = self._config(Path(tmpdir))
+            cfg.groups[0].deploy_targets[0].max_parallel = 2
+            cancel = threading.Event()
+            interrupted = []
+            prod_started = threading.Event()
+
+            def _fake_deploy(_cfg, _project, profile, *_args, cancel_event=None, **_kwargs):
+                if profile == "qa":
+                    prod_started.wait(2)
+                    return False
+                prod_started.set()
+                if cancel_event.wait(2):
+                    interrupted.append(profile)
+                    return False
+                return True
+
+            logs: list[str] = []
+            with patch("buildtool.core.tasks.PipelineHistory"), patch(
+                "buildtool.core.tasks.deploy_version", side_effect=_fake_deploy
+            ):
+                ok = deploy_profiles_scheduled(cfg, "proj", ["qa", "prod"], {"qa": "nas", "prod": "nas"}, "1.0",
+                                               log_cb=logs.append, cancel_event=cancel)
+
+            self.assertFalse(ok)
+            self.assertEqual(interrupted, ["prod"])
+            self.assertEqual(logs.count("<< ERROR: Pipeline detenido por fallas."), 1)
+
+    def test_profiles_resolving_the_same_folder_never_overlap(self):
+        with TemporaryDirectory() as tmpdir:
+            base_path = Path(tmpdir)
+            self._output(base_path)
+            uat = base_path / "output" / "proj" / "uat"
+            uat.mkdir(parents=True)
+            (uat / "uat.war").write_bytes(b"uat")
+            cfg = self._config(base_path)
+            nas = cfg.groups[0].deploy_targets[0]
+            nas.profiles = ["qa", "uat"]
+            # otro target con la misma carpeta: su límite de paralelismo no lo protege
+            cfg.groups[0].deploy_targets.append(SimpleNamespace(**{**vars(nas), "name": "nas2"}))
+            active = {"now": 0, "peak": 0}
+            lock = threading.Lock()
+            real_copy = copy_planned
+
+            def _tracked_copy(*args, **kwargs):
+                with lock:
+                    active["now"] += 1
+                    active["peak"] = max(active["peak"], active["now"])
+                time.sleep(0.1)
+                try:
+                    return real_copy(*args, **kwargs)
+                finally:
+                    with lock:
+                        active["now"] -= 1
+
+            with patch("buildtool.core.tasks.PipelineHistory"), patch(
+                "buildtool.core.tasks.copy_planned", side_effect=_tracked_copy
+            ):
+                ok = deploy_profiles_scheduled(cfg, "proj", ["qa", "uat"], {"qa": "nas", "uat": "nas2"}, "1.0",
+                                               log_cb=lambda _m: None)
+
+            self.assertTrue(ok)
+            self.assertEqual(active["peak"], 1)
+            dst = base_path / "nas" / "1.0"
+            self.assertEqual((dst / "uat.war").read_bytes(), b"uat")
+            self.assertEqual((dst / "app.war").read_bytes(), b"war")
+
+    def test_every_failed_profile_logs_its_error(self):
+        with TemporaryDirectory() as tmpdir:
+            cfg = self._config(Path(tmpdir))
+            cfg.groups[0].deploy_targets[0].max_parallel = 2
+            both_started = threading.Barrier(2, timeout=2)
+
+            def _fake_deploy(_cfg, _project, profile, *_args, **_kwargs):
+                both_started.wait()
+                raise OSError(f"sin espacio para {profile}")
+
+            logs: list[str] = []
+            with patch("buildtool.core.tasks.PipelineHistory"), patch(
+                "buildtool.core.tasks.deploy_version", side_effect=_fake_deploy
+            ):
+                ok = deploy_profiles_scheduled(cfg, "proj", ["qa", "prod"], {"qa": "nas", "prod": "nas"}, "1.0",
+                                               log_cb=logs.append)
+
+            self.assertFalse(ok)
+            self.assertIn("[qa] << ERROR: sin espacio para qa", logs)
+            self.assertIn("[prod] << ERROR: sin espacio para prod", logs)
+
@@ -0,0 +1,200 @@
+"""Consola de logs virtualizada para los pipelines de build y deploy.
+
+:class:`LogConsole` sustituye al ``QTextEdit`` que crecía sin límite: las
+líneas se acumulan en una lista pendiente y un ``QTimer`` las vuelca en lote
+sobre un búfer circular (:class:`LogLinesModel`). La vista es un ``QListView``
+con alturas uniformes, por lo que Qt solo pinta las filas visibles sin
+importar cuántas haya en el búfer.
+
+El log completo de cada ejecución sigue disponible en el historial de
+pipelines; :meth:`LogConsole.save_dialog` permite guardarlo desde ahí.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer, Slot
+from PySide6.QtGui import QFont, QFontDatabase, QKeySequence
+from PySide6.QtWidgets import QAbstractItemView, QApplication, QFileDialog, QListView
+
+
+DEFAULT_MAX_LINES = 20000
+DEFAULT_FLUSH_MS = 100
+# Intervalo recomendado para ``PipelineWorker(batch_interval_ms=...)`` al
+# alimentar una consola: coincide con su repintado.
+LOG_BATCH_INTERVAL_MS = DEFAULT_FLUSH_MS
+
+
+class LogLinesModel(QAbstractListModel):
+    """Modelo de lista respaldado por un búfer circular de líneas."""
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, parent=None) -> None:
+        super().__init__(parent)
+        self._max_lines = max(1, int(max_lines))
+        self._lines: deque[str] = deque()
+        self.dropped = 0
+
+    @property
+    def max_lines(self) -> int:
+        return self._max_lines
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # noqa: N802 - Qt
+        return 0 if parent.isValid() else len(self._lines)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):  # noqa: D401 - Qt
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        return self._lines[index.row()]
+
+    def lines(self) -> List[str]:
+        return list(self._lines)
+
+    def extend(self, batch: List[str]) -> None:
+        """Añade ``batch`` descartando las líneas más antiguas que sobren."""
+
+        if not batch:
+            return
+        if len(batch) >= self._max_lines:
+            self.dropped += len(self._lines) + len(batch) - self._max_lines
+            self.beginResetModel()
+            self._lines = deque(batch[-self._max_lines :])
+            self.endResetModel()
+            return
+        overflow = len(self._lines) + len(batch) - self._max_lines
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._lines.popleft()
+            self.endRemoveRows()
+            self.dropped += overflow
+        start = len(self._lines)
+        self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+        self._lines.extend(batch)
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._lines.clear()
+        self.dropped = 0
+        self.endResetModel()
+
+
+class LogConsole(QListView):
+    """Consola de solo lectura con repintado por lotes.
+
+    Mantiene la API que usaban las vistas con ``QTextEdit`` (``append`` y
+    ``clear``) y sigue al final del log mientras el usuario no se desplace
+    hacia arriba.
+    """
+
+    def __init__(
+        self,
+        parent=None,
+        *,
+        max_lines: int = DEFAULT_MAX_LINES,
+        flush_interval_ms: int = DEFAULT_FLUSH_MS,
+    ) -> None:
+        super().__init__(parent)
+        self._model = LogLinesModel(max_lines, self)
+        self._pending: List[str] = []
+        self.setModel(self._model)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+        font.setStyleHint(QFont.Monospace)
+        self.setFont(font)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(10, int(flush_interval_ms)))
+        self._timer.timeout.connect(self.flush)
+
+    # ------------------------------------------------------------------
+    @Slot(str)
+    def append(self, text: str) -> None:
+        """Encola ``text`` (puede traer varias líneas) para el próximo repintado."""
+
+        self._pending.extend(str(text).splitlines() or [""])
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @Slot(list)
+    def append_lines(self, lines: Iterable[str]) -> None:
+        """Encola un lote completo (p. ej. ``progress_batch`` de los workers)."""
+
+        for text in lines:
+            self._pending.extend(str(text).splitlines() or [""])
+        if self._pending and not self._timer.isActive():
+            self._timer.start()
+
+    @Slot()
+    def flush(self) -> None:
+        """Vuelca las líneas pendientes en el modelo en un único lote."""
+
+        if not self._pending:
+            self._timer.stop()
+            return
+        batch, self._pending = self._pending, []
+        bar = self.verticalScrollBar()
+        follow = bar.value() >= bar.maximum() - 2
+        self._model.extend(batch)
+        if follow:
+            self.scrollToBottom()
+
+    @Slot()
+    def clear(self) -> None:
+        self._pending.clear()
+        self._model.clear()
+
+    def lines(self) -> List[str]:
+        """Líneas visibles en el búfer (incluye las pendientes de pintar)."""
+
+        return self._model.lines() + list(self._pending)
+
+    def toPlainText(self) -> str:  # noqa: N802 - compatibilidad con QTextEdit
+        return "\n".join(self.lines())
+
+    # ------------------------------------------------------------------
+    def keyPressEvent(self, event) -> None:  # noqa: N802 - Qt
+        if event.matches(QKeySequence.Copy):
+            rows = sorted(index.row() for index in self.selectedIndexes())
+            lines = self._model.lines()
+            QApplication.clipboard().setText("\n".join(lines[row] for row in rows))
+            return
+        super().keyPressEvent(event)
+
+    def save_dialog(
+        self,
+        full_log: Optional[Callable[[], Iterable[str]]] = None,
+        *,
+        default_name: str = "pipeline.log",
+    ) -> Optional[Path]:
+        """Guarda el log en disco.
+
+        ``full_log`` devuelve las líneas completas desde el historial de
+        pipelines; sin él (o si no hay nada registrado) se guarda el búfer.
+        """
+
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Guardar log completo", default_name, "Log (*.log *.txt)"
+        )
+        if not path:
+            return None
+        self.flush()
+        destination = Path(path)
+        with destination.open("w", encoding="utf-8") as fh:
+            written = 0
+            if full_log is not None:
+                for line in full_log():
+                    fh.write(f"{line}\n")
+                    written += 1
+            if not written:
+                for line in self._model.lines():
+                    fh.write(f"{line}\n")
+        return destination
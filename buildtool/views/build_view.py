@@ -1,4 +1,5 @@
 import threading
+from datetime import datetime
 from typing import Optional
 
 from PySide6.QtCore import Qt, QThread, QSignalBlocker, Slot
@@ -8,10 +9,10 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QPushButton,
-    QTextEdit,
     QComboBox,
     QInputDialog,
     QMessageBox,
+    QProgressBar,
     QSpinBox,
 )
 
@@ -27,10 +28,19 @@ from ..core.config_queries import (
     project_module_names,
     project_profiles,
 )
-from ..core.tasks import build_project_scheduled, _resolve_repo_path, _resolve_output_base
+from ..core.tasks import (
+    BuildProgress,
+    BuildSelection,
+    build_batch_scheduled,
+    build_project_scheduled,
+    _resolve_repo_path,
+    _resolve_output_base,
+)
+from ..core.pipeline_history import PipelineHistory
 from ..core.thread_tracker import TRACKER
 from ..core.workers import PipelineWorker, build_worker
 
+from ..ui.log_console import LOG_BATCH_INTERVAL_MS, LogConsole
 from ..ui.multi_select import MultiSelectComboBox
 from ..ui.widgets import combo_with_arrow, setup_quick_filter, set_combo_enabled
 from .preset_manager import PresetManagerDialog
@@ -99,6 +109,11 @@ class BuildView(QWidget):
         row.addWidget(self.btnBuildSel)
         self.btnBuildAll = QPushButton("Compilar TODOS")
         row.addWidget(self.btnBuildAll)
+        self.btnBuildGroup = QPushButton("Compilar grupo")
+        self.btnBuildGroup.setToolTip(
+            "Compila todos los proyectos del grupo con los perfiles marcados en un único lote."
+        )
+        row.addWidget(self.btnBuildGroup)
         row.addStretch(1)
         lay.addLayout(row)
 
@@ -117,8 +132,7 @@ class BuildView(QWidget):
         preset_row.addStretch(1)
         lay.addLayout(preset_row)
 
-        self.log = QTextEdit()
-        self.log.setReadOnly(True)
+        self.log = LogConsole()
         self.log.setStyleSheet("font-family: Consolas, monospace; font-size: 12px;")
         self.log.setMinimumHeight(320)
         lay.addWidget(self.log)
@@ -126,7 +140,13 @@ class BuildView(QWidget):
         footer = QHBoxLayout()
         footer.setContentsMargins(0, 0, 0, 0)
         footer.setSpacing(12)
+        self.progress = QProgressBar()
+        self.progress.setTextVisible(True)
+        self.progress.setVisible(False)
+        footer.addWidget(self.progress, 1)
         footer.addStretch(1)
+        self.btnSaveLog = QPushButton("Guardar log completo…")
+        footer.addWidget(self.btnSaveLog)
         self.btnClearLog = QPushButton("Limpiar consola")
         footer.addWidget(self.btnClearLog)
         self.btnCancel = QPushButton("Cancelar pipeline")
@@ -136,8 +156,10 @@ class BuildView(QWidget):
 
         self.btnBuildSel.clicked.connect(self.start_build_selected)
         self.btnBuildAll.clicked.connect(self.start_build_all)
+        self.btnBuildGroup.clicked.connect(self.start_build_group)
         self.btnCancel.clicked.connect(self.cancel_active_builds)
-        self.btnClearLog.clicked.connect(self.log.clear)
+        self.btnClearLog.clicked.connect(self.clear_log)
+        self.btnSaveLog.clicked.connect(self.save_full_log)
         self.cboGroup.currentIndexChanged.connect(self.refresh_group)
         self.cboProject.currentIndexChanged.connect(self.refresh_project_data)
         self.cboPresets.currentIndexChanged.connect(self._on_preset_selected)
@@ -147,6 +169,7 @@ class BuildView(QWidget):
         self.spinMaxWorkers.valueChanged.connect(self._on_max_workers_changed)
 
         self._worker_records: dict[PipelineWorker, dict] = {}
+        self._log_since: Optional[datetime] = None
         setup_quick_filter(self.cboGroup)
         setup_quick_filter(self.cboProject)
         self._refresh_presets()
@@ -158,6 +181,7 @@ class BuildView(QWidget):
             self.cboModules.setEnabled(False)
             self.btnBuildSel.setEnabled(False)
             self.btnBuildAll.setEnabled(False)
+            self.btnBuildGroup.setEnabled(False)
 
     def _current_group(self) -> Optional[str]:
         return self.cboGroup.currentData()
@@ -246,6 +270,7 @@ class BuildView(QWidget):
         has_groups = bool(group_keys)
         self.btnBuildSel.setEnabled(has_groups)
         self.btnBuildAll.setEnabled(has_groups)
+        self.btnBuildGroup.setEnabled(has_groups)
         self.cboProfiles.setEnabled(has_groups)
         self.cboModules.setEnabled(has_groups)
 
@@ -413,27 +438,42 @@ class BuildView(QWidget):
             for line in output_lines:
                 self.log.append(line)
 
+        modules_filter = set(selected_modules) if selected_modules else None
+        self._launch_build(
+            build_project_scheduled,
+            project_key=proj.key,
+            profiles=profiles,
+            modules_filter=modules_filter,
+            group_key=gkey,
+        )
+
+    def _launch_build(self, task, **task_kwargs) -> None:
         self.btnBuildSel.setEnabled(False)
         self.btnBuildAll.setEnabled(False)
+        self.btnBuildGroup.setEnabled(False)
         self.btnCancel.setEnabled(True)
+        if self._log_since is None:
+            self._log_since = datetime.utcnow().replace(microsecond=0)
 
-        modules_filter = set(selected_modules) if selected_modules else None
         cancel_event = threading.Event()
         workers_value = self.spinMaxWorkers.value()
         max_workers = workers_value if workers_value > 0 else None
         worker = build_worker(
-            build_project_scheduled,
+            task,
             success_message=">> Listo.",
             cfg=self.cfg,
-            project_key=proj.key,
-            profiles=profiles,
-            modules_filter=modules_filter,
-            group_key=gkey,
             max_workers=max_workers,
             cancel_event=cancel_event,
+            batch_interval_ms=LOG_BATCH_INTERVAL_MS,
+            forward_events=True,
+            **task_kwargs,
         )
         thread, worker = run_in_thread(worker)
-        worker.progress.connect(self.log.append, Qt.QueuedConnection)
+        worker.progress_batch.connect(self.log.append_lines, Qt.QueuedConnection)
+        worker.event.connect(self._on_build_event, Qt.QueuedConnection)
+        self.progress.setRange(0, 0)
+        self.progress.setFormat("Preparando…")
+        self.progress.setVisible(True)
         worker.finished.connect(
             lambda ok, wk=worker: self._on_build_finished(ok, wk),
             Qt.QueuedConnection,
@@ -464,6 +504,40 @@ class BuildView(QWidget):
             return
         self._start_schedule(profiles)
 
+    @Slot(bool)
+    def start_build_group(self, _checked: bool = False) -> None:
+        """Compila todos los proyectos del grupo en un único lote.
+
+        Cada proyecto usa los perfiles marcados que tenga configurados (o
+        todos los suyos si no hay ninguno marcado) y todos sus módulos.
+        """
+        self._reload_cfg_from_store()
+        gkey = self._current_group()
+        checked = self.cboProfiles.checked_items()
+        selections = []
+        for _grp, proj in iter_group_projects(self.cfg, gkey):
+            available = project_profiles(self.cfg, gkey, proj.key)
+            profiles = [p for p in available if p in checked] if checked else available
+            if profiles:
+                selections.append(BuildSelection(proj.key, profiles, None, gkey))
+        if not selections:
+            self.log.append("<< Ningún proyecto del grupo tiene los perfiles elegidos.")
+            return
+        self.log.append(
+            "<< Lote: " + ", ".join(f"{sel.project_key} ({', '.join(sel.profiles)})" for sel in selections)
+        )
+        self._launch_build(build_batch_scheduled, selections=selections)
+
+    @Slot(object)
+    def _on_build_event(self, event) -> None:
+        if not isinstance(event, BuildProgress) or event.total <= 0:
+            return
+        self.progress.setRange(0, event.total)
+        self.progress.setValue(event.done)
+        label = "compilando" if event.status == "running" else event.status
+        where = f"{event.project} · " if event.project else ""
+        self.progress.setFormat(f"%v/%m · {where}[{event.profile}] {event.module}: {label}")
+
     def _on_build_finished(self, ok: bool, worker: PipelineWorker) -> None:
         record = self._worker_records.get(worker)
         if not record:
@@ -474,7 +548,9 @@ class BuildView(QWidget):
         if not self._worker_records:
             self.btnBuildSel.setEnabled(True)
             self.btnBuildAll.setEnabled(True)
+            self.btnBuildGroup.setEnabled(True)
             self.btnCancel.setEnabled(False)
+            self.progress.setVisible(False)
 
         if not ok and record.get("user_cancelled"):
             self.log.append("<< Ejecución cancelada por el usuario.")
@@ -500,6 +576,24 @@ class BuildView(QWidget):
             pass
         TRACKER.remove(thread)
 
+    @Slot(bool)
+    def clear_log(self, _checked: bool = False) -> None:
+        self.log.clear()
+        self._log_since = None
+
+    @Slot(bool)
+    def save_full_log(self, _checked: bool = False) -> None:
+        """Guarda desde el historial el log completo de las ejecuciones de esta consola."""
+
+        since = self._log_since
+
+        def _full_log():
+            if since is None:
+                return iter(())
+            return PipelineHistory().iter_run_logs(pipeline="build", start=since)
+
+        self.log.save_dialog(_full_log, default_name="build.log")
+
     @Slot(bool)
     def cancel_active_builds(self, _checked: bool = False) -> None:
         if not self._worker_records:
@@ -1,4 +1,5 @@
 import threading
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
@@ -11,7 +12,6 @@ from PySide6.QtWidgets import (
     QPushButton,
     QComboBox,
     QLineEdit,
-    QTextEdit,
     QCheckBox,
     QInputDialog,
     QMessageBox,
@@ -28,10 +28,12 @@ from ..core.config_queries import (
     profile_target_map,
     project_profiles,
 )
-from ..core.tasks import deploy_profiles_scheduled
+from ..core.tasks import deploy_profiles_scheduled, verify_profiles
+from ..core.pipeline_history import PipelineHistory
 from ..core.thread_tracker import TRACKER
 from ..core.workers import PipelineWorker
 
+from ..ui.log_console import LOG_BATCH_INTERVAL_MS, LogConsole
 from ..ui.multi_select import MultiSelectComboBox
 from ..ui.widgets import combo_with_arrow, setup_quick_filter, set_combo_enabled
 from .preset_manager import PresetManagerDialog
@@ -90,6 +92,9 @@ class DeployView(QWidget):
         self.btnDeployAll = QPushButton("Copiar TODOS")
         row.addWidget(self.btnDeploySel)
         row.addWidget(self.btnDeployAll)
+        self.btnVerify = QPushButton("Verificar")
+        self.btnVerify.setToolTip("Compara el destino de los perfiles marcados con el SHA-256 de su manifiesto")
+        row.addWidget(self.btnVerify)
 
         row.addStretch(1)
         lay.addLayout(row)
@@ -109,8 +114,7 @@ class DeployView(QWidget):
         preset_row.addStretch(1)
         lay.addLayout(preset_row)
 
-        self.log = QTextEdit()
-        self.log.setReadOnly(True)
+        self.log = LogConsole()
         self.log.setStyleSheet("font-family:Consolas,monospace;")
         self.log.setMinimumHeight(280)
         lay.addWidget(self.log)
@@ -119,6 +123,8 @@ class DeployView(QWidget):
         footer.setContentsMargins(0, 0, 0, 0)
         footer.setSpacing(12)
         footer.addStretch(1)
+        self.btnSaveLog = QPushButton("Guardar log completo…")
+        footer.addWidget(self.btnSaveLog)
         self.btnClearLog = QPushButton("Limpiar consola")
         footer.addWidget(self.btnClearLog)
         self.btnCancel = QPushButton("Cancelar pipeline")
@@ -130,14 +136,17 @@ class DeployView(QWidget):
         self.cboProject.currentIndexChanged.connect(self.refresh_project)
         self.btnDeploySel.clicked.connect(self.start_deploy_selected)
         self.btnDeployAll.clicked.connect(self.start_deploy_all)
+        self.btnVerify.clicked.connect(self.start_verify)
         self.btnCancel.clicked.connect(self.cancel_active_deploys)
-        self.btnClearLog.clicked.connect(self.log.clear)
+        self.btnClearLog.clicked.connect(self.clear_log)
+        self.btnSaveLog.clicked.connect(self.save_full_log)
         self.cboPresets.currentIndexChanged.connect(self._on_preset_selected)
         self.btnApplyPreset.clicked.connect(self.apply_selected_preset)
         self.btnSavePreset.clicked.connect(self.prompt_save_preset)
         self.btnManagePresets.clicked.connect(self.open_preset_manager)
 
         self._worker_record: Optional[dict] = None
+        self._log_since: Optional[datetime] = None
         setup_quick_filter(self.cboGroup)
         setup_quick_filter(self.cboProject)
         self._refresh_presets()
@@ -148,6 +157,7 @@ class DeployView(QWidget):
             self.cboProfiles.setEnabled(False)
             self.btnDeploySel.setEnabled(False)
             self.btnDeployAll.setEnabled(False)
+            self.btnVerify.setEnabled(False)
             self.chkHotfix.setEnabled(False)
             self.txtVersion.setEnabled(False)
 
@@ -226,6 +236,7 @@ class DeployView(QWidget):
         has_groups = bool(group_keys)
         self.btnDeploySel.setEnabled(has_groups)
         self.btnDeployAll.setEnabled(has_groups)
+        self.btnVerify.setEnabled(has_groups)
         self.cboProfiles.setEnabled(has_groups)
         self.chkHotfix.setEnabled(has_groups)
         self.txtVersion.setEnabled(has_groups)
@@ -384,7 +395,16 @@ class DeployView(QWidget):
             return
         self._deploy_profiles(profiles)
 
-    def _deploy_profiles(self, profiles) -> None:
+    @Slot(bool)
+    def start_verify(self, _checked: bool = False) -> None:
+        self._reload_cfg_from_store()
+        profiles = self.cboProfiles.checked_items() or self.cboProfiles.all_items()
+        if not profiles:
+            self.log.append("<< No hay perfiles configurados.")
+            return
+        self._deploy_profiles(profiles, verify=True)
+
+    def _deploy_profiles(self, profiles, verify: bool = False) -> None:
         gkey = self._current_group()
         if self.cboProject.isVisible():
             pkey = self.cboProject.currentData()
@@ -413,6 +433,7 @@ class DeployView(QWidget):
         if not selected:
             self.btnDeploySel.setEnabled(True)
             self.btnDeployAll.setEnabled(True)
+            self.btnVerify.setEnabled(True)
             return
 
         group = get_group(self.cfg, gkey) if gkey else None
@@ -452,12 +473,15 @@ class DeployView(QWidget):
 
         self.btnDeploySel.setEnabled(False)
         self.btnDeployAll.setEnabled(False)
+        self.btnVerify.setEnabled(False)
         self.btnCancel.setEnabled(True)
+        if self._log_since is None:
+            self._log_since = datetime.utcnow().replace(microsecond=0)
 
         cancel_event = threading.Event()
         worker = PipelineWorker(
-            deploy_profiles_scheduled,
-            success_message=">> Copia completada.",
+            verify_profiles if verify else deploy_profiles_scheduled,
+            success_message=">> Verificación correcta." if verify else ">> Copia completada.",
             cfg=self.cfg,
             project_key=pkey,
             profiles=selected,
@@ -466,9 +490,10 @@ class DeployView(QWidget):
             group_key=gkey,
             hotfix=self.chkHotfix.isChecked(),
             cancel_event=cancel_event,
+            batch_interval_ms=LOG_BATCH_INTERVAL_MS,
         )
         thread, worker = run_in_thread(worker)
-        worker.progress.connect(self.log.append, Qt.QueuedConnection)
+        worker.progress_batch.connect(self.log.append_lines, Qt.QueuedConnection)
         worker.finished.connect(lambda ok, wk=worker: self._on_deploy_finished(ok, wk), Qt.QueuedConnection)
 
         self._worker_record = {
@@ -489,6 +514,7 @@ class DeployView(QWidget):
 
         self.btnDeploySel.setEnabled(True)
         self.btnDeployAll.setEnabled(True)
+        self.btnVerify.setEnabled(True)
         self.btnCancel.setEnabled(False)
 
         if not ok and user_cancelled:
@@ -520,6 +546,24 @@ class DeployView(QWidget):
         if thread:
             TRACKER.remove(thread)
 
+    @Slot(bool)
+    def clear_log(self, _checked: bool = False) -> None:
+        self.log.clear()
+        self._log_since = None
+
+    @Slot(bool)
+    def save_full_log(self, _checked: bool = False) -> None:
+        """Guarda desde el historial el log completo de las ejecuciones de esta consola."""
+
+        since = self._log_since
+
+        def _full_log():
+            if since is None:
+                return iter(())
+            return PipelineHistory().iter_run_logs(pipeline="deploy", start=since)
+
+        self.log.save_dialog(_full_log, default_name="deploy.log")
+
     @Slot(bool)
     def cancel_active_deploys(self, _checked: bool = False) -> None:
         if not self._worker_record:
@@ -2,9 +2,17 @@ from __future__ import annotations
 
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
-
-from PySide6.QtCore import Qt, QDate, QSignalBlocker, Slot
+from typing import Any, Optional
+
+from PySide6.QtCore import (
+    Qt,
+    QAbstractTableModel,
+    QDate,
+    QModelIndex,
+    QSignalBlocker,
+    Slot,
+)
+from PySide6.QtGui import QTextCursor
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -14,6 +22,7 @@ from PySide6.QtWidgets import (
     QComboBox,
     QDateEdit,
     QLineEdit,
+    QTableView,
     QTableWidget,
     QTableWidgetItem,
     QTextEdit,
@@ -23,7 +32,125 @@ from PySide6.QtWidgets import (
 
 from ..core.config import Config
 from ..core.config_queries import iter_group_projects, iter_groups
-from ..core.pipeline_history import PipelineHistory
+from ..core.pipeline_history import PipelineHistory, RunRecord
+
+
+class PipelineRunsModel(QAbstractTableModel):
+    """Modelo de ejecuciones que pide páginas a ``list_runs`` al hacer scroll."""
+
+    HEADERS = [
+        "Inicio",
+        "Fin",
+        "Pipeline",
+        "Estado",
+        "Grupo",
+        "Proyecto",
+        "Usuario",
+        "Perfiles",
+        "Módulos",
+        "Versión",
+        "Hotfix",
+        "Tarjeta",
+        "Pruebas",
+        "QA",
+        "Aprobado por",
+        "Mensaje",
+    ]
+
+    def __init__(self, history: PipelineHistory, page_size: int = 100, parent=None) -> None:
+        super().__init__(parent)
+        self._history = history
+        self._page_size = page_size
+        self._filters: dict = {}
+        self._runs: list[RunRecord] = []
+        self._exhausted = True
+
+    def reset(self, filters: dict) -> None:
+        self.beginResetModel()
+        self._filters = dict(filters)
+        self._runs = []
+        self._exhausted = False
+        self.endResetModel()
+        if self.canFetchMore():
+            self.fetchMore()
+
+    def run_at(self, row: int) -> Optional[RunRecord]:
+        if 0 <= row < len(self._runs):
+            return self._runs[row]
+        return None
+
+    # ------------------------------------------------------------------
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # noqa: N802 (Qt override)
+        return 0 if parent.isValid() else len(self._runs)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:  # noqa: N802 (Qt override)
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:  # noqa: N802 (Qt override)
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:  # noqa: N802 (Qt override)
+        if parent.isValid() or self._exhausted:
+            return
+        after = self._runs[-1].cursor if self._runs else None
+        page = self._history.list_runs(after=after, limit=self._page_size, **self._filters)
+        if len(page) < self._page_size:
+            self._exhausted = True
+        if not page:
+            return
+        first = len(self._runs)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._runs.extend(page)
+        self.endInsertRows()
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole) -> Any:  # noqa: N802
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            if 0 <= section < len(self.HEADERS):
+                return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        run = self.run_at(index.row()) if index.isValid() else None
+        if run is None:
+            return None
+        if role == Qt.UserRole:
+            return run.id
+        if role != Qt.DisplayRole:
+            return None
+        column = index.column()
+        if column == 0:
+            return run.started_at or ""
+        if column == 1:
+            return run.finished_at or ""
+        if column == 2:
+            return run.pipeline
+        if column == 3:
+            return run.status or ""
+        if column == 4:
+            return run.group_key or ""
+        if column == 5:
+            return run.project_key or ""
+        if column == 6:
+            return run.user or ""
+        if column == 7:
+            return ", ".join(run.profiles)
+        if column == 8:
+            return ", ".join(run.modules)
+        if column == 9:
+            return run.version or ""
+        if column == 10:
+            return "Sí" if run.hotfix else "No"
+        if column == 11:
+            return str(run.card_id or "")
+        if column == 12:
+            return run.unit_tests_status or ""
+        if column == 13:
+            return run.qa_status or ""
+        if column == 14:
+            return run.approved_by or ""
+        if column == 15:
+            return run.message or ""
+        return None
 
 
 class PipelineHistoryView(QWidget):
@@ -33,7 +160,6 @@ class PipelineHistoryView(QWidget):
         super().__init__(parent)
         self.cfg = cfg
         self.history = PipelineHistory()
-        self.current_runs: list[dict] = []
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(16, 12, 16, 12)
@@ -112,30 +238,34 @@ class PipelineHistoryView(QWidget):
 
         layout.addLayout(filter_row)
 
-        self.table = QTableWidget(0, 16)
-        self.table.setHorizontalHeaderLabels(
-            [
-                "Inicio",
-                "Fin",
-                "Pipeline",
-                "Estado",
-                "Grupo",
-                "Proyecto",
-                "Usuario",
-                "Perfiles",
-                "Módulos",
-                "Versión",
-                "Hotfix",
-                "Tarjeta",
-                "Pruebas",
-                "QA",
-                "Aprobado por",
-                "Mensaje",
-            ]
-        )
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        search_row = QHBoxLayout()
+        search_row.setSpacing(8)
+        search_row.addWidget(QLabel("Buscar en logs:"))
+        self.txtSearch = QLineEdit()
+        self.txtSearch.setPlaceholderText("Excepción, artefacto o texto (usa * para prefijos)")
+        search_row.addWidget(self.txtSearch, 1)
+        self.btnSearch = QPushButton("Buscar")
+        search_row.addWidget(self.btnSearch)
+        self.btnClearSearch = QPushButton("Limpiar búsqueda")
+        search_row.addWidget(self.btnClearSearch)
+        layout.addLayout(search_row)
+
+        self.tblSearch = QTableWidget(0, 3)
+        self.tblSearch.setHorizontalHeaderLabels(["Ejecución", "Fecha", "Coincidencia"])
+        self.tblSearch.setSelectionBehavior(QTableWidget.SelectRows)
+        self.tblSearch.setSelectionMode(QTableWidget.SingleSelection)
+        self.tblSearch.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tblSearch.horizontalHeader().setStretchLastSection(True)
+        self.tblSearch.setVisible(False)
+        layout.addWidget(self.tblSearch, 2)
+
+        self.model = PipelineRunsModel(self.history, parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setSelectionMode(QTableView.SingleSelection)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
+        self.table.verticalHeader().setDefaultSectionSize(22)
         layout.addWidget(self.table, 3)
 
         layout.addWidget(QLabel("Log del pipeline:"))
@@ -160,7 +290,11 @@ class PipelineHistoryView(QWidget):
         self.btnRefresh.clicked.connect(self.refresh)
         self.btnExport.clicked.connect(self.export_csv)
         self.btnClear.clicked.connect(self.clear_history)
-        self.table.itemSelectionChanged.connect(self._load_selected_logs)
+        self.table.selectionModel().selectionChanged.connect(self._load_selected_logs)
+        self.btnSearch.clicked.connect(self.search_logs)
+        self.txtSearch.returnPressed.connect(self.search_logs)
+        self.btnClearSearch.clicked.connect(self.clear_search)
+        self.tblSearch.itemSelectionChanged.connect(self._load_search_match)
         self.cboUnitStatus.currentIndexChanged.connect(self.refresh)
         self.cboQAStatus.currentIndexChanged.connect(self.refresh)
         self.txtCard.returnPressed.connect(self.refresh)
@@ -206,97 +340,96 @@ class PipelineHistoryView(QWidget):
             "project_key": self.cboProject.currentData(),
             "start": start,
             "end": end,
+            "unit_tests_status": self.cboUnitStatus.currentData(),
+            "qa_status": self.cboQAStatus.currentData(),
+            "card": self.txtCard.text().strip() or None,
         }
         return {k: v for k, v in filters.items() if v is not None}
 
-    def _filter_by_checks(self, runs: list) -> list:
-        unit_value = self.cboUnitStatus.currentData()
-        qa_value = self.cboQAStatus.currentData()
-        card_text = self.txtCard.text().strip()
-
-        def _match_status(value: Optional[str], expected: Optional[str]) -> bool:
-            if expected in (None, "", "all"):
-                return True
-            current = (value or "").lower()
-            return current == str(expected).lower()
-
-        filtered = []
-        desired_card = None
-        if card_text:
-            try:
-                desired_card = int(card_text)
-            except ValueError:
-                desired_card = card_text.lower()
-
-        for run in runs:
-            if not _match_status(run.unit_tests_status, unit_value):
-                continue
-            if not _match_status(run.qa_status, qa_value):
-                continue
-            if desired_card is not None:
-                if isinstance(desired_card, int):
-                    if run.card_id != desired_card:
-                        continue
-                else:
-                    if not run.message or desired_card not in run.message.lower():
-                        continue
-            filtered.append(run)
-        return filtered
-
     @Slot()
     def refresh(self) -> None:
-        filters = self._filters()
-        runs = self.history.list_runs(**filters)
-        runs = self._filter_by_checks(runs)
-        self.current_runs = [r.__dict__ for r in runs]
-        self.table.setRowCount(len(runs))
-
-        for row_idx, run in enumerate(runs):
-            self.table.setItem(row_idx, 0, QTableWidgetItem(run.started_at or ""))
-            self.table.setItem(row_idx, 1, QTableWidgetItem(run.finished_at or ""))
-            self.table.setItem(row_idx, 2, QTableWidgetItem(run.pipeline))
-            self.table.setItem(row_idx, 3, QTableWidgetItem(run.status or ""))
-            self.table.setItem(row_idx, 4, QTableWidgetItem(run.group_key or ""))
-            self.table.setItem(row_idx, 5, QTableWidgetItem(run.project_key or ""))
-            self.table.setItem(row_idx, 6, QTableWidgetItem(run.user or ""))
-            self.table.setItem(row_idx, 7, QTableWidgetItem(", ".join(run.profiles)))
-            self.table.setItem(row_idx, 8, QTableWidgetItem(", ".join(run.modules)))
-            self.table.setItem(row_idx, 9, QTableWidgetItem(run.version or ""))
-            self.table.setItem(row_idx, 10, QTableWidgetItem("Sí" if run.hotfix else "No"))
-            self.table.setItem(row_idx, 11, QTableWidgetItem(str(run.card_id or "")))
-            self.table.setItem(row_idx, 12, QTableWidgetItem(run.unit_tests_status or ""))
-            self.table.setItem(row_idx, 13, QTableWidgetItem(run.qa_status or ""))
-            self.table.setItem(row_idx, 14, QTableWidgetItem(run.approved_by or ""))
-            self.table.setItem(row_idx, 15, QTableWidgetItem(run.message or ""))
-            self.table.setRowHeight(row_idx, 22)
-            self.table.item(row_idx, 0).setData(Qt.UserRole, run.id)
-
-        if runs:
+        self.model.reset(self._filters())
+        if self.model.rowCount():
             self.table.selectRow(0)
         else:
             self.txtLogs.clear()
 
     @Slot()
-    def _load_selected_logs(self) -> None:
-        items = self.table.selectedItems()
-        if not items:
+    def _load_selected_logs(self, *_args) -> None:
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
             self.txtLogs.clear()
             return
-        run_id = items[0].data(Qt.UserRole)
+        run_id = rows[0].data(Qt.UserRole)
         if not run_id:
             self.txtLogs.clear()
             return
-        logs = self.history.get_logs(int(run_id))
+        self._show_logs(int(run_id))
+
+    def _show_logs(self, run_id: int) -> None:
+        logs = self.history.get_logs(run_id)
         self.txtLogs.clear()
         for ts, message in logs:
             self.txtLogs.append(f"[{ts}] {message}")
 
+    @Slot()
+    def search_logs(self) -> None:
+        query = self.txtSearch.text().strip()
+        if not query:
+            self.clear_search()
+            return
+        filters = self._filters()
+        filters.pop("card", None)
+        matches = self.history.search_logs(query, filters, limit=500)
+        self.tblSearch.setRowCount(len(matches))
+        for row_idx, match in enumerate(matches):
+            run_item = QTableWidgetItem(str(match.run_id))
+            run_item.setData(Qt.UserRole, (match.run_id, match.message))
+            self.tblSearch.setItem(row_idx, 0, run_item)
+            self.tblSearch.setItem(row_idx, 1, QTableWidgetItem(match.ts or ""))
+            self.tblSearch.setItem(row_idx, 2, QTableWidgetItem(match.snippet))
+            self.tblSearch.setRowHeight(row_idx, 22)
+        self.tblSearch.setVisible(True)
+        if not matches:
+            self.txtLogs.setPlainText("Sin coincidencias en los logs para los filtros actuales.")
+
+    @Slot()
+    def clear_search(self) -> None:
+        self.txtSearch.clear()
+        self.tblSearch.setRowCount(0)
+        self.tblSearch.setVisible(False)
+        self._load_selected_logs()
+
+    @Slot()
+    def _load_search_match(self) -> None:
+        items = self.tblSearch.selectedItems()
+        if not items:
+            return
+        payload = self.tblSearch.item(items[0].row(), 0).data(Qt.UserRole)
+        if not payload:
+            return
+        run_id, message = payload
+        self._show_logs(int(run_id))
+        self.txtLogs.moveCursor(QTextCursor.Start)
+        self.txtLogs.find(message)
+
     @Slot(bool)
     def export_csv(self, _checked: bool = False) -> None:
-        path, _ = QFileDialog.getSaveFileName(self, "Exportar historial", "historial.csv", "CSV (*.csv)")
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Exportar historial",
+            "historial.csv",
+            "CSV (*.csv);;NDJSON (*.ndjson);;NDJSON con logs (*.ndjson.gz)",
+        )
         if not path:
             return
-        self.history.export_csv(Path(path), **self._filters())
+        destination = Path(path)
+        if destination.name.endswith(".ndjson.gz"):
+            self.history.export_ndjson(destination, include_logs=True, **self._filters())
+        elif destination.suffix == ".ndjson":
+            self.history.export_ndjson(destination, **self._filters())
+        else:
+            self.history.export_csv(destination, **self._filters())
         QMessageBox.information(self, "Historial", "Exportación completada.")
 
     @Slot(bool)
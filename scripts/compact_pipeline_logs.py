@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""Compacta los logs por línea del historial de pipelines en bloques comprimidos."""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Iterable
+
+from buildtool.core.pipeline_history import PipelineHistory, RetentionPolicy, history_db_path
+
+
+def main(argv: Iterable[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=history_db_path(),
+        help="Ruta de pipeline_history.sqlite3 (por defecto la del usuario actual)",
+    )
+    parser.add_argument(
+        "--run",
+        type=int,
+        action="append",
+        dest="runs",
+        help="Compacta solo la ejecución indicada (se puede repetir)",
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Reconstruye además el índice de búsqueda de texto completo",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Aplica la política de retención y libera el espacio con incremental_vacuum",
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="Convierte una base antigua a auto_vacuum incremental (VACUUM completo; sin builds en curso)",
+    )
+    parser.add_argument("--max-age-days", type=int, default=RetentionPolicy.max_age_days)
+    parser.add_argument(
+        "--failed-max-age-days", type=int, default=RetentionPolicy.failed_max_age_days
+    )
+    parser.add_argument("--max-runs", type=int, default=None, dest="max_runs_per_pipeline")
+    parser.add_argument("--max-db-mb", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    history = PipelineHistory(args.db)
+    compacted = history.compact_logs(args.runs)
+    print(f"Ejecuciones compactadas: {compacted}")
+    if args.reindex:
+        indexed = history.rebuild_search_index()
+        print(f"Líneas indexadas para búsqueda: {indexed}")
+    if args.vacuum:
+        converted = history.enable_incremental_vacuum()
+        print("Base convertida a auto_vacuum incremental." if converted else "La base ya usa auto_vacuum incremental.")
+    if args.prune:
+        report = history.apply_retention(
+            RetentionPolicy(
+                max_age_days=args.max_age_days,
+                failed_max_age_days=args.failed_max_age_days,
+                max_runs_per_pipeline=args.max_runs_per_pipeline,
+                max_db_mb=args.max_db_mb,
+            )
+        )
+        print(
+            f"Ejecuciones eliminadas: {report.runs_deleted}"
+            f" ({report.bytes_before} -> {report.bytes_after} bytes)"
+        )
+
+
+if __name__ == "__main__":
+    main()